@@ -0,0 +1,59 @@
+"""Add foreign-key and filter indexes for hot service queries
+
+Revision ID: 00000004
+Revises: 00000003
+Create Date: 2025-10-21 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '00000004'
+down_revision = '00000003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Shopping lists: owner listing (newest first) and child lookups by list
+    op.create_index('ix_shopping_lists_owner_id_created_at', 'shopping_lists', ['owner_id', 'created_at'])
+    op.create_index('ix_shopping_items_list_id', 'shopping_items', ['list_id'])
+    op.create_index('ix_list_collaborators_list_id_user_id', 'list_collaborators', ['list_id', 'user_id'])
+    op.create_index('ix_list_collaborators_user_id', 'list_collaborators', ['user_id'])
+    
+    # Pantry: per-user listing sorted by name or expiration, expiry alerts
+    op.create_index('ix_pantry_items_user_id_expiration_date', 'pantry_items', ['user_id', 'expiration_date'])
+    op.create_index('ix_pantry_items_user_id_name', 'pantry_items', ['user_id', 'name'])
+    
+    # Social: friendships are looked up from either side
+    op.create_index('ix_friendships_user1_id_status', 'friendships', ['user1_id', 'status'])
+    op.create_index('ix_friendships_user2_id_status', 'friendships', ['user2_id', 'status'])
+    
+    # Only pending friend requests are listed, so keep the index to those
+    op.create_index(
+        'ix_friend_requests_to_user_id_pending', 'friend_requests', ['to_user_id', 'created_at'],
+        postgresql_where=sa.text("status = 'pending'")
+    )
+    op.create_index(
+        'ix_friend_requests_from_user_id_pending', 'friend_requests', ['from_user_id', 'created_at'],
+        postgresql_where=sa.text("status = 'pending'")
+    )
+    
+    # Activity: per-user history and retention cleanup
+    op.create_index('ix_activity_logs_user_id_created_at', 'activity_logs', ['user_id', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_activity_logs_user_id_created_at', table_name='activity_logs')
+    op.drop_index('ix_friend_requests_from_user_id_pending', table_name='friend_requests')
+    op.drop_index('ix_friend_requests_to_user_id_pending', table_name='friend_requests')
+    op.drop_index('ix_friendships_user2_id_status', table_name='friendships')
+    op.drop_index('ix_friendships_user1_id_status', table_name='friendships')
+    op.drop_index('ix_pantry_items_user_id_name', table_name='pantry_items')
+    op.drop_index('ix_pantry_items_user_id_expiration_date', table_name='pantry_items')
+    op.drop_index('ix_list_collaborators_user_id', table_name='list_collaborators')
+    op.drop_index('ix_list_collaborators_list_id_user_id', table_name='list_collaborators')
+    op.drop_index('ix_shopping_items_list_id', table_name='shopping_items')
+    op.drop_index('ix_shopping_lists_owner_id_created_at', table_name='shopping_lists')
@@ -0,0 +1,30 @@
+"""Add pg_trgm indexes for user search
+
+Revision ID: 00000005
+Revises: 00000004
+Create Date: 2025-10-21 14:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '00000005'
+down_revision = '00000004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    
+    # GIN trigram indexes serve both ILIKE '%q%' and the similarity operator
+    op.create_index('ix_users_name_trgm', 'users', ['name'],
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_users_email_trgm', 'users', ['email'],
+                    postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_email_trgm', table_name='users')
+    op.drop_index('ix_users_name_trgm', table_name='users')
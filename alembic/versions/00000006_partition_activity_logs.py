@@ -0,0 +1,98 @@
+"""Partition activity_logs by month
+
+Revision ID: 00000006
+Revises: 00000005
+Create Date: 2025-10-22 10:00:00.000000
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+
+
+# revision identifiers, used by Alembic.
+revision = '00000006'
+down_revision = '00000005'
+branch_labels = None
+depends_on = None
+
+# Partitions created ahead of the current month; the app keeps extending this
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, user_id, entity_type, entity_id, action, meta_data, created_at"
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _rename_to_legacy() -> None:
+    op.rename_table('activity_logs', 'activity_logs_legacy')
+    op.execute("ALTER TABLE activity_logs_legacy RENAME CONSTRAINT activity_logs_pkey TO activity_logs_legacy_pkey")
+    op.execute("ALTER TABLE activity_logs_legacy RENAME CONSTRAINT activity_logs_user_id_fkey TO activity_logs_legacy_user_id_fkey")
+    op.execute("ALTER INDEX ix_activity_logs_user_id_created_at RENAME TO ix_activity_logs_legacy_user_id_created_at")
+
+
+def upgrade() -> None:
+    _rename_to_legacy()
+    
+    # created_at joins the primary key: unique constraints on a partitioned
+    # table must include the partition key
+    op.create_table('activity_logs',
+        sa.Column('id', UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', UUID(as_uuid=True), nullable=False),
+        sa.Column('entity_type', sa.String(50), nullable=False),
+        sa.Column('entity_id', UUID(as_uuid=True), nullable=True),
+        sa.Column('action', sa.String(50), nullable=False),
+        sa.Column('meta_data', JSONB, default={}),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id', 'created_at', name='activity_logs_pkey'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='activity_logs_user_id_fkey'),
+        postgresql_partition_by='RANGE (created_at)'
+    )
+    op.create_index('ix_activity_logs_user_id_created_at', 'activity_logs', ['user_id', 'created_at'])
+    op.execute("CREATE TABLE activity_logs_default PARTITION OF activity_logs DEFAULT")
+    
+    # One partition per month from the oldest existing row through MONTHS_AHEAD
+    bind = op.get_bind()
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM activity_logs_legacy")).scalar()
+    today = date.today()
+    month = date((oldest or today).year, (oldest or today).month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE activity_logs_{month:%Y_%m} PARTITION OF activity_logs "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+    
+    op.execute(f"""
+        INSERT INTO activity_logs ({COLUMNS})
+        SELECT id, user_id, entity_type, entity_id, action, meta_data, coalesce(created_at, now())
+        FROM activity_logs_legacy
+    """)
+    op.drop_table('activity_logs_legacy')
+
+
+def downgrade() -> None:
+    _rename_to_legacy()
+    
+    op.create_table('activity_logs',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', UUID(as_uuid=True), nullable=False),
+        sa.Column('entity_type', sa.String(50), nullable=False),
+        sa.Column('entity_id', UUID(as_uuid=True), nullable=True),
+        sa.Column('action', sa.String(50), nullable=False),
+        sa.Column('meta_data', JSONB, default={}),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        # Named explicitly: the partitions still hold the default name until they're dropped
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='activity_logs_user_id_fkey')
+    )
+    op.create_index('ix_activity_logs_user_id_created_at', 'activity_logs', ['user_id', 'created_at'])
+    
+    op.execute(f"INSERT INTO activity_logs ({COLUMNS}) SELECT {COLUMNS} FROM activity_logs_legacy")
+    # Dropping the parent drops every partition with it
+    op.drop_table('activity_logs_legacy')
@@ -0,0 +1,27 @@
+"""Add pantry alert markers for the expiration/low-stock alert scheduler
+
+Revision ID: 00000007
+Revises: 00000006
+Create Date: 2025-11-03 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '00000007'
+down_revision = '00000006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Nullable without defaults, so adding them doesn't rewrite the table
+    op.add_column('pantry_items', sa.Column('expiry_alerted_on', sa.Date(), nullable=True))
+    op.add_column('pantry_items', sa.Column('low_stock_alerted_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('pantry_items', 'low_stock_alerted_at')
+    op.drop_column('pantry_items', 'expiry_alerted_on')
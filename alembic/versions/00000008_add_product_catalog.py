@@ -0,0 +1,35 @@
+"""Add products table for the barcode product catalog
+
+Revision ID: 00000008
+Revises: 00000007
+Create Date: 2025-11-05 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision = '00000008'
+down_revision = '00000007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('products',
+        # "C" collation so the primary key also serves ordered prefix searches
+        sa.Column('gtin', sa.String(13, collation='C'), primary_key=True),
+        sa.Column('name', sa.String(255), nullable=False),
+        sa.Column('brand', sa.String(255), nullable=True),
+        sa.Column('category_id', UUID(as_uuid=True), sa.ForeignKey('item_categories.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('default_unit', sa.String(50), nullable=False, server_default='pcs'),
+        sa.Column('image_url', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now())
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('products')
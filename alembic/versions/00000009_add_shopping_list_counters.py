@@ -0,0 +1,51 @@
+"""Add denormalized item counters to shopping lists
+
+Revision ID: 00000009
+Revises: 00000008
+Create Date: 2025-11-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '00000009'
+down_revision = '00000008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Constant server defaults are metadata-only on PostgreSQL 11+, so adding
+    # the columns doesn't rewrite the table
+    op.add_column('shopping_lists', sa.Column('item_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('shopping_lists', sa.Column('completed_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('shopping_lists', sa.Column('estimated_total', sa.Numeric(12, 2), server_default='0', nullable=False))
+    op.add_column('shopping_lists', sa.Column('actual_total', sa.Numeric(12, 2), server_default='0', nullable=False))
+    
+    # Backfill lists that already have items
+    op.execute("""
+        UPDATE shopping_lists l
+        SET item_count = c.item_count,
+            completed_count = c.completed_count,
+            estimated_total = c.estimated_total,
+            actual_total = c.actual_total
+        FROM (
+            SELECT list_id,
+                   count(*) AS item_count,
+                   count(*) FILTER (WHERE completed) AS completed_count,
+                   coalesce(sum(estimated_price), 0) AS estimated_total,
+                   coalesce(sum(actual_price), 0) AS actual_total
+            FROM shopping_items
+            GROUP BY list_id
+        ) c
+        WHERE l.id = c.list_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('shopping_lists', 'actual_total')
+    op.drop_column('shopping_lists', 'estimated_total')
+    op.drop_column('shopping_lists', 'completed_count')
+    op.drop_column('shopping_lists', 'item_count')
@@ -3,8 +3,9 @@ FastAPI dependencies
 """
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.principal_cache import Principal
+from app.db.database import get_async_db
 from app.services.auth_service import AuthService
 from app.models.user import User
 
@@ -14,10 +15,10 @@ auth_service = AuthService()
 
 async def get_current_user(
     token: str = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
     """
-    Get current authenticated user
+    Get current authenticated user (cached principal: id, is_active, name, avatar_url)
     """
     try:
         user = await auth_service.get_current_user(db, token.credentials)
@@ -29,3 +30,19 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
         )
+
+
+async def get_current_user_record(
+    principal: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Get current authenticated user's full database row
+    """
+    user = await auth_service.user_service.get_user_by_id(db, str(principal.id))
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    return user
@@ -2,7 +2,7 @@
 API v1 router configuration
 """
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users, shopping_lists, categories, social, pantry, activity, websocket
+from app.api.v1.endpoints import auth, users, shopping_lists, categories, social, pantry, products, activity, export, websocket
 
 api_router = APIRouter()
 
@@ -13,5 +13,7 @@ api_router.include_router(shopping_lists.router, prefix="/shopping-lists", tags=
 api_router.include_router(categories.router, prefix="/categories", tags=["categories"])
 api_router.include_router(social.router, prefix="/social", tags=["social"])
 api_router.include_router(pantry.router, prefix="/pantry", tags=["pantry"])
+api_router.include_router(products.router, prefix="/products", tags=["products"])
 api_router.include_router(activity.router, prefix="/activity", tags=["activity"])
+api_router.include_router(export.router, prefix="/export", tags=["export"])
 api_router.include_router(websocket.router, prefix="/realtime", tags=["websocket"])
@@ -1,10 +1,75 @@
 """
 Activity log endpoints
 """
-from fastapi import APIRouter
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pagination import set_next_cursor
+from app.db.database import get_async_db
+from app.api.dependencies import get_current_user
+from app.services.activity_service import ActivityService
+from app.schemas.activity import ActivityLogResponse
+from app.core.principal_cache import Principal
 
 router = APIRouter()
+activity_service = ActivityService()
+
+
+@router.get("/", response_model=List[ActivityLogResponse])
+async def get_my_activity(
+    response: Response,
+    entity_type: Optional[str] = Query(None, description="Only this entity type (e.g. shopping_list, pantry_item)"),
+    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    limit: int = Query(50, ge=1, le=100, description="Number of records to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (takes precedence over skip)"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the current user's activity log
+    
+    Returns the user's own activity, most recent first.
+    """
+    try:
+        activity = await activity_service.get_user_activity(
+            db, str(current_user.id), entity_type, skip, limit, cursor
+        )
+        set_next_cursor(response, activity)
+        return activity
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get activity: {str(e)}"
+        )
+
 
-# TODO: Implement activity endpoints
-# - GET /activity (get user's activity log)
-# - GET /activity/friends (get friends' activity)
+@router.get("/friends", response_model=List[ActivityLogResponse])
+async def get_friends_activity(
+    response: Response,
+    limit: int = Query(50, ge=1, le=100, description="Number of records to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get friends' activity feed
+    
+    Returns activity from the user's active friends, most recent first.
+    Friend requests, pantry changes, blocks and unfriending are never shown.
+    """
+    try:
+        activity = await activity_service.get_friends_activity(
+            db, str(current_user.id), limit, cursor
+        )
+        set_next_cursor(response, activity)
+        return activity
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get friends' activity: {str(e)}"
+        )
@@ -3,8 +3,8 @@ Authentication endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_async_db
 from app.schemas.user import (
     LoginRequest, RegisterRequest, LoginResponse, RegisterResponse, TokenResponse,
     BiometricLoginRequest
@@ -23,7 +23,7 @@ user_service = UserService()
 @router.post("/register", response_model=RegisterResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: RegisterRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Register a new user with email and phone
@@ -63,7 +63,7 @@ async def register(
 @router.post("/login", response_model=LoginResponse)
 async def login(
     login_data: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     User login with email or phone number
@@ -135,7 +135,7 @@ async def login(
 @router.post("/refresh", response_model=TokenResponse)
 async def refresh_token(
     refresh_token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Refresh access token using refresh token
@@ -156,7 +156,7 @@ async def refresh_token(
 @router.post("/biometric", response_model=LoginResponse)
 async def biometric_login(
     biometric_data: BiometricLoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Login with biometric authentication
@@ -199,7 +199,7 @@ async def biometric_login(
 @router.post("/logout")
 async def logout(
     token: str = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Logout user (invalidate tokens)
@@ -3,8 +3,9 @@ Category management endpoints
 """
 from typing import List
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_async_db
 from app.schemas.category import ItemCategoryResponse
 from app.models.category import ItemCategory
 
@@ -12,7 +13,7 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[ItemCategoryResponse])
-async def get_categories(db: Session = Depends(get_db)):
+async def get_categories(db: AsyncSession = Depends(get_async_db)):
     """Get all available categories"""
-    categories = db.query(ItemCategory).all()
-    return categories
+    result = await db.execute(select(ItemCategory))
+    return result.scalars().all()
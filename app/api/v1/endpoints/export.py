@@ -0,0 +1,102 @@
+"""
+Data export endpoints
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+
+from app.api.dependencies import get_current_user
+from app.services.export_service import ExportService, EXPORT_MEDIA_TYPES
+from app.core.principal_cache import Principal
+
+router = APIRouter()
+export_service = ExportService()
+
+FORMAT_QUERY = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv")
+GZIP_QUERY = Query(False, description="Download as a .gz file")
+
+
+def _export_response(rows, name: str, format: str, gzip: bool) -> StreamingResponse:
+    """Streaming download response for an export"""
+    filename = f"{name}.{format}"
+    media_type = EXPORT_MEDIA_TYPES[format]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        rows,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/pantry")
+async def export_pantry(
+    format: str = FORMAT_QUERY,
+    gzip: bool = GZIP_QUERY,
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Export all pantry items
+    
+    Streams every item (with its category name), sorted by name.
+    """
+    try:
+        return _export_response(
+            export_service.pantry_items(str(current_user.id), format, gzip), "pantry", format, gzip
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to export pantry: {str(e)}"
+        )
+
+
+@router.get("/shopping-lists")
+async def export_shopping_lists(
+    format: str = FORMAT_QUERY,
+    gzip: bool = GZIP_QUERY,
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Export owned and shared shopping lists with their items
+    
+    Streams one row per item, carrying its list's columns; a list without
+    items gets a single row with empty item columns.
+    """
+    try:
+        return _export_response(
+            export_service.shopping_lists(str(current_user.id), format, gzip), "shopping-lists", format, gzip
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to export shopping lists: {str(e)}"
+        )
+
+
+@router.get("/activity")
+async def export_activity(
+    format: str = FORMAT_QUERY,
+    gzip: bool = GZIP_QUERY,
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Export the activity log
+    
+    Streams the user's own activity, most recent first.
+    """
+    try:
+        return _export_response(
+            export_service.activity(str(current_user.id), format, gzip), "activity", format, gzip
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to export activity: {str(e)}"
+        )
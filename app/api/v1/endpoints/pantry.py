@@ -2,24 +2,29 @@
 Pantry management endpoints - Inventory Management System
 """
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.database import get_db
+from app.core.pagination import set_next_cursor
+from app.db.database import get_async_db
 from app.api.dependencies import get_current_user
 from app.services.pantry_service import PantryService
+from app.services.pantry_import_service import PantryImportService
 from app.schemas.pantry import (
     PantryItemCreate, PantryItemUpdate, PantryItemResponse,
-    PantryStatsResponse, PantryItemBulkUpdate, PantryItemConsume
+    PantryStatsResponse, PantryItemBulkUpdate, PantryItemBulkUpdateResponse, PantryItemConsume,
+    PantryImportResponse
 )
-from app.models.user import User
+from app.core.principal_cache import Principal
 
 router = APIRouter()
 pantry_service = PantryService()
+pantry_import_service = PantryImportService()
 
 
 @router.get("/", response_model=List[PantryItemResponse])
 async def get_pantry_items(
+    response: Response,
     category_id: Optional[str] = Query(None, description="Filter by category ID"),
     location: Optional[str] = Query(None, description="Filter by location"),
     expiring_soon: Optional[bool] = Query(None, description="Filter items expiring within 3 days"),
@@ -29,8 +34,9 @@ async def get_pantry_items(
     sort_order: str = Query("asc", description="Sort order: asc or desc"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (takes precedence over skip)"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get user's pantry items with filtering and sorting
@@ -46,9 +52,12 @@ async def get_pantry_items(
     try:
         items = await pantry_service.get_user_pantry_items(
             db, str(current_user.id), category_id, location, expiring_soon,
-            low_stock, search, sort_by, sort_order, skip, limit
+            low_stock, search, sort_by, sort_order, skip, limit, cursor
         )
+        set_next_cursor(response, items)
         return items
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -59,8 +68,8 @@ async def get_pantry_items(
 @router.post("/", response_model=PantryItemResponse, status_code=status.HTTP_201_CREATED)
 async def create_pantry_item(
     item_data: PantryItemCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new pantry item
@@ -89,11 +98,80 @@ async def create_pantry_item(
         )
 
 
+@router.put("/bulk-update", response_model=PantryItemBulkUpdateResponse)
+async def bulk_update_pantry_items(
+    bulk_data: PantryItemBulkUpdate,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Bulk update multiple pantry items
+    
+    - **item_ids**: List of item IDs to update
+    - **updates**: Updates to apply to all items
+    
+    Returns the updated items and the ids that were not found.
+    """
+    try:
+        return await pantry_service.bulk_update_pantry_items(
+            db, bulk_data, str(current_user.id)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to bulk update pantry items: {str(e)}"
+        )
+
+
+@router.post("/import", response_model=PantryImportResponse)
+async def import_pantry_items(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="csv or ndjson (default: from Content-Type)"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Import pantry items from a CSV or NDJSON request body
+    
+    Send the file as the raw request body (not multipart). CSV needs a header
+    row; columns are name, quantity, unit, category (name) or category_id,
+    location, expiration_date, low_stock_threshold, barcode and image_url.
+    NDJSON lines are objects with the same keys. Invalid rows and duplicate
+    barcodes are skipped and reported by line number.
+    """
+    file_format = format
+    if file_format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type in ("text/csv", "application/csv"):
+            file_format = "csv"
+        elif content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+            file_format = "ndjson"
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Send text/csv or application/x-ndjson, or pass format=csv|ndjson"
+            )
+    
+    try:
+        return await pantry_import_service.import_items(
+            db, str(current_user.id), request.stream(), file_format
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to import pantry items: {str(e)}"
+        )
+
+
 @router.get("/{item_id}", response_model=PantryItemResponse)
 async def get_pantry_item(
     item_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific pantry item by ID
@@ -121,8 +199,8 @@ async def get_pantry_item(
 async def update_pantry_item(
     item_id: str,
     item_data: PantryItemUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update a pantry item
@@ -149,8 +227,8 @@ async def update_pantry_item(
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_pantry_item(
     item_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a pantry item
@@ -177,8 +255,8 @@ async def delete_pantry_item(
 async def consume_pantry_item(
     item_id: str,
     consume_data: PantryItemConsume,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Consume/use quantity from a pantry item
@@ -205,36 +283,10 @@ async def consume_pantry_item(
         )
 
 
-@router.put("/bulk-update", response_model=List[PantryItemResponse])
-async def bulk_update_pantry_items(
-    bulk_data: PantryItemBulkUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """
-    Bulk update multiple pantry items
-    
-    - **item_ids**: List of item IDs to update
-    - **updates**: Updates to apply to all items
-    """
-    try:
-        items = await pantry_service.bulk_update_pantry_items(
-            db, bulk_data, str(current_user.id)
-        )
-        return items
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to bulk update pantry items: {str(e)}"
-        )
-
-
 @router.get("/stats/overview", response_model=PantryStatsResponse)
 async def get_pantry_stats(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get pantry statistics overview
@@ -253,8 +305,8 @@ async def get_pantry_stats(
 
 @router.get("/locations/list", response_model=List[str])
 async def get_pantry_locations(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all unique storage locations used by the user
@@ -272,8 +324,8 @@ async def get_pantry_locations(
 @router.get("/barcode/{barcode}", response_model=Optional[PantryItemResponse])
 async def search_by_barcode(
     barcode: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Search for pantry item by barcode
@@ -291,8 +343,8 @@ async def search_by_barcode(
 @router.get("/alerts/expiring", response_model=List[PantryItemResponse])
 async def get_expiring_items(
     days_ahead: int = Query(7, ge=1, le=30, description="Days ahead to check for expiring items"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get items expiring within specified days
@@ -313,8 +365,8 @@ async def get_expiring_items(
 
 @router.get("/alerts/low-stock", response_model=List[PantryItemResponse])
 async def get_low_stock_items(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get items with low stock (quantity at or below threshold)
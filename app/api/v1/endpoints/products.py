@@ -0,0 +1,67 @@
+"""
+Product catalog endpoints
+"""
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import get_async_db
+from app.api.dependencies import get_current_user
+from app.services.product_service import ProductService
+from app.schemas.product import ProductResponse
+from app.core.principal_cache import Principal
+
+router = APIRouter()
+product_service = ProductService()
+
+
+@router.get("/search", response_model=List[ProductResponse])
+async def search_products(
+    prefix: str = Query(..., min_length=3, max_length=13, pattern="^[0-9]+$", description="Leading digits of the GTIN-13 (UPC-A codes start with 0)"),
+    limit: int = Query(20, ge=1, le=100, description="Number of products to return"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Search the product catalog by barcode prefix
+    
+    Returns products in barcode order, e.g. everything under a company prefix.
+    """
+    try:
+        return await product_service.search_by_prefix(db, prefix, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to search products: {str(e)}"
+        )
+
+
+@router.get("/barcode/{barcode}", response_model=ProductResponse)
+async def get_product_by_barcode(
+    barcode: str,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Look up a scanned barcode in the product catalog
+    
+    Accepts EAN-13, UPC-A, EAN-8 and GTIN-14 codes and returns the product's
+    name, brand, category and default unit for pre-filling a new item.
+    """
+    try:
+        product = await product_service.lookup_barcode(db, barcode)
+        if product is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+        return product
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to look up product: {str(e)}"
+        )
@@ -1,19 +1,22 @@
 """
 Shopping list management endpoints
 """
+from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.database import get_db
+from app.core.pagination import set_next_cursor
+from app.db.database import get_async_db
 from app.api.dependencies import get_current_user
 from app.services.shopping_list_service import ShoppingListService
 from app.schemas.shopping_list import (
     ShoppingListCreate, ShoppingListUpdate, ShoppingListResponse,
     ShoppingItemCreate, ShoppingItemUpdate, ShoppingItemResponse,
-    ListCollaboratorCreate, ListCollaboratorResponse
+    ListCollaboratorCreate, ListCollaboratorResponse, ShoppingListSyncResponse,
+    ShoppingListSummary, ShoppingItemBatchRequest, ShoppingItemBatchResponse
 )
-from app.models.user import User
+from app.core.principal_cache import Principal
 
 router = APIRouter()
 shopping_list_service = ShoppingListService()
@@ -21,11 +24,13 @@ shopping_list_service = ShoppingListService()
 
 @router.get("/", response_model=List[ShoppingListResponse])
 async def get_user_shopping_lists(
+    response: Response,
     status: Optional[str] = Query(None, description="Filter by status: active, completed, archived"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (takes precedence over skip)"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all shopping lists for the current user (owned + collaborated)
@@ -36,9 +41,12 @@ async def get_user_shopping_lists(
     """
     try:
         lists = await shopping_list_service.get_user_lists(
-            db, str(current_user.id), status, skip, limit
+            db, str(current_user.id), status, skip, limit, cursor
         )
+        set_next_cursor(response, lists)
         return lists
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -46,11 +54,81 @@ async def get_user_shopping_lists(
         )
 
 
+@router.get("/sync", response_model=ShoppingListSyncResponse)
+async def sync_shopping_lists(
+    since: Optional[str] = Query(None, description="next_cursor from the previous sync; omit for a full sync"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Incremental sync of the current user's shopping lists
+    
+    Returns only lists, items and collaborators created or updated since the
+    cursor, plus tombstones for deleted ones. When **full_sync** is true the
+    client should replace its local copy instead of merging.
+    
+    - **since**: Cursor returned as next_cursor by the previous sync (optional)
+    """
+    since_at = None
+    if since:
+        try:
+            since_at = datetime.fromisoformat(since)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid sync cursor"
+            )
+    
+    try:
+        return await shopping_list_service.sync_user_lists(
+            db, str(current_user.id), since_at
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to sync shopping lists: {str(e)}"
+        )
+
+
+@router.get("/summaries", response_model=List[ShoppingListSummary])
+async def get_shopping_list_summaries(
+    response: Response,
+    list_status: Optional[str] = Query(None, alias="status", description="Filter by status: active, completed, archived"),
+    limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Lightweight list overview for the current user (owned + collaborated)
+    
+    Each list comes with its item count, completed count and estimated/actual
+    price totals, read from counters stored on the list, so no items are loaded.
+    
+    - **status**: Filter by list status (optional)
+    - **limit**: Maximum number of records to return
+    - **cursor**: Continue after the previous page (X-Next-Cursor header)
+    """
+    try:
+        summaries = await shopping_list_service.get_user_list_summaries(
+            db, str(current_user.id), list_status, limit, cursor
+        )
+        set_next_cursor(response, summaries)
+        return summaries
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve shopping list summaries: {str(e)}"
+        )
+
+
 @router.post("/", response_model=ShoppingListResponse, status_code=status.HTTP_201_CREATED)
 async def create_shopping_list(
     list_data: ShoppingListCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new shopping list
@@ -78,8 +156,8 @@ async def create_shopping_list(
 @router.get("/{list_id}", response_model=ShoppingListResponse)
 async def get_shopping_list(
     list_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific shopping list by ID
@@ -109,8 +187,8 @@ async def get_shopping_list(
 async def update_shopping_list(
     list_id: str,
     list_data: ShoppingListUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update a shopping list
@@ -139,8 +217,8 @@ async def update_shopping_list(
 @router.delete("/{list_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_shopping_list(
     list_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a shopping list
@@ -171,8 +249,8 @@ async def delete_shopping_list(
 async def add_item_to_list(
     list_id: str,
     item_data: ShoppingItemCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Add an item to a shopping list
@@ -200,13 +278,42 @@ async def add_item_to_list(
         )
 
 
+@router.post("/{list_id}/items/batch", response_model=ShoppingItemBatchResponse)
+async def batch_update_list_items(
+    list_id: str,
+    batch: ShoppingItemBatchRequest,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Add, update, delete and complete several items of a list in one request
+    
+    All operations are applied in one transaction (an invalid one rejects the
+    batch) and collaborators get a single items_batch_update event.
+    
+    - **operations**: Steps with op add (item), update (item_id, changes),
+      delete (item_id) or complete (item_id, completed; defaults to true)
+    """
+    try:
+        return await shopping_list_service.apply_item_batch(
+            db, list_id, batch.operations, str(current_user.id)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to apply item batch: {str(e)}"
+        )
+
+
 @router.put("/{list_id}/items/{item_id}", response_model=ShoppingItemResponse)
 async def update_list_item(
     list_id: str,
     item_id: str,
     item_data: ShoppingItemUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update a shopping list item
@@ -236,8 +343,8 @@ async def update_list_item(
 async def delete_list_item(
     list_id: str,
     item_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a shopping list item
@@ -268,8 +375,8 @@ async def delete_list_item(
 async def add_collaborator_to_list(
     list_id: str,
     collaborator_data: ListCollaboratorCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Add a collaborator to a shopping list
@@ -298,8 +405,8 @@ async def add_collaborator_to_list(
 async def remove_collaborator_from_list(
     list_id: str,
     user_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Remove a collaborator from a shopping list
@@ -2,17 +2,18 @@
 Social features endpoints - Friend Management System
 """
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.database import get_db
+from app.core.pagination import set_next_cursor
+from app.db.database import get_async_db
 from app.api.dependencies import get_current_user
 from app.services.social_service import SocialService
 from app.schemas.social import (
     FriendRequestCreate, FriendRequestUpdate, FriendRequestResponse, FriendshipResponse
 )
 from app.schemas.user import UserResponse
-from app.models.user import User
+from app.core.principal_cache import Principal
 
 router = APIRouter()
 social_service = SocialService()
@@ -20,10 +21,12 @@ social_service = SocialService()
 
 @router.get("/friends", response_model=List[FriendshipResponse])
 async def get_user_friends(
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (takes precedence over skip)"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all friends for the current user
@@ -32,9 +35,12 @@ async def get_user_friends(
     """
     try:
         friendships = await social_service.get_user_friends(
-            db, str(current_user.id), skip, limit
+            db, str(current_user.id), skip, limit, cursor
         )
+        set_next_cursor(response, friendships)
         return friendships
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -44,10 +50,12 @@ async def get_user_friends(
 
 @router.get("/friend-requests/received", response_model=List[FriendRequestResponse])
 async def get_received_friend_requests(
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (takes precedence over skip)"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get friend requests received by the current user
@@ -56,9 +64,12 @@ async def get_received_friend_requests(
     """
     try:
         requests = await social_service.get_friend_requests_received(
-            db, str(current_user.id), skip, limit
+            db, str(current_user.id), skip, limit, cursor
         )
+        set_next_cursor(response, requests)
         return requests
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -68,10 +79,12 @@ async def get_received_friend_requests(
 
 @router.get("/friend-requests/sent", response_model=List[FriendRequestResponse])
 async def get_sent_friend_requests(
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (takes precedence over skip)"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get friend requests sent by the current user
@@ -80,9 +93,12 @@ async def get_sent_friend_requests(
     """
     try:
         requests = await social_service.get_friend_requests_sent(
-            db, str(current_user.id), skip, limit
+            db, str(current_user.id), skip, limit, cursor
         )
+        set_next_cursor(response, requests)
         return requests
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -92,11 +108,13 @@ async def get_sent_friend_requests(
 
 @router.get("/users/search", response_model=List[UserResponse])
 async def search_users(
+    response: Response,
     q: str = Query(..., min_length=2, description="Search query (name or email)"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(20, ge=1, le=100, description="Number of records to return"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (takes precedence over skip)"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Search for users to add as friends
@@ -106,9 +124,12 @@ async def search_users(
     """
     try:
         users = await social_service.search_users(
-            db, str(current_user.id), q, skip, limit
+            db, str(current_user.id), q, skip, limit, cursor
         )
+        set_next_cursor(response, users)
         return users
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -119,8 +140,8 @@ async def search_users(
 @router.post("/friend-requests", response_model=FriendRequestResponse, status_code=status.HTTP_201_CREATED)
 async def send_friend_request(
     request_data: FriendRequestCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Send a friend request to another user
@@ -146,8 +167,8 @@ async def send_friend_request(
 async def respond_to_friend_request(
     request_id: str,
     response_data: FriendRequestUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Respond to a friend request (accept or reject)
@@ -174,8 +195,8 @@ async def respond_to_friend_request(
 @router.delete("/friend-requests/{request_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def cancel_friend_request(
     request_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Cancel a sent friend request
@@ -203,8 +224,8 @@ async def cancel_friend_request(
 @router.delete("/friends/{friendship_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def remove_friend(
     friendship_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Remove a friend (unfriend)
@@ -232,8 +253,8 @@ async def remove_friend(
 @router.post("/users/{user_id}/block", status_code=status.HTTP_204_NO_CONTENT)
 async def block_user(
     user_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Block a user
@@ -263,8 +284,8 @@ async def block_user(
 @router.delete("/users/{user_id}/block", status_code=status.HTTP_204_NO_CONTENT)
 async def unblock_user(
     user_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Unblock a user
@@ -293,8 +314,8 @@ async def unblock_user(
 async def get_blocked_users(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get users blocked by the current user
@@ -314,8 +335,8 @@ async def get_blocked_users(
 @router.get("/users/{user_id}/relationship-status")
 async def get_relationship_status(
     user_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get the relationship status between current user and another user
@@ -3,8 +3,8 @@ User management endpoints
 """
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_async_db
 from app.schemas.user import (
     UserResponse, UserUpdate, UserPreferencesUpdate, UserPreferencesResponse,
     PasswordChangeRequest, AccountDeactivationRequest, BiometricAuthRequest,
@@ -12,7 +12,7 @@ from app.schemas.user import (
 )
 from app.services.user_service import UserService
 from app.services.auth_service import AuthService
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, get_current_user_record
 
 router = APIRouter()
 user_service = UserService()
@@ -21,7 +21,7 @@ auth_service = AuthService()
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user_record)
 ):
     """Get current user information"""
     return current_user
@@ -31,7 +31,7 @@ async def get_current_user_info(
 async def update_current_user(
     user_data: UserUpdate,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update current user information"""
     updated_user = await user_service.update_user(db, current_user.id, user_data)
@@ -46,22 +46,23 @@ async def update_current_user(
 @router.get("/me/preferences", response_model=UserPreferencesResponse)
 async def get_user_preferences(
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get user preferences"""
-    if not current_user.preferences:
+    preferences = await user_service.get_user_preferences(db, str(current_user.id))
+    if not preferences:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User preferences not found"
         )
-    return current_user.preferences
+    return preferences
 
 
 @router.put("/me/preferences", response_model=UserPreferencesResponse)
 async def update_user_preferences(
     preferences_data: UserPreferencesUpdate,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update user preferences"""
     updated_preferences = await user_service.update_user_preferences(
@@ -79,7 +80,7 @@ async def update_user_preferences(
 async def change_password(
     password_data: PasswordChangeRequest,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Change user password"""
     try:
@@ -105,7 +106,7 @@ async def change_password(
 async def upload_avatar(
     file: UploadFile = File(...),
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload user avatar image"""
     try:
@@ -141,7 +142,7 @@ async def upload_avatar(
 @router.delete("/me/avatar", response_model=UserResponse)
 async def remove_avatar(
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Remove user avatar"""
     try:
@@ -157,8 +158,8 @@ async def remove_avatar(
 @router.post("/me/deactivate", response_model=dict)
 async def deactivate_account(
     deactivation_data: AccountDeactivationRequest,
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user_record),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Deactivate user account"""
     try:
@@ -196,8 +197,8 @@ async def deactivate_account(
 @router.delete("/me", response_model=dict)
 async def delete_account(
     password: str,
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user_record),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Permanently delete user account"""
     try:
@@ -231,7 +232,7 @@ async def delete_account(
 @router.get("/me/security", response_model=SecuritySettingsResponse)
 async def get_security_settings(
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get user security settings"""
     try:
@@ -248,7 +249,7 @@ async def get_security_settings(
 async def update_security_settings(
     security_data: SecuritySettingsUpdate,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update user security settings"""
     try:
@@ -269,7 +270,7 @@ async def update_security_settings(
 async def enable_biometric_auth(
     biometric_data: BiometricAuthRequest,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Enable biometric authentication for user"""
     try:
@@ -297,7 +298,7 @@ async def enable_biometric_auth(
 @router.delete("/me/biometric", response_model=dict)
 async def disable_biometric_auth(
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Disable biometric authentication for user"""
     try:
@@ -2,12 +2,13 @@
 WebSocket endpoints for real-time collaboration
 """
 import json
-from typing import Dict, Any
+from typing import Dict, Any, List
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.list_permissions import ListPermission
 from app.core.websocket import connection_manager
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.api.dependencies import get_current_user
 from app.services.auth_service import AuthService
 from app.services.shopping_list_service import ShoppingListService
@@ -19,7 +20,7 @@ shopping_list_service = ShoppingListService()
 social_service = SocialService()
 
 
-async def get_user_from_token(token: str, db: Session) -> str:
+async def get_user_from_token(token: str, db: AsyncSession) -> str:
     """Extract user ID from WebSocket token"""
     try:
         user = await auth_service.get_current_user(db, token)
@@ -38,9 +39,9 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
     
     Authentication is done via token in the URL path
     """
-    from app.db.database import SessionLocal
+    from app.db.database import AsyncSessionLocal
     
-    db = SessionLocal()
+    db = AsyncSessionLocal()
     
     try:
         # Authenticate user
@@ -68,10 +69,10 @@ async def websocket_endpoint(websocket: WebSocket, token: str):
         print(f"WebSocket error: {e}")
         await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
     finally:
-        db.close()
+        await db.close()
 
 
-async def handle_websocket_message(message: Dict[str, Any], user_id: str, db: Session):
+async def handle_websocket_message(message: Dict[str, Any], user_id: str, db: AsyncSession):
     """Handle incoming WebSocket messages"""
     message_type = message.get("type")
     
@@ -82,9 +83,9 @@ async def handle_websocket_message(message: Dict[str, Any], user_id: str, db: Se
         list_id = data.get("list_id")
         if list_id:
             print(f"🔔 DEBUG: User {user_id} requesting to join room: list_{list_id}")
-            # Verify user has access to the list
-            shopping_list = await shopping_list_service.get_list_by_id(db, list_id, user_id)
-            if shopping_list:
+            # Verify user has access to the list (permission mask only, the list isn't loaded)
+            permissions = await shopping_list_service.get_list_permissions(db, list_id, user_id)
+            if permissions and permissions & ListPermission.VIEW:
                 room_id = f"list_{list_id}"
                 await connection_manager.join_room(user_id, room_id)
                 print(f"✅ DEBUG: User {user_id} successfully joined room: {room_id}")
@@ -156,6 +157,7 @@ async def get_websocket_stats():
         "total_connections": connection_manager.get_total_connections(),
         "active_users": len(connection_manager.active_connections),
         "active_rooms": len(connection_manager.room_subscriptions),
+        "encode_stats": connection_manager.encoder.get_stats(),
         "timestamp": "2024-01-01T00:00:00Z"  # You might want to use actual timestamp
     }
 
@@ -164,7 +166,7 @@ async def get_websocket_stats():
 async def broadcast_message(
     message: Dict[str, Any],
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Broadcast a message to all connected users (admin only)
@@ -184,7 +186,7 @@ async def send_notification_to_user(
     user_id: str,
     notification: Dict[str, Any],
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Send a notification to a specific user
@@ -206,6 +208,11 @@ async def notify_item_update(item_data: Dict[str, Any], list_id: str):
     await connection_manager.send_item_update(item_data, list_id)
 
 
+async def notify_items_update(items_data: List[Dict[str, Any]], list_id: str):
+    """Notify all list collaborators of several item updates in one event"""
+    await connection_manager.send_item_updates(items_data, list_id)
+
+
 async def notify_friend_request(request_data: Dict[str, Any], user_id: str):
     """Notify user of a new friend request"""
     await connection_manager.send_friend_request_notification(request_data, user_id)
@@ -0,0 +1,299 @@
+"""
+Precomputed friends' activity timelines (fan-out on write)
+"""
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+import orjson
+from sqlalchemy import and_, case, not_, or_, select, union_all
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+
+from app.core.config import settings
+from app.core.pagination import decode_cursor
+from app.core.websocket import connection_manager
+from app.db.database import AsyncSessionLocal
+from app.models.activity import ActivityLog
+from app.models.shopping_list import ListCollaborator, ShoppingList
+from app.models.social import Friendship
+
+# Activity that stays out of friends' feeds
+FEED_HIDDEN_ENTITY_TYPES = ("friend_request", "user", "pantry_item")
+FEED_HIDDEN_ACTIONS = {("friendship", "removed")}
+
+# Activity about a shopping list (names of the list, its items and members);
+# only friends who own or collaborate on that list see it
+LIST_SCOPED_ENTITY_TYPES = ("shopping_list", "shopping_item", "list_collaborator")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def is_shared(entity_type: str, action: str) -> bool:
+    """Whether an activity appears in the actor's friends' feeds"""
+    return entity_type not in FEED_HIDDEN_ENTITY_TYPES and (entity_type, action) not in FEED_HIDDEN_ACTIONS
+
+
+def shared_activity_filter():
+    """SQL counterpart of is_shared"""
+    return and_(
+        ActivityLog.entity_type.notin_(FEED_HIDDEN_ENTITY_TYPES),
+        *[
+            not_(and_(ActivityLog.entity_type == entity_type, ActivityLog.action == action))
+            for entity_type, action in FEED_HIDDEN_ACTIONS
+        ]
+    )
+
+
+def activity_list_id(entry: Dict[str, Any]) -> Optional[str]:
+    """List a list-scoped feed entry is about, or None if it names no valid list"""
+    if entry["entity_type"] == "shopping_list":
+        list_id = entry["entity_id"]
+    else:
+        list_id = (entry["meta_data"] or {}).get("list_id")
+    try:
+        return str(UUID(str(list_id))) if list_id else None
+    except ValueError:
+        return None
+
+
+def list_activity_filter(list_ids):
+    """Only list-scoped activity about the given lists (a subquery of ids) passes"""
+    list_id = case(
+        (ActivityLog.entity_type == "shopping_list", ActivityLog.entity_id),
+        else_=ActivityLog.meta_data["list_id"].astext.cast(PG_UUID(as_uuid=True))
+    )
+    return or_(ActivityLog.entity_type.notin_(LIST_SCOPED_ENTITY_TYPES), list_id.in_(list_ids))
+
+
+def friend_ids_select(user_id: str):
+    """Ids of the user's active friends (both sides of the friendship)"""
+    return union_all(
+        select(Friendship.user2_id).where(Friendship.user1_id == user_id, Friendship.status == "active"),
+        select(Friendship.user1_id).where(Friendship.user2_id == user_id, Friendship.status == "active")
+    )
+
+
+def activity_entry(row) -> Dict[str, Any]:
+    """Compact feed entry from an ActivityLog row or a buffered writer row"""
+    get = row.get if isinstance(row, dict) else lambda field: getattr(row, field)
+    entity_id = get("entity_id")
+    return {
+        "id": str(get("id")),
+        "user_id": str(get("user_id")),
+        "entity_type": get("entity_type"),
+        "entity_id": str(entity_id) if entity_id is not None else None,
+        "action": get("action"),
+        "meta_data": get("meta_data") or {},
+        "created_at": get("created_at").astimezone(timezone.utc)
+    }
+
+
+def _score(created_at: datetime) -> int:
+    """Sorted-set score: microseconds since the epoch"""
+    delta = created_at - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _json_default(value):
+    return float(value)  # Decimals in metadata, stored as numbers like the JSONB column
+
+
+class ActivityTimeline:
+    """
+    Capped per-user timelines of friends' activity in Redis
+    
+    Each timeline is a sorted set scored by created_at whose members are
+    "<id> <json entry>", so equal timestamps order by id just like the SQL
+    keyset and a page is one ZREVRANGEBYSCORE. The activity log writer fans
+    every flushed batch out to the actors' friends; timelines are trimmed to
+    ACTIVITY_TIMELINE_SIZE entries and expire after
+    ACTIVITY_TIMELINE_TTL_SECONDS without writes.
+    
+    A timeline only serves reads after it has been backfilled from SQL, which
+    adds a marker member at score 0. Until then (a cold user), for pages
+    older than a trimmed timeline holds, and without Redis, callers read
+    from SQL instead.
+    """
+    
+    WARM_MARKER = b"~"
+    # Bumped whenever what a timeline may contain changes, so old timelines are rebuilt
+    VERSION = 2
+    
+    def __init__(
+        self,
+        size: int = settings.ACTIVITY_TIMELINE_SIZE,
+        ttl: int = settings.ACTIVITY_TIMELINE_TTL_SECONDS
+    ):
+        self.size = size
+        self.ttl = ttl
+    
+    @property
+    def available(self) -> bool:
+        """Whether timelines can be used (Redis is connected)"""
+        return connection_manager.redis is not None
+    
+    def _key(self, user_id: str) -> str:
+        return f"{settings.ACTIVITY_TIMELINE_REDIS_PREFIX}:v{self.VERSION}:{user_id}"
+    
+    @staticmethod
+    def _member(entry: Dict[str, Any]) -> bytes:
+        return entry["id"].encode() + b" " + orjson.dumps(entry, default=_json_default, option=orjson.OPT_SORT_KEYS)
+    
+    @staticmethod
+    def _entry(member: bytes) -> Dict[str, Any]:
+        entry = orjson.loads(member.split(b" ", 1)[1])
+        entry["created_at"] = datetime.fromisoformat(entry["created_at"])
+        return entry
+    
+    def _add(self, pipe, user_id: str, members: Dict[bytes, int]):
+        key = self._key(user_id)
+        pipe.zadd(key, members)
+        # Rank 0 is the warm marker (score 0); keep it plus the newest `size` entries
+        pipe.zremrangebyrank(key, 1, -(self.size + 2))
+        pipe.expire(key, self.ttl)
+    
+    async def read(
+        self,
+        user_id: str,
+        limit: int,
+        cursor: Optional[str] = None
+    ) -> Optional[Tuple[List[Dict[str, Any]], bool]]:
+        """
+        Newest entries after the cursor, plus whether the timeline holds all
+        older activity; None when the timeline is cold or Redis is unavailable
+        """
+        redis_client = connection_manager.redis
+        if not redis_client:
+            return None
+        
+        key = self._key(user_id)
+        max_score, after_id = "+inf", None
+        if cursor:
+            created_at, after_id = decode_cursor(cursor)
+            max_score, after_id = _score(created_at), str(after_id)
+        
+        entries: List[Dict[str, Any]] = []
+        offset = 0
+        try:
+            while True:
+                # Fetch one extra per round so ties at the cursor's timestamp can be skipped
+                batch = limit - len(entries) + 1
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    pipe.zscore(key, self.WARM_MARKER)
+                    pipe.zcard(key)
+                    pipe.zrevrangebyscore(key, max_score, "(0", start=offset, num=batch, withscores=True)
+                    warm, count, members = await pipe.execute()
+                if warm is None:
+                    return None
+                
+                for member, score in members:
+                    if after_id and score == max_score and member.split(b" ", 1)[0].decode() >= after_id:
+                        continue
+                    entries.append(self._entry(member))
+                
+                offset += len(members)
+                if len(entries) >= limit or len(members) < batch:
+                    break
+        except Exception as e:
+            print(f"⚠️ Activity timeline read failed: {e}")
+            return None
+        
+        # A full timeline may have trimmed older entries
+        return entries[:limit], count <= self.size
+    
+    async def fill(self, user_id: str, entries: List[Dict[str, Any]]):
+        """Backfill a cold timeline from SQL and mark it warm"""
+        redis_client = connection_manager.redis
+        if not redis_client:
+            return
+        
+        members = {self._member(entry): _score(entry["created_at"]) for entry in entries}
+        members[self.WARM_MARKER] = 0
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                self._add(pipe, user_id, members)
+                await pipe.execute()
+        except Exception as e:
+            print(f"⚠️ Activity timeline backfill failed: {e}")
+    
+    async def fan_out(self, rows: Iterable[Dict[str, Any]]):
+        """Append freshly written activity rows to the actors' friends' timelines"""
+        redis_client = connection_manager.redis
+        if not redis_client:
+            return
+        
+        by_actor: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for row in rows:
+            if is_shared(row["entity_type"], row["action"]):
+                entry = activity_entry(row)
+                by_actor[entry["user_id"]].append(entry)
+        if not by_actor:
+            return
+        
+        list_ids = {
+            activity_list_id(entry)
+            for entries in by_actor.values() for entry in entries
+            if entry["entity_type"] in LIST_SCOPED_ENTITY_TYPES
+        }
+        list_ids.discard(None)
+        
+        async with AsyncSessionLocal() as db:
+            actors = list(by_actor)
+            result = await db.execute(
+                select(Friendship.user1_id, Friendship.user2_id).where(
+                    or_(Friendship.user1_id.in_(actors), Friendship.user2_id.in_(actors)),
+                    Friendship.status == "active"
+                )
+            )
+            friendships = result.all()
+            list_members = await self._list_members(db, list_ids) if friendships and list_ids else {}
+        
+        timelines: Dict[str, Dict[bytes, int]] = defaultdict(dict)
+        for user1_id, user2_id in friendships:
+            for actor, friend in ((str(user1_id), str(user2_id)), (str(user2_id), str(user1_id))):
+                for entry in by_actor.get(actor, ()):
+                    if (
+                        entry["entity_type"] in LIST_SCOPED_ENTITY_TYPES
+                        and friend not in list_members.get(activity_list_id(entry), ())
+                    ):
+                        continue
+                    timelines[friend][self._member(entry)] = _score(entry["created_at"])
+        if not timelines:
+            return
+        
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for friend, members in timelines.items():
+                    self._add(pipe, friend, members)
+                await pipe.execute()
+        except Exception as e:
+            # Timelines that missed entries would stay wrong; make them rebuild from SQL
+            print(f"⚠️ Activity timeline fan-out failed: {e}")
+            await self.invalidate(*timelines)
+    
+    async def _list_members(self, db, list_ids: Set[str]) -> Dict[str, Set[str]]:
+        """Owner and collaborator ids of each list"""
+        result = await db.execute(union_all(
+            select(ShoppingList.id, ShoppingList.owner_id).where(ShoppingList.id.in_(list_ids)),
+            select(ListCollaborator.list_id, ListCollaborator.user_id).where(ListCollaborator.list_id.in_(list_ids))
+        ))
+        members: Dict[str, Set[str]] = defaultdict(set)
+        for list_id, user_id in result.all():
+            members[str(list_id)].add(str(user_id))
+        return members
+    
+    async def invalidate(self, *user_ids: str):
+        """Drop timelines whose friend set changed; the next read rebuilds them"""
+        redis_client = connection_manager.redis
+        if not redis_client or not user_ids:
+            return
+        
+        try:
+            await redis_client.delete(*[self._key(str(user_id)) for user_id in user_ids])
+        except Exception as e:
+            print(f"⚠️ Activity timeline invalidation failed: {e}")
+
+
+# Global activity timeline instance
+activity_timeline = ActivityTimeline()
@@ -0,0 +1,265 @@
+"""
+Buffered, batched writer for activity log entries
+"""
+import asyncio
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+import orjson
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError, InterfaceError, OperationalError
+
+from app.core.activity_timeline import activity_timeline
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal, json_serializer
+from app.models.activity import ActivityLog
+from app.models.user import User
+
+
+class ActivityLogWriter:
+    """
+    Collects activity log rows in memory and inserts them in batches
+    
+    Services call record() after their own commit, so a write endpoint pays
+    for one transaction instead of two. A background task flushes the buffer
+    with a single multi-row INSERT whenever ACTIVITY_LOG_BATCH_SIZE rows are
+    waiting or ACTIVITY_LOG_FLUSH_INTERVAL_MS has passed, and stop() drains
+    whatever is left on shutdown. If the database is unreachable rows are
+    kept (up to ACTIVITY_LOG_MAX_BUFFER, oldest dropped first) and retried.
+    Rows with malformed ids or unserializable metadata are rejected by
+    record(); a batch the database still refuses is split in halves until
+    the offending rows are isolated, so only those rows are dropped.
+    Each written batch is fanned out to the friends' activity timelines.
+    """
+    
+    def __init__(
+        self,
+        batch_size: int = settings.ACTIVITY_LOG_BATCH_SIZE,
+        flush_interval_ms: int = settings.ACTIVITY_LOG_FLUSH_INTERVAL_MS,
+        max_buffer: int = settings.ACTIVITY_LOG_MAX_BUFFER
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_buffer = max_buffer
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        
+        # Metrics
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+    
+    def record(
+        self,
+        user_id: str,
+        entity_type: str,
+        entity_id: Optional[str],
+        action: str,
+        metadata: Optional[dict] = None
+    ):
+        """Queue one activity row; never touches the database"""
+        try:
+            row = self._row(user_id, entity_type, entity_id, action, metadata)
+        except (TypeError, ValueError) as e:
+            # Callers have already committed; refuse the row instead of failing a whole batch later
+            self.rejected += 1
+            print(f"⚠️ Activity log row rejected ({entity_type}/{action}): {e}")
+            return
+        
+        self._buffer.append(row)
+        while len(self._buffer) > self.max_buffer:
+            self._buffer.popleft()
+            self.dropped += 1
+        
+        self._ensure_started()
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+    
+    @staticmethod
+    def _row(
+        user_id: str,
+        entity_type: str,
+        entity_id: Optional[str],
+        action: str,
+        metadata: Optional[dict]
+    ) -> Dict[str, Any]:
+        """Buffered row with values the INSERT accepts; raises ValueError/TypeError otherwise"""
+        for column, value in ((ActivityLog.entity_type, entity_type), (ActivityLog.action, action)):
+            if not isinstance(value, str) or not 0 < len(value) <= column.type.length:
+                raise ValueError(f"{column.name} must be 1-{column.type.length} characters")
+        if metadata is not None and not isinstance(metadata, dict):
+            raise TypeError("metadata must be a dict")
+        
+        return {
+            "id": uuid.uuid4(),
+            "user_id": uuid.UUID(str(user_id)),
+            "entity_type": entity_type,
+            "entity_id": uuid.UUID(str(entity_id)) if entity_id is not None else None,
+            "action": action,
+            # Round-trip through the column's serializer: unserializable values fail
+            # here, and later changes to the caller's dict don't reach the buffer
+            "meta_data": orjson.loads(json_serializer(metadata or {})),
+            "created_at": datetime.now(timezone.utc)
+        }
+    
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+    
+    async def start(self):
+        """Start the background flush task"""
+        self._ensure_started()
+        print("✅ Activity log writer started")
+    
+    async def stop(self):
+        """Stop the flush task and persist everything still buffered"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        while self._buffer:
+            if not await self.flush():
+                print(f"⚠️ Activity log writer stopped with {len(self._buffer)} unsaved rows")
+                break
+    
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            
+            while self._buffer:
+                if not await self.flush() or len(self._buffer) < self.batch_size:
+                    break
+    
+    async def flush(self) -> bool:
+        """Insert up to one batch; returns False if it was requeued for a retry"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        
+        async with self._flush_lock:
+            rows = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            if not rows:
+                return True
+            
+            started = time.perf_counter()
+            written: List[Dict[str, Any]] = []
+            dropped: List[Dict[str, Any]] = []
+            try:
+                await self._write(rows, written, dropped)
+            except (OperationalError, InterfaceError, OSError) as e:
+                # Database unreachable: keep the rows not settled yet for the next attempt
+                settled = {row["id"] for row in written + dropped}
+                await self._settle(written, dropped, started)
+                return self._requeue([row for row in rows if row["id"] not in settled], e)
+            
+            await self._settle(written, dropped, started)
+            return True
+    
+    async def _write(
+        self,
+        rows: List[Dict[str, Any]],
+        written: List[Dict[str, Any]],
+        dropped: List[Dict[str, Any]],
+        check_users: bool = True
+    ):
+        """
+        Insert rows, splitting the batch to isolate rows the database refuses
+        
+        Inserted rows are appended to written and refused ones to dropped;
+        connectivity errors propagate so the caller can requeue the rest.
+        """
+        if not rows:
+            return
+        try:
+            await self._insert(rows)
+            written.extend(rows)
+            return
+        except (OperationalError, InterfaceError, OSError):
+            raise
+        except IntegrityError as e:
+            error = e
+            if check_users:
+                # Most likely a user was deleted while their rows were buffered
+                kept = await self._rows_with_existing_users(rows)
+                kept_ids = {row["id"] for row in kept}
+                dropped.extend(row for row in rows if row["id"] not in kept_ids)
+                return await self._write(kept, written, dropped, check_users=False)
+        except Exception as e:
+            error = e
+        
+        if len(rows) == 1:
+            dropped.append(rows[0])
+            print(f"❌ Activity log row dropped ({rows[0]['entity_type']}/{rows[0]['action']}): {getattr(error, 'orig', error)}")
+            return
+        middle = len(rows) // 2
+        await self._write(rows[:middle], written, dropped, check_users=False)
+        await self._write(rows[middle:], written, dropped, check_users=False)
+    
+    async def _settle(self, written: List[Dict[str, Any]], dropped: List[Dict[str, Any]], started: float):
+        """Count a flush's outcome and fan its written rows out to the timelines"""
+        self.dropped += len(dropped)
+        if not written:
+            return
+        self.written += len(written)
+        self.batches += 1
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        
+        try:
+            await activity_timeline.fan_out(written)
+        except Exception as e:
+            print(f"⚠️ Activity timeline fan-out failed: {e}")
+    
+    async def _insert(self, rows: List[Dict[str, Any]]):
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(ActivityLog).values(rows))
+            await db.commit()
+    
+    async def _rows_with_existing_users(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(User.id).where(User.id.in_({str(row["user_id"]) for row in rows})))
+            existing = {str(user_id) for user_id in result.scalars().all()}
+        
+        return [row for row in rows if str(row["user_id"]) in existing]
+    
+    def _requeue(self, rows: List[Dict[str, Any]], error: Exception) -> bool:
+        self.failed_flushes += 1
+        print(f"❌ Activity log flush failed ({len(rows)} rows requeued): {error}")
+        self._buffer.extendleft(reversed(rows))
+        while len(self._buffer) > self.max_buffer:
+            self._buffer.popleft()
+            self.dropped += 1
+        return False
+    
+    def get_stats(self) -> dict:
+        """Buffer depth and write counters for monitoring"""
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "batches": self.batches,
+            "avg_batch_size": round(self.written / self.batches, 1) if self.batches else 0.0,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2)
+        }
+
+
+# Global activity log writer instance
+activity_writer = ActivityLogWriter()
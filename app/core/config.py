@@ -35,6 +35,15 @@ class Settings(BaseSettings):
             return v
         return f"postgresql://{values.get('DATABASE_USER')}:{values.get('DATABASE_PASSWORD')}@{values.get('DATABASE_HOST')}:{values.get('DATABASE_PORT')}/{values.get('DATABASE_NAME')}"
     
+    @property
+    def async_database_url(self) -> str:
+        """DATABASE_URL rewritten for the asyncpg driver"""
+        url = self.DATABASE_URL
+        if url.startswith("postgresql://"):
+            url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+        # asyncpg takes "ssl" instead of libpq's "sslmode"
+        return url.replace("sslmode=", "ssl=")
+    
     # JWT Configuration
     JWT_SECRET_KEY: str = "your-super-secret-jwt-key-change-this-in-production"
     JWT_ALGORITHM: str = "HS256"
@@ -72,11 +81,75 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "json"
     
+    # Delta Sync
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 30  # Older cursors get a full sync
+    
+    # Shopping Item Batches
+    SHOPPING_ITEM_BATCH_MAX_OPERATIONS: int = 500  # Operations accepted by one batch request
+    
+    # Activity Log Writer
+    ACTIVITY_LOG_BATCH_SIZE: int = 500  # Rows per multi-row INSERT
+    ACTIVITY_LOG_FLUSH_INTERVAL_MS: int = 1000  # Max time a row waits in the buffer
+    ACTIVITY_LOG_MAX_BUFFER: int = 50000  # Oldest rows are dropped beyond this while the DB is down
+    ACTIVITY_LOG_PARTITION_MONTHS_AHEAD: int = 3  # Monthly partitions created ahead of time
+    ACTIVITY_LOG_PARTITION_CHECK_INTERVAL_SECONDS: int = 3600  # How often workers create upcoming partitions
+    
+    # Activity Feed
+    ACTIVITY_TIMELINE_SIZE: int = 500  # Entries kept per friends' timeline in Redis
+    ACTIVITY_TIMELINE_TTL_SECONDS: int = 604800  # Idle timelines expire and are rebuilt from SQL
+    ACTIVITY_TIMELINE_REDIS_PREFIX: str = "pentrypal:timeline"
+    
+    # Pantry Stats Cache
+    PANTRY_STATS_CACHE_TTL_SECONDS: int = 3600  # Bounds drift from writes that bypass PantryService
+    PANTRY_STATS_CACHE_REDIS_PREFIX: str = "pentrypal:pantrystats"
+    
+    # Pantry Alerts
+    PANTRY_ALERTS_ENABLED: bool = True  # Background sweep pushing pantry_alert notifications
+    PANTRY_ALERT_INTERVAL_SECONDS: int = 60
+    PANTRY_ALERT_EXPIRING_DAYS: int = 3  # Items expiring within this many days are alerted
+    PANTRY_ALERT_MAX_ITEMS: int = 20  # Items listed per kind in one notification (counts are complete)
+    
+    # Pantry Import
+    PANTRY_IMPORT_BATCH_SIZE: int = 1000  # Rows per COPY into the staging table
+    PANTRY_IMPORT_MAX_ROWS: int = 50000
+    PANTRY_IMPORT_MAX_ERRORS: int = 100  # Row errors returned in the response (all are counted)
+    
+    # Data Export
+    EXPORT_BATCH_SIZE: int = 1000  # Rows fetched per server-side cursor round trip
+    
     # Rate Limiting
-    RATE_LIMIT_PER_MINUTE: int = 60
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PER_MINUTE: int = 60  # Bucket size and refill rate per user (or IP when anonymous)
+    RATE_LIMIT_REDIS_PREFIX: str = "pentrypal:ratelimit"
+    
+    # Password Hashing
+    PASSWORD_HASH_WORKERS: int = 2  # bcrypt threads per API worker
+    PASSWORD_HASH_MAX_QUEUE: int = 64  # Waiting hashes before requests get a 503
+    
+    # Principal Cache (auth lookups)
+    PRINCIPAL_CACHE_SIZE: int = 10000  # Principals kept in the in-process LRU
+    PRINCIPAL_CACHE_LOCAL_TTL_SECONDS: int = 5  # Bounds staleness on other workers after invalidation
+    PRINCIPAL_CACHE_REDIS_TTL_SECONDS: int = 300
+    PRINCIPAL_CACHE_REDIS_PREFIX: str = "pentrypal:principal"
+    
+    # List Permission Cache (shopping list authorization)
+    LIST_PERMISSION_CACHE_SIZE: int = 50000  # (list, user) masks kept in the in-process LRU
+    LIST_PERMISSION_CACHE_LOCAL_TTL_SECONDS: int = 5  # Bounds how long other workers honor a revoked permission
+    LIST_PERMISSION_CACHE_REDIS_TTL_SECONDS: int = 60
+    LIST_PERMISSION_CACHE_REDIS_PREFIX: str = "pentrypal:listperm"
+    
+    # Product Catalog (barcode lookups)
+    PRODUCT_CACHE_SIZE: int = 50000  # Barcodes kept in the in-process LRU
+    PRODUCT_CACHE_TTL_SECONDS: int = 3600  # Bounds staleness after the catalog is reloaded
+    PRODUCT_CACHE_MISS_TTL_SECONDS: int = 300  # Unknown barcodes are remembered for less time
     
     # WebSocket Configuration
     WEBSOCKET_HEARTBEAT_INTERVAL: int = 30
+    WEBSOCKET_REDIS_FANOUT: bool = True  # Fan out room broadcasts across workers via Redis pub/sub
+    WEBSOCKET_REDIS_CHANNEL_PREFIX: str = "pentrypal:ws"
+    WEBSOCKET_SEND_QUEUE_SIZE: int = 256  # Outbound frames buffered per connection
+    WEBSOCKET_OVERFLOW_POLICY: str = "drop_oldest"  # drop_oldest | coalesce | disconnect
+    WEBSOCKET_ITEM_BATCH_WINDOW_MS: int = 100  # Merge item updates per list within this window (0 disables)
     
     class Config:
         env_file = ".env"
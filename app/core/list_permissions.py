@@ -0,0 +1,181 @@
+"""
+Per-(list, user) permission bitmasks for shopping list authorization
+"""
+import time
+from collections import OrderedDict
+from enum import IntFlag
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.websocket import connection_manager
+
+
+class ListPermission(IntFlag):
+    """What a user may do on one shopping list"""
+    VIEW = 1
+    ADD_ITEMS = 2
+    EDIT_ITEMS = 4
+    DELETE_ITEMS = 8
+    ASSIGN_ITEMS = 16
+    INVITE_OTHERS = 32
+    EDIT_LIST = 64
+    OWNER = 128
+
+
+NO_ACCESS = ListPermission(0)
+OWNER_PERMISSIONS = ListPermission(sum(ListPermission))
+
+# Collaborator permissions JSON key -> flag
+PERMISSION_FLAGS = {
+    "can_add_items": ListPermission.ADD_ITEMS,
+    "can_edit_items": ListPermission.EDIT_ITEMS,
+    "can_delete_items": ListPermission.DELETE_ITEMS,
+    "can_assign_items": ListPermission.ASSIGN_ITEMS,
+    "can_invite_others": ListPermission.INVITE_OTHERS,
+    "can_edit_list": ListPermission.EDIT_LIST,
+}
+
+# Default collaborator permissions per role
+ROLE_PERMISSIONS: Dict[str, Dict[str, bool]] = {
+    "owner": {
+        "can_edit_items": True,
+        "can_add_items": True,
+        "can_delete_items": True,
+        "can_assign_items": True,
+        "can_invite_others": True,
+        "can_edit_list": True
+    },
+    "editor": {
+        "can_edit_items": True,
+        "can_add_items": True,
+        "can_delete_items": False,
+        "can_assign_items": True,
+        "can_invite_others": False,
+        "can_edit_list": False
+    },
+    "viewer": {
+        "can_edit_items": False,
+        "can_add_items": False,
+        "can_delete_items": False,
+        "can_assign_items": False,
+        "can_invite_others": False,
+        "can_edit_list": False
+    },
+}
+
+
+def permission_mask(
+    is_owner: bool,
+    role: Optional[str],
+    permissions: Optional[Dict[str, Any]]
+) -> ListPermission:
+    """
+    Mask for a list's owner, a collaborator (role + permissions JSON), or
+    anyone else (role None)
+    
+    Keys missing from a collaborator's permissions fall back to the role's
+    defaults.
+    """
+    if is_owner:
+        return OWNER_PERMISSIONS
+    if role is None:
+        return NO_ACCESS
+    
+    granted = dict(ROLE_PERMISSIONS.get(role, ROLE_PERMISSIONS["viewer"]))
+    granted.update(permissions or {})
+    mask = ListPermission.VIEW
+    for key, flag in PERMISSION_FLAGS.items():
+        if granted.get(key):
+            mask |= flag
+    return mask
+
+
+class ListPermissionCache:
+    """
+    Two-tier cache of permission masks keyed by (list id, user id)
+    
+    Works like the principal cache: an in-process LRU in front of Redis
+    (when connected), cleared on both tiers by collaborator changes and list
+    deletion. The local TTL bounds how long other workers can act on a
+    revoked permission; the Redis TTL bounds an entry written from a read
+    that raced an invalidation.
+    """
+    
+    def __init__(
+        self,
+        max_size: int = settings.LIST_PERMISSION_CACHE_SIZE,
+        local_ttl: float = settings.LIST_PERMISSION_CACHE_LOCAL_TTL_SECONDS,
+        redis_ttl: int = settings.LIST_PERMISSION_CACHE_REDIS_TTL_SECONDS
+    ):
+        self.max_size = max_size
+        self.local_ttl = local_ttl
+        self.redis_ttl = redis_ttl
+        # "list_id:user_id" -> (expires at, mask), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, ListPermission]]" = OrderedDict()
+    
+    def _entry_key(self, list_id: str, user_id: str) -> str:
+        return f"{str(list_id).lower()}:{str(user_id).lower()}"
+    
+    def _key(self, entry_key: str) -> str:
+        return f"{settings.LIST_PERMISSION_CACHE_REDIS_PREFIX}:{entry_key}"
+    
+    async def get(self, list_id: str, user_id: str) -> Optional[ListPermission]:
+        """Return the cached mask, or None on a miss"""
+        entry_key = self._entry_key(list_id, user_id)
+        entry = self._entries.get(entry_key)
+        if entry:
+            expires_at, mask = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(entry_key)
+                return mask
+            del self._entries[entry_key]
+        
+        redis_client = connection_manager.redis
+        if redis_client:
+            try:
+                data = await redis_client.get(self._key(entry_key))
+                if data is not None:
+                    mask = ListPermission(int(data))
+                    self._store_local(entry_key, mask)
+                    return mask
+            except Exception as e:
+                print(f"⚠️ List permission cache Redis read failed: {e}")
+        
+        return None
+    
+    async def set(self, list_id: str, user_id: str, mask: ListPermission):
+        """Cache a mask freshly computed from the database"""
+        entry_key = self._entry_key(list_id, user_id)
+        self._store_local(entry_key, mask)
+        
+        redis_client = connection_manager.redis
+        if redis_client:
+            try:
+                await redis_client.set(self._key(entry_key), int(mask), ex=self.redis_ttl)
+            except Exception as e:
+                print(f"⚠️ List permission cache Redis write failed: {e}")
+    
+    async def invalidate(self, list_id: str, user_ids: Iterable[str]):
+        """Drop the masks of these users on a list after its membership changed"""
+        entry_keys = [self._entry_key(list_id, user_id) for user_id in user_ids]
+        if not entry_keys:
+            return
+        for entry_key in entry_keys:
+            self._entries.pop(entry_key, None)
+        
+        redis_client = connection_manager.redis
+        if redis_client:
+            try:
+                await redis_client.delete(*[self._key(entry_key) for entry_key in entry_keys])
+            except Exception as e:
+                print(f"⚠️ List permission cache Redis invalidation failed: {e}")
+    
+    def _store_local(self, entry_key: str, mask: ListPermission):
+        self._entries[entry_key] = (time.monotonic() + self.local_ttl, mask)
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+# Global list permission cache instance
+list_permission_cache = ListPermissionCache()
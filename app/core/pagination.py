@@ -0,0 +1,121 @@
+"""
+Keyset (cursor) pagination helpers
+"""
+import base64
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, List, Optional, Tuple
+from uuid import UUID
+
+import orjson
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class CursorPage(list):
+    """A page of results that also carries the cursor for the next page"""
+    
+    def __init__(self, rows, next_cursor: Optional[str] = None):
+        super().__init__(rows)
+        self.next_cursor = next_cursor
+
+
+def _encode_value(value: Any) -> List[Any]:
+    """Tag a sort value with its type so it round-trips through JSON"""
+    if isinstance(value, datetime):
+        return ["dt", value.isoformat()]
+    if isinstance(value, date):
+        return ["d", value.isoformat()]
+    if isinstance(value, Decimal):
+        return ["dec", str(value)]
+    if isinstance(value, UUID):
+        return ["uuid", str(value)]
+    return ["v", value]
+
+
+def _decode_value(tagged: List[Any]) -> Any:
+    kind, value = tagged
+    if kind == "dt":
+        return datetime.fromisoformat(value)
+    if kind == "d":
+        return date.fromisoformat(value)
+    if kind == "dec":
+        return Decimal(value)
+    if kind == "uuid":
+        return UUID(value)
+    return value
+
+
+def encode_cursor(sort_value: Any, row_id: Any) -> str:
+    """Build an opaque cursor from the last row's (sort key, id)"""
+    payload = orjson.dumps([_encode_value(sort_value), _encode_value(row_id)])
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """Parse a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = orjson.loads(base64.urlsafe_b64decode(padded))
+        return _decode_value(sort_value), _decode_value(row_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+class Keyset:
+    """
+    Stable ordering on (sort expression, id) used for cursor pagination
+    
+    Pages continue strictly after the last row of the previous page, so deep
+    pages cost the same as the first one and rows inserted or deleted between
+    requests don't cause duplicates or gaps.
+    """
+    
+    def __init__(
+        self,
+        sort_expression,
+        id_column,
+        descending: bool = False,
+        row_value: Optional[Callable[[Any], Any]] = None
+    ):
+        self.sort_expression = sort_expression
+        self.id_column = id_column
+        self.descending = descending
+        # Reads the sort value back off a result row (needed for computed expressions)
+        self.row_value = row_value or (lambda row: getattr(row, sort_expression.key))
+    
+    def apply(self, query, cursor: Optional[str] = None):
+        """Add ordering and, for a cursor, the 'after this row' condition"""
+        if self.descending:
+            query = query.order_by(self.sort_expression.desc(), self.id_column.desc())
+        else:
+            query = query.order_by(self.sort_expression.asc(), self.id_column.asc())
+        
+        if cursor:
+            sort_value, row_id = decode_cursor(cursor)
+            key = tuple_(self.sort_expression, self.id_column)
+            boundary = tuple_(sort_value, row_id)
+            query = query.where(key < boundary if self.descending else key > boundary)
+        
+        return query
+    
+    def page(self, rows, limit: int) -> CursorPage:
+        """Wrap rows, with a next cursor when the page is full"""
+        rows = list(rows)
+        next_cursor = None
+        if rows and len(rows) >= limit:
+            last = rows[-1]
+            next_cursor = encode_cursor(self.row_value(last), getattr(last, self.id_column.key))
+        return CursorPage(rows, next_cursor)
+
+
+def set_next_cursor(response: Response, page) -> None:
+    """Expose a page's next cursor on the response headers"""
+    next_cursor = getattr(page, "next_cursor", None)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,213 @@
+"""
+Background scheduler pushing pantry expiration and low-stock alerts
+"""
+import asyncio
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, any_, bindparam, case, func, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+
+from app.core.config import settings
+from app.core.websocket import connection_manager
+from app.db.database import AsyncSessionLocal
+from app.models.pantry import PantryItem
+
+
+class PantryAlertScheduler:
+    """
+    Periodically pushes expiring and low-stock pantry items to online users
+    
+    Every PANTRY_ALERT_INTERVAL_SECONDS one UPDATE ... RETURNING sweeps the
+    pantries of the users connected to this worker: it range-scans
+    (user_id, expiration_date) for items expiring within
+    PANTRY_ALERT_EXPIRING_DAYS, picks up items at or below their low-stock
+    threshold, and sets the items' alert markers in the same statement. An
+    item is therefore alerted once per expiration date and once each time
+    it runs low (the low-stock marker is cleared when the sweep sees it
+    restocked), across restarts and workers. Rows locked by another worker
+    or a concurrent edit are skipped until the next tick. Each user gets one
+    pantry_alert notification per tick listing everything new.
+    """
+    
+    # Online users covered by one sweep statement
+    USER_BATCH_SIZE = 1000
+    
+    def __init__(
+        self,
+        interval_seconds: int = settings.PANTRY_ALERT_INTERVAL_SECONDS,
+        expiring_days: int = settings.PANTRY_ALERT_EXPIRING_DAYS,
+        max_items: int = settings.PANTRY_ALERT_MAX_ITEMS
+    ):
+        self.interval = interval_seconds
+        self.expiring_days = expiring_days
+        self.max_items = max_items
+        self._task: Optional[asyncio.Task] = None
+        
+        # Metrics
+        self.sweeps = 0
+        self.notifications_sent = 0
+        self.items_alerted = 0
+        self.failed_sweeps = 0
+        self.last_sweep_ms = 0.0
+    
+    async def start(self):
+        """Start the background sweep task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        print("✅ Pantry alert scheduler started")
+    
+    async def stop(self):
+        """Stop the sweep task"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                self.failed_sweeps += 1
+                print(f"❌ Pantry alert sweep failed: {e}")
+    
+    async def sweep(self, today: Optional[date] = None) -> int:
+        """Alert this worker's online users about new expiring/low-stock items; returns notifications sent"""
+        user_ids = list(connection_manager.active_connections)
+        if not user_ids:
+            return 0
+        
+        started = time.perf_counter()
+        today = today or date.today()
+        sent = 0
+        for i in range(0, len(user_ids), self.USER_BATCH_SIZE):
+            rows = await self._claim_alerts(user_ids[i:i + self.USER_BATCH_SIZE], today)
+            
+            alerts: Dict[str, Dict[str, List[Any]]] = defaultdict(lambda: {"expiring": [], "low_stock": []})
+            for row in rows:
+                if row.expiry_alert:
+                    alerts[str(row.user_id)]["expiring"].append(row)
+                if row.low_stock_alert:
+                    alerts[str(row.user_id)]["low_stock"].append(row)
+            
+            for user_id, items in alerts.items():
+                await connection_manager.send_notification(
+                    self._notification(items["expiring"], items["low_stock"], today), user_id
+                )
+                self.items_alerted += len(items["expiring"]) + len(items["low_stock"])
+                sent += 1
+        
+        self.sweeps += 1
+        self.notifications_sent += sent
+        self.last_sweep_ms = (time.perf_counter() - started) * 1000
+        return sent
+    
+    async def _claim_alerts(self, user_ids: List[str], today: date) -> list:
+        """Set the alert markers of the users' due items and return them, flagged by alert kind"""
+        horizon = today + timedelta(days=self.expiring_days)
+        is_expiring = and_(PantryItem.expiration_date >= today, PantryItem.expiration_date <= horizon)
+        is_low = PantryItem.quantity <= PantryItem.low_stock_threshold
+        
+        # Lock and read the current markers, then update the same rows
+        previous = select(
+            PantryItem.id,
+            PantryItem.expiry_alerted_on,
+            PantryItem.low_stock_alerted_at
+        ).where(
+            PantryItem.user_id == any_(bindparam("user_ids", user_ids, type_=ARRAY(UUID(as_uuid=True)))),
+            or_(
+                and_(is_expiring, PantryItem.expiry_alerted_on.is_distinct_from(PantryItem.expiration_date)),
+                and_(is_low, PantryItem.low_stock_alerted_at.is_(None)),
+                and_(~is_low, PantryItem.low_stock_alerted_at.isnot(None))
+            )
+        ).with_for_update(skip_locked=True).subquery("previous")
+        
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(PantryItem)
+                .where(PantryItem.id == previous.c.id)
+                .values(
+                    expiry_alerted_on=case((is_expiring, PantryItem.expiration_date), else_=PantryItem.expiry_alerted_on),
+                    low_stock_alerted_at=case((is_low, func.coalesce(PantryItem.low_stock_alerted_at, func.now())), else_=None),
+                    # Markers aren't user edits; keep onupdate from bumping updated_at
+                    updated_at=PantryItem.updated_at
+                )
+                .returning(
+                    PantryItem.id,
+                    PantryItem.user_id,
+                    PantryItem.name,
+                    PantryItem.quantity,
+                    PantryItem.unit,
+                    PantryItem.low_stock_threshold,
+                    PantryItem.location,
+                    PantryItem.expiration_date,
+                    and_(is_expiring, previous.c.expiry_alerted_on.is_distinct_from(PantryItem.expiration_date)).label("expiry_alert"),
+                    and_(is_low, previous.c.low_stock_alerted_at.is_(None)).label("low_stock_alert")
+                ),
+                execution_options={"synchronize_session": False}
+            )
+            rows = result.all()
+            await db.commit()
+        return rows
+    
+    def _notification(self, expiring: list, low_stock: list, today: date) -> Dict[str, Any]:
+        """One consolidated pantry_alert notification"""
+        expiring.sort(key=lambda row: (row.expiration_date, row.name))
+        low_stock.sort(key=lambda row: row.name)
+        
+        parts = []
+        if expiring:
+            parts.append(f"{len(expiring)} item{'s' if len(expiring) != 1 else ''} expiring soon")
+        if low_stock:
+            parts.append(f"{len(low_stock)} item{'s' if len(low_stock) != 1 else ''} running low")
+        
+        return {
+            "type": "pantry_alert",
+            "title": "Pantry Alert",
+            "message": ", ".join(parts),
+            "expiring_count": len(expiring),
+            "low_stock_count": len(low_stock),
+            "expiring_items": [
+                {
+                    "id": str(row.id),
+                    "name": row.name,
+                    "expiration_date": row.expiration_date,
+                    "days_left": (row.expiration_date - today).days,
+                    "location": row.location,
+                    "quantity": row.quantity,
+                    "unit": row.unit
+                }
+                for row in expiring[:self.max_items]
+            ],
+            "low_stock_items": [
+                {
+                    "id": str(row.id),
+                    "name": row.name,
+                    "quantity": row.quantity,
+                    "unit": row.unit,
+                    "low_stock_threshold": row.low_stock_threshold
+                }
+                for row in low_stock[:self.max_items]
+            ]
+        }
+    
+    def get_stats(self) -> dict:
+        """Sweep counters for monitoring"""
+        return {
+            "sweeps": self.sweeps,
+            "notifications_sent": self.notifications_sent,
+            "items_alerted": self.items_alerted,
+            "failed_sweeps": self.failed_sweeps,
+            "last_sweep_ms": round(self.last_sweep_ms, 2)
+        }
+
+
+# Global pantry alert scheduler instance
+pantry_alert_scheduler = PantryAlertScheduler()
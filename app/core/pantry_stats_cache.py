@@ -0,0 +1,290 @@
+"""
+Incrementally maintained pantry statistics cache
+"""
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.core.websocket import connection_manager
+from app.schemas.pantry import PantryStatsResponse
+
+# "Expiring soon" window, matching the pantry expiring_soon filter
+EXPIRING_SOON_DAYS = 3
+
+# How long a write in flight blocks fills if its worker dies before finishing
+PENDING_WRITE_TTL_SECONDS = 60
+
+# Ends a write (KEYS[2] is the user's write tracking hash: writes in flight
+# and a generation bumped by every finished write). Applies counter deltas
+# only to a cached (warm) hash, so a partial hash is never created; ARGV[3]
+# = 1 drops the hash instead. A counter going negative means the cache
+# drifted; drop it and let the next read rebuild it. Returns 1 if applied.
+PANTRY_STATS_SCRIPT = """
+redis.call('HINCRBY', KEYS[2], 'gen', 1)
+if redis.call('HINCRBY', KEYS[2], 'pending', -1) < 0 then
+    redis.call('HSET', KEYS[2], 'pending', 0)
+end
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+if ARGV[3] == '1' then
+    redis.call('DEL', KEYS[1])
+    return 0
+end
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 4, #ARGV, 2 do
+    local value = redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+    if value < 0 then
+        redis.call('DEL', KEYS[1])
+        return 0
+    end
+    if value == 0 and ARGV[i] ~= 'total' and ARGV[i] ~= 'low_stock' then
+        redis.call('HDEL', KEYS[1], ARGV[i])
+    end
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+# Stores counters computed from the database only if no write was in flight
+# or finished since the caller read the generation (ARGV[2]); otherwise the
+# counters may miss a write or count one its delta will add again.
+PANTRY_STATS_FILL_SCRIPT = """
+local writes = redis.call('HMGET', KEYS[2], 'pending', 'gen')
+if tonumber(writes[1] or '0') > 0 or (writes[2] or '0') ~= ARGV[2] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+def item_stat_fields(item) -> Dict[str, int]:
+    """Counters a single pantry item contributes to its owner's stats"""
+    fields = {"total": 1}
+    if item.low_stock_threshold is not None and item.quantity <= item.low_stock_threshold:
+        fields["low_stock"] = 1
+    if item.category_id is not None:
+        fields[f"cat:{item.category_id}"] = 1
+    if item.location is not None:
+        fields[f"loc:{item.location}"] = 1
+    if item.expiration_date is not None:
+        fields[f"exp:{item.expiration_date.isoformat()}"] = 1
+    return fields
+
+
+def stats_from_counters(counters: Dict[str, int], today: Optional[date] = None) -> PantryStatsResponse:
+    """
+    Build the stats response from cached counters
+    
+    Expiration counts are kept per date, so the expired and expiring-soon
+    buckets are derived for whatever day it is when the stats are read.
+    """
+    today = today or date.today()
+    soon = today + timedelta(days=EXPIRING_SOON_DAYS)
+    expiring_soon = expired_items = categories_count = locations_count = 0
+    
+    for field, count in counters.items():
+        if count <= 0:
+            continue
+        if field.startswith("exp:"):
+            expires = date.fromisoformat(field[4:])
+            if expires < today:
+                expired_items += count
+            elif expires <= soon:
+                expiring_soon += count
+        elif field.startswith("cat:"):
+            categories_count += 1
+        elif field.startswith("loc:"):
+            locations_count += 1
+    
+    return PantryStatsResponse(
+        total_items=counters.get("total", 0),
+        expiring_soon=expiring_soon,
+        expired_items=expired_items,
+        low_stock_items=counters.get("low_stock", 0),
+        categories_count=categories_count,
+        locations_count=locations_count
+    )
+
+
+class PantryStatsChange:
+    """Counter changes collected inside PantryStatsCache.write()"""
+    
+    def __init__(self):
+        self.before: List[Dict[str, int]] = []
+        self.after: List[Dict[str, int]] = []
+    
+    def apply(self, before: Iterable[Dict[str, int]] = (), after: Iterable[Dict[str, int]] = ()):
+        """Record pantry item changes, given the items' counters before and after"""
+        self.before.extend(before)
+        self.after.extend(after)
+    
+    def delta(self) -> Dict[str, int]:
+        delta = Counter()
+        for fields in self.after:
+            delta.update(fields)
+        for fields in self.before:
+            delta.subtract(fields)
+        return {field: change for field, change in delta.items() if change}
+
+
+class PantryStatsCache:
+    """
+    Per-user pantry stats counters in a Redis hash
+    
+    The hash holds the item total, the low-stock count, and item counts per
+    category, location and expiration date. Pantry writes apply the
+    difference between an item's counters before and after the change
+    (HINCRBY through a Lua script), so reading the stats is one HGETALL.
+    A missing hash is rebuilt from the database by the caller; the TTL
+    bounds drift from writes this cache never sees. Without Redis there is
+    no cache and callers always query the database.
+    
+    Writes run their commit inside write(), which marks the write in flight
+    before the commit and bumps a per-user generation when it applies the
+    delta. A rebuild only stores its counters if no write was in flight or
+    finished since it read the generation, so a write racing the rebuild
+    query is neither lost nor counted twice.
+    """
+    
+    def __init__(self, ttl: int = settings.PANTRY_STATS_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._scripts = {}
+        self._script_client = None
+    
+    @property
+    def available(self) -> bool:
+        """Whether the cache can be used (Redis is connected)"""
+        return connection_manager.redis is not None
+    
+    def _key(self, user_id: str) -> str:
+        return f"{settings.PANTRY_STATS_CACHE_REDIS_PREFIX}:{user_id}"
+    
+    def _writes_key(self, user_id: str) -> str:
+        return f"{settings.PANTRY_STATS_CACHE_REDIS_PREFIX}:{user_id}:writes"
+    
+    def _script(self, redis_client, source: str):
+        if self._script_client is not redis_client:
+            self._scripts = {}
+            self._script_client = redis_client
+        if source not in self._scripts:
+            self._scripts[source] = redis_client.register_script(source)
+        return self._scripts[source]
+    
+    async def get(self, user_id: str) -> Optional[Dict[str, int]]:
+        """Cached counters, or None on a miss"""
+        redis_client = connection_manager.redis
+        if not redis_client:
+            return None
+        
+        try:
+            counters = await redis_client.hgetall(self._key(user_id))
+        except Exception as e:
+            print(f"⚠️ Pantry stats cache read failed: {e}")
+            return None
+        if not counters:
+            return None
+        return {field.decode(): int(count) for field, count in counters.items()}
+    
+    async def fill_generation(self, user_id: str) -> Optional[str]:
+        """
+        Generation to pass to fill(), read before querying the database; None
+        when a write is in flight (the counters wouldn't be cached anyway)
+        """
+        redis_client = connection_manager.redis
+        if not redis_client:
+            return None
+        
+        try:
+            pending, generation = await redis_client.hmget(self._writes_key(user_id), "pending", "gen")
+        except Exception as e:
+            print(f"⚠️ Pantry stats cache read failed: {e}")
+            return None
+        if pending and int(pending) > 0:
+            return None
+        return generation.decode() if generation else "0"
+    
+    async def fill(self, user_id: str, counters: Dict[str, int], generation: str):
+        """Store counters freshly computed from the database, unless a write raced the query"""
+        redis_client = connection_manager.redis
+        if not redis_client:
+            return
+        
+        mapping = {"total": 0, "low_stock": 0}
+        mapping.update({field: count for field, count in counters.items() if count})
+        args = [self.ttl, generation]
+        for field, count in mapping.items():
+            args.extend([field, count])
+        try:
+            await self._script(redis_client, PANTRY_STATS_FILL_SCRIPT)(
+                keys=[self._key(user_id), self._writes_key(user_id)], args=args
+            )
+        except Exception as e:
+            print(f"⚠️ Pantry stats cache write failed: {e}")
+    
+    @asynccontextmanager
+    async def write(self, user_id: str) -> AsyncIterator[PantryStatsChange]:
+        """
+        Wrap a pantry write's commit and record its changes on the yielded
+        PantryStatsChange; they're applied when the block exits, and the
+        cached stats are dropped if it raises
+        """
+        change = PantryStatsChange()
+        redis_client = connection_manager.redis
+        if not redis_client:
+            yield change
+            return
+        
+        writes_key = self._writes_key(user_id)
+        try:
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.hincrby(writes_key, "pending", 1)
+                pipe.expire(writes_key, PENDING_WRITE_TTL_SECONDS)
+                await pipe.execute()
+        except Exception as e:
+            print(f"⚠️ Pantry stats cache write tracking failed: {e}")
+        
+        try:
+            yield change
+        except BaseException:
+            await self._finish_write(redis_client, user_id, None)
+            raise
+        await self._finish_write(redis_client, user_id, change.delta())
+    
+    async def _finish_write(self, redis_client, user_id: str, delta: Optional[Dict[str, int]]):
+        """Apply a write's delta (None drops the cached stats) and end its in-flight mark"""
+        args = [self.ttl, PENDING_WRITE_TTL_SECONDS, 1 if delta is None else 0]
+        for field, change in (delta or {}).items():
+            args.extend([field, change])
+        try:
+            await self._script(redis_client, PANTRY_STATS_SCRIPT)(
+                keys=[self._key(user_id), self._writes_key(user_id)], args=args
+            )
+        except Exception as e:
+            print(f"⚠️ Pantry stats cache update failed, dropping entry: {e}")
+            await self.invalidate(user_id)
+    
+    async def invalidate(self, user_id: str):
+        """Drop a user's cached stats (and refuse fills computed before now)"""
+        redis_client = connection_manager.redis
+        if not redis_client:
+            return
+        
+        writes_key = self._writes_key(user_id)
+        try:
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.delete(self._key(user_id))
+                pipe.hincrby(writes_key, "gen", 1)
+                pipe.expire(writes_key, PENDING_WRITE_TTL_SECONDS)
+                await pipe.execute()
+        except Exception as e:
+            print(f"⚠️ Pantry stats cache invalidation failed: {e}")
+
+
+# Global pantry stats cache instance
+pantry_stats_cache = PantryStatsCache()
@@ -0,0 +1,87 @@
+"""
+Background task keeping activity log partitions ahead of time
+"""
+import asyncio
+from typing import List, Optional
+
+from app.core.config import settings
+from app.db.database import async_engine
+from app.db.partitions import ensure_activity_log_partitions
+
+
+class PartitionMaintenanceScheduler:
+    """
+    Periodically creates upcoming monthly activity_logs partitions
+    
+    Runs once at startup and then every
+    ACTIVITY_LOG_PARTITION_CHECK_INTERVAL_SECONDS, so a long-running worker
+    has next month's partition (and ACTIVITY_LOG_PARTITION_MONTHS_AHEAD
+    more) before rows for it arrive. Rows that still landed in the default
+    partition are moved into the partition created for their month.
+    Concurrent runs from several workers serialize on the parent table lock.
+    """
+    
+    def __init__(
+        self,
+        interval_seconds: int = settings.ACTIVITY_LOG_PARTITION_CHECK_INTERVAL_SECONDS,
+        months_ahead: int = settings.ACTIVITY_LOG_PARTITION_MONTHS_AHEAD
+    ):
+        self.interval = interval_seconds
+        self.months_ahead = months_ahead
+        self._task: Optional[asyncio.Task] = None
+        
+        # Metrics
+        self.runs = 0
+        self.partitions_created = 0
+        self.failed_runs = 0
+    
+    async def start(self):
+        """Start the background maintenance task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        print("✅ Partition maintenance started")
+    
+    async def stop(self):
+        """Stop the maintenance task"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.failed_runs += 1
+                print(f"❌ Activity log partition maintenance failed: {e}")
+            await asyncio.sleep(self.interval)
+    
+    async def run_once(self) -> List[str]:
+        """Create missing partitions; returns their names"""
+        if async_engine is None:
+            return []
+        
+        async with async_engine.begin() as conn:
+            created = await conn.run_sync(ensure_activity_log_partitions, self.months_ahead)
+        
+        self.runs += 1
+        self.partitions_created += len(created)
+        if created:
+            print(f"✅ Created activity log partitions: {', '.join(created)}")
+        return created
+    
+    def get_stats(self) -> dict:
+        """Run counters for monitoring"""
+        return {
+            "runs": self.runs,
+            "partitions_created": self.partitions_created,
+            "failed_runs": self.failed_runs
+        }
+
+
+# Global partition maintenance scheduler instance
+partition_maintenance = PartitionMaintenanceScheduler()
@@ -0,0 +1,127 @@
+"""
+Authenticated principal cache for the auth dependency
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from uuid import UUID
+
+import orjson
+
+from app.core.config import settings
+from app.core.websocket import connection_manager
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The user fields authorization needs, without the database row"""
+    id: UUID
+    is_active: bool
+    name: str
+    avatar_url: Optional[str] = None
+    
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(id=user.id, is_active=user.is_active, name=user.name, avatar_url=user.avatar_url)
+    
+    def to_json(self) -> bytes:
+        return orjson.dumps({
+            "id": str(self.id),
+            "is_active": self.is_active,
+            "name": self.name,
+            "avatar_url": self.avatar_url
+        })
+    
+    @classmethod
+    def from_json(cls, data: bytes) -> "Principal":
+        fields = orjson.loads(data)
+        fields["id"] = UUID(fields["id"])
+        return cls(**fields)
+
+
+class PrincipalCache:
+    """
+    Two-tier cache of principals keyed by user id
+    
+    An in-process LRU answers most lookups; on a miss the shared Redis tier
+    (the connection manager's client, when connected) is consulted before the
+    caller falls back to the database. Invalidation clears both tiers, and
+    the short local TTL bounds how long other workers can serve a stale entry.
+    """
+    
+    def __init__(
+        self,
+        max_size: int = settings.PRINCIPAL_CACHE_SIZE,
+        local_ttl: float = settings.PRINCIPAL_CACHE_LOCAL_TTL_SECONDS,
+        redis_ttl: int = settings.PRINCIPAL_CACHE_REDIS_TTL_SECONDS
+    ):
+        self.max_size = max_size
+        self.local_ttl = local_ttl
+        self.redis_ttl = redis_ttl
+        # user id -> (expires at, principal), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+    
+    def _key(self, user_id: str) -> str:
+        return f"{settings.PRINCIPAL_CACHE_REDIS_PREFIX}:{user_id}"
+    
+    async def get(self, user_id: str) -> Optional[Principal]:
+        """Return the cached principal, or None on a miss"""
+        user_id = str(user_id)
+        entry = self._entries.get(user_id)
+        if entry:
+            expires_at, principal = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(user_id)
+                return principal
+            del self._entries[user_id]
+        
+        redis_client = connection_manager.redis
+        if redis_client:
+            try:
+                data = await redis_client.get(self._key(user_id))
+                if data:
+                    principal = Principal.from_json(data)
+                    self._store_local(user_id, principal)
+                    return principal
+            except Exception as e:
+                print(f"⚠️ Principal cache Redis read failed: {e}")
+        
+        return None
+    
+    async def set(self, user) -> Principal:
+        """Cache a freshly loaded user and return its principal"""
+        principal = Principal.from_user(user)
+        user_id = str(principal.id)
+        self._store_local(user_id, principal)
+        
+        redis_client = connection_manager.redis
+        if redis_client:
+            try:
+                await redis_client.set(self._key(user_id), principal.to_json(), ex=self.redis_ttl)
+            except Exception as e:
+                print(f"⚠️ Principal cache Redis write failed: {e}")
+        
+        return principal
+    
+    async def invalidate(self, user_id: str):
+        """Drop a user's principal after their row changed"""
+        user_id = str(user_id)
+        self._entries.pop(user_id, None)
+        
+        redis_client = connection_manager.redis
+        if redis_client:
+            try:
+                await redis_client.delete(self._key(user_id))
+            except Exception as e:
+                print(f"⚠️ Principal cache Redis invalidation failed: {e}")
+    
+    def _store_local(self, user_id: str, principal: Principal):
+        self._entries[user_id] = (time.monotonic() + self.local_ttl, principal)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+# Global principal cache instance
+principal_cache = PrincipalCache()
@@ -0,0 +1,115 @@
+"""
+Barcode normalization and the in-process product catalog cache
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+
+
+def gtin_check_digit_valid(gtin: str) -> bool:
+    """Whether the last digit is the GS1 check digit of the others"""
+    # Weights alternate 3, 1 from the rightmost data digit, so left zero-padding doesn't change it
+    total = sum(int(digit) * (3 if i % 2 == 0 else 1) for i, digit in enumerate(reversed(gtin[:-1])))
+    return (10 - total % 10) % 10 == int(gtin[-1])
+
+
+def normalize_gtin(barcode: str) -> Optional[str]:
+    """
+    Normalize a scanned barcode to GTIN-13, or None if it isn't a valid GTIN
+    
+    UPC-A (12 digits) and EAN-8 are left-padded with zeros and a GTIN-14
+    without a packaging indicator drops its leading zero, so the same
+    product always has the same key.
+    """
+    digits = barcode.strip().replace(" ", "").replace("-", "")
+    if not digits.isdigit():
+        return None
+    if len(digits) == 14 and digits[0] == "0":
+        digits = digits[1:]
+    if len(digits) in (8, 12):
+        digits = digits.zfill(13)
+    if len(digits) != 13 or not gtin_check_digit_valid(digits):
+        return None
+    return digits
+
+
+@dataclass(frozen=True)
+class CatalogProduct:
+    """What a barcode scan resolves to"""
+    gtin: str
+    name: str
+    brand: Optional[str]
+    category_id: Optional[UUID]
+    category_name: Optional[str]
+    default_unit: str
+    image_url: Optional[str] = None
+
+
+class ProductCache:
+    """
+    In-process LRU of catalog lookups keyed by GTIN-13
+    
+    Catalog data only changes when the dataset is reloaded, so a hit is a
+    dict lookup with no I/O. Barcodes missing from the catalog are cached
+    as None (for PRODUCT_CACHE_MISS_TTL_SECONDS) so repeated scans of an
+    unknown product don't go to the database either.
+    """
+    
+    def __init__(
+        self,
+        max_size: int = settings.PRODUCT_CACHE_SIZE,
+        ttl: float = settings.PRODUCT_CACHE_TTL_SECONDS,
+        miss_ttl: float = settings.PRODUCT_CACHE_MISS_TTL_SECONDS
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        # gtin -> (expires at, product or None), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, Optional[CatalogProduct]]]" = OrderedDict()
+        
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, gtin: str) -> Tuple[bool, Optional[CatalogProduct]]:
+        """(cached, product); product is None for a cached "not in catalog" """
+        entry = self._entries.get(gtin)
+        if entry:
+            expires_at, product = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(gtin)
+                self.hits += 1
+                return True, product
+            del self._entries[gtin]
+        self.misses += 1
+        return False, None
+    
+    def set(self, gtin: str, product: Optional[CatalogProduct]):
+        """Cache a lookup result (None when the barcode isn't in the catalog)"""
+        ttl = self.ttl if product is not None else self.miss_ttl
+        self._entries[gtin] = (time.monotonic() + ttl, product)
+        self._entries.move_to_end(gtin)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Forget every cached lookup"""
+        self._entries.clear()
+    
+    def get_stats(self) -> dict:
+        """Size and hit rate for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+# Global product cache instance
+product_cache = ProductCache()
@@ -0,0 +1,233 @@
+"""
+Token-bucket rate limiting for the HTTP API
+"""
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+from app.core.security import verify_token
+from app.core.websocket import connection_manager
+
+RATE_LIMIT_HEADERS = ["RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "RateLimit-Policy", "Retry-After"]
+
+# Tokens charged per request, by (method, path prefix under API_V1_STR); everything else costs 1
+ROUTE_COSTS: Dict[Tuple[str, str], int] = {
+    ("POST", "/auth/login"): 5,
+    ("POST", "/auth/register"): 5,
+    ("POST", "/auth/biometric"): 5,
+    ("POST", "/auth/refresh"): 2,
+    ("PUT", "/users/me/password"): 5,
+    ("POST", "/users/me/avatar"): 6,
+    ("POST", "/pantry/import"): 10,
+    ("GET", "/export"): 10,
+    ("GET", "/social/users/search"): 3,
+}
+
+# Atomically refills and charges one bucket using the Redis server clock,
+# so every worker sees the same time. Returns {allowed, tokens left}.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill_per_ms = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill_per_ms)
+
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / refill_per_ms) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of charging a bucket"""
+    allowed: bool
+    limit: int
+    tokens: float
+    refill_per_second: float
+    cost: int
+    
+    @property
+    def remaining(self) -> int:
+        return max(int(self.tokens), 0)
+    
+    @property
+    def reset_seconds(self) -> int:
+        """Seconds until the bucket is full again"""
+        return math.ceil((self.limit - self.tokens) / self.refill_per_second)
+    
+    @property
+    def retry_after_seconds(self) -> int:
+        """Seconds until this request's cost is affordable"""
+        return max(math.ceil((self.cost - self.tokens) / self.refill_per_second), 1)
+    
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset_seconds),
+            "RateLimit-Policy": f"{self.limit};w=60",
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after_seconds)
+        return headers
+
+
+class LocalTokenBuckets:
+    """In-process buckets used when Redis is unavailable (limits are per worker)"""
+    
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        # key -> (tokens, last refill monotonic time), least recently used first
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+    
+    def take(self, key: str, capacity: int, refill_per_second: float, cost: int) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+        
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        
+        return allowed, tokens
+
+
+class RateLimiter:
+    """
+    Per-client token buckets, shared across workers through Redis
+    
+    Each bucket holds RATE_LIMIT_PER_MINUTE tokens and refills continuously
+    at that rate. Buckets live in Redis (the connection manager's client)
+    and are updated by a Lua script so concurrent workers can't double-spend.
+    Without Redis, or when a Redis call fails, the limiter falls back to
+    in-process buckets.
+    """
+    
+    def __init__(self, per_minute: int = settings.RATE_LIMIT_PER_MINUTE):
+        self.capacity = per_minute
+        self.refill_per_second = per_minute / 60.0
+        self.local = LocalTokenBuckets()
+        self._script = None
+        self._script_client = None
+        self._redis_failing = False
+    
+    def _bucket_script(self, redis_client):
+        if self._script_client is not redis_client:
+            self._script = redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+            self._script_client = redis_client
+        return self._script
+    
+    async def hit(self, key: str, cost: int = 1) -> RateLimitResult:
+        """Charge `cost` tokens to the client's bucket"""
+        redis_client = connection_manager.redis
+        allowed = None
+        
+        if redis_client:
+            try:
+                allowed, tokens = await self._bucket_script(redis_client)(
+                    keys=[f"{settings.RATE_LIMIT_REDIS_PREFIX}:{key}"],
+                    args=[self.capacity, self.refill_per_second / 1000.0, cost]
+                )
+                allowed, tokens = bool(int(allowed)), float(tokens)
+                self._redis_failing = False
+            except Exception as e:
+                allowed = None
+                if not self._redis_failing:
+                    print(f"⚠️ Rate limiter Redis error, using local buckets: {e}")
+                    self._redis_failing = True
+        
+        if allowed is None:
+            allowed, tokens = self.local.take(key, self.capacity, self.refill_per_second, cost)
+        
+        return RateLimitResult(allowed, self.capacity, tokens, self.refill_per_second, cost)
+
+
+def route_cost(method: str, path: str) -> int:
+    """Token cost of a request"""
+    path = path[len(settings.API_V1_STR):]
+    for (route_method, prefix), cost in ROUTE_COSTS.items():
+        if method == route_method and path.startswith(prefix):
+            return cost
+    return 1
+
+
+def client_key(request: Request) -> str:
+    """Bucket key: the token's user for authenticated calls, the client IP otherwise"""
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        user_id = verify_token(authorization[7:], token_type="access")
+        if user_id:
+            return f"user:{user_id}"
+    
+    # Behind the edge proxy the peer is the proxy; it appends the real client last
+    forwarded_for = request.headers.get("x-forwarded-for")
+    if forwarded_for:
+        return f"ip:{forwarded_for.split(',')[-1].strip()}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """ASGI middleware enforcing the rate limit on API routes"""
+    
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or RateLimiter()
+    
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or not scope["path"].startswith(settings.API_V1_STR)
+        ):
+            await self.app(scope, receive, send)
+            return
+        
+        request = Request(scope)
+        result = await self.limiter.hit(client_key(request), route_cost(scope["method"], scope["path"]))
+        headers = result.headers()
+        
+        if not result.allowed:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Rate limit exceeded", "error_code": "RATE_LIMIT_EXCEEDED"},
+                headers=headers
+            )
+            await response(scope, receive, send)
+            return
+        
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(scope=message)
+                for name, value in headers.items():
+                    response_headers.append(name, value)
+            await send(message)
+        
+        await self.app(scope, receive, send_with_headers)
@@ -1,8 +1,12 @@
 """
 Security utilities for authentication and authorization
 """
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Union
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from passlib.hash import bcrypt
@@ -75,6 +79,70 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, size-limited thread pool
+    
+    bcrypt releases the GIL while it works, so a login burst keeps a few
+    worker threads busy instead of stalling the event loop (and every
+    WebSocket on the worker). Once all workers are busy and the wait queue
+    is full, new requests are rejected with a 503 rather than queued.
+    """
+    
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        
+        # Only touched from the event loop thread
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self._total_ns = 0
+    
+    async def _run(self, func, *args):
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry shortly",
+                headers={"Retry-After": "1"}
+            )
+        
+        self.in_flight += 1
+        started = time.perf_counter_ns()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._total_ns += time.perf_counter_ns() - started
+    
+    async def hash(self, password: str) -> str:
+        """Generate password hash off the event loop"""
+        return await self._run(get_password_hash, password)
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash off the event loop"""
+        return await self._run(verify_password, plain_password, hashed_password)
+    
+    def get_stats(self) -> dict:
+        """Pool size, queue depth and latency (queue wait included)"""
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queued": max(self.in_flight - self.workers, 0),
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_ms": round(self._total_ns / self.completed / 1e6, 2) if self.completed else 0.0
+        }
+
+
+# Global password hasher instance
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
+
+
 def generate_password_reset_token(email: str) -> str:
     """Generate password reset token"""
     delta = timedelta(hours=1)  # Token expires in 1 hour
@@ -1,15 +1,127 @@
 """
 WebSocket Connection Manager for Real-time Features
 """
-import json
 import asyncio
-from typing import Dict, List, Set, Optional, Any
+import time
+import uuid
+from collections import deque
+from decimal import Decimal
+from typing import Deque, Dict, List, Set, Optional, Any, Tuple
 from datetime import datetime
+import orjson
 from fastapi import WebSocket, WebSocketDisconnect
 import redis.asyncio as redis
 from app.core.config import settings
 
 
+def _encode_default(value: Any) -> Any:
+    """Serialize types orjson does not handle natively"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, set):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class MessageEncoder:
+    """
+    Encodes each outgoing event exactly once
+    
+    Messages are serialized with orjson (datetime, UUID and Decimal values
+    are handled by the encoder, so callers can pass them as-is) and the
+    resulting frame is shared by every recipient and device. Encode time is
+    tracked per event type.
+    """
+    
+    def __init__(self):
+        # event type -> [count, total encode time in ns]
+        self._timings: Dict[str, List[int]] = {}
+    
+    def encode(self, message: Dict[str, Any]) -> str:
+        """Serialize a message into a WebSocket text frame"""
+        start = time.perf_counter_ns()
+        frame = orjson.dumps(message, default=_encode_default).decode()
+        elapsed = time.perf_counter_ns() - start
+        
+        timing = self._timings.setdefault(str(message.get("type", "unknown")), [0, 0])
+        timing[0] += 1
+        timing[1] += elapsed
+        return frame
+    
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Encode count and average/total time (microseconds) per event type"""
+        return {
+            event_type: {
+                "count": count,
+                "total_us": round(total_ns / 1000, 2),
+                "avg_us": round(total_ns / count / 1000, 2) if count else 0.0
+            }
+            for event_type, (count, total_ns) in self._timings.items()
+        }
+
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_COALESCE = "coalesce"
+OVERFLOW_DISCONNECT = "disconnect"
+
+
+class ConnectionSender:
+    """
+    Bounded outbound queue and writer task for a single WebSocket
+    
+    Enqueueing never awaits the network, so a slow client only delays its own
+    frames. When the queue is full the overflow policy decides what happens:
+    drop the oldest frame, coalesce with a queued frame for the same entity,
+    or report the connection as a slow consumer to be disconnected.
+    """
+    
+    def __init__(self, websocket: WebSocket, user_id: str, max_size: int, overflow_policy: str):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.max_size = max_size
+        self.overflow_policy = overflow_policy
+        self.queue: Deque[Tuple[Optional[str], str]] = deque()
+        self.dropped = 0
+        self._ready = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+    
+    def enqueue(self, message_str: str, coalesce_key: Optional[str] = None) -> bool:
+        """Queue a serialized frame, returns False if the consumer is too slow"""
+        if len(self.queue) >= self.max_size:
+            if self.overflow_policy == OVERFLOW_DISCONNECT:
+                return False
+            
+            if self.overflow_policy == OVERFLOW_COALESCE and coalesce_key is not None:
+                for index, (queued_key, _) in enumerate(self.queue):
+                    if queued_key == coalesce_key:
+                        # Newer state for the same entity replaces the queued frame in place
+                        self.queue[index] = (coalesce_key, message_str)
+                        self.dropped += 1
+                        return True
+            
+            self.queue.popleft()
+            self.dropped += 1
+        
+        self.queue.append((coalesce_key, message_str))
+        self._ready.set()
+        return True
+    
+    async def run(self, on_error):
+        """Writer loop: drain the queue onto the socket in order"""
+        try:
+            while True:
+                await self._ready.wait()
+                while self.queue:
+                    _, message_str = self.queue.popleft()
+                    await self.websocket.send_text(message_str)
+                self._ready.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Failed to send message to {self.user_id}: {e}")
+            await on_error(self.websocket, self.user_id)
+
+
 class ConnectionManager:
     """
     Manages WebSocket connections for real-time collaboration
@@ -25,18 +137,34 @@ class ConnectionManager:
         # User rooms: user_id -> set of room_ids
         self.user_rooms: Dict[str, Set[str]] = {}
         
+        # Outbound queues: websocket -> sender with its own writer task
+        self.senders: Dict[WebSocket, ConnectionSender] = {}
+        
+        # Serialize-once encoder shared by all outgoing events
+        self.encoder = MessageEncoder()
+        
+        # Item updates waiting for their room's batch window: list_id -> item_id -> item data
+        self._pending_item_updates: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        
         # Redis connection for pub/sub
         self.redis: Optional[redis.Redis] = None
+        self.pubsub: Optional[redis.client.PubSub] = None
+        
+        # Identifies this process on the backplane so it can skip its own publishes
+        self.instance_id = uuid.uuid4().hex
         
         # Background tasks
         self._tasks: Set[asyncio.Task] = set()
     
-    async def initialize_redis(self):
+    async def initialize_redis(self, redis_client: Optional[redis.Redis] = None):
         """Initialize Redis connection for pub/sub"""
         try:
-            self.redis = redis.from_url(settings.REDIS_URL)
+            self.redis = redis_client or redis.from_url(settings.REDIS_URL)
             await self.redis.ping()
             print("✅ Redis connection established for WebSocket manager")
+            
+            if settings.WEBSOCKET_REDIS_FANOUT:
+                await self._start_backplane()
         except Exception as e:
             print(f"❌ Failed to connect to Redis: {e}")
             # In production, Redis might not be immediately available
@@ -44,6 +172,95 @@ class ConnectionManager:
             if settings.is_production:
                 print("⚠️  Running without Redis in production - WebSocket features may be limited")
             self.redis = None
+            self.pubsub = None
+    
+    # ------------------------------------------------------------------
+    # Redis backplane
+    #
+    # Room and global broadcasts are delivered to local sockets directly and
+    # published once to Redis. Every worker subscribes only to the rooms its own
+    # sockets are in, and its listener delivers foreign publishes to those
+    # local sockets, so collaborators connected to other workers/nodes still
+    # receive the update.
+    # ------------------------------------------------------------------
+    
+    def _room_channel(self, room_id: str) -> str:
+        """Redis channel carrying broadcasts for a room"""
+        return f"{settings.WEBSOCKET_REDIS_CHANNEL_PREFIX}:room:{room_id}"
+    
+    def _all_channel(self) -> str:
+        """Redis channel carrying broadcasts for every connected user"""
+        return f"{settings.WEBSOCKET_REDIS_CHANNEL_PREFIX}:all"
+    
+    async def _start_backplane(self):
+        """Subscribe to the global channel and start the listener task"""
+        self.pubsub = self.redis.pubsub()
+        await self.pubsub.subscribe(self._all_channel())
+        
+        # Rooms may already have local members if Redis came up late
+        for room_id in self.room_subscriptions:
+            await self.pubsub.subscribe(self._room_channel(room_id))
+        
+        task = asyncio.create_task(self._listen_backplane())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        print(f"📡 WebSocket Redis backplane started (instance {self.instance_id})")
+    
+    async def _subscribe_room(self, room_id: str):
+        """Start receiving backplane broadcasts for a room"""
+        if not self.pubsub:
+            return
+        try:
+            await self.pubsub.subscribe(self._room_channel(room_id))
+        except Exception as e:
+            print(f"❌ Failed to subscribe to room {room_id} on Redis: {e}")
+    
+    async def _unsubscribe_room(self, room_id: str):
+        """Stop receiving backplane broadcasts for a room"""
+        if not self.pubsub:
+            return
+        try:
+            await self.pubsub.unsubscribe(self._room_channel(room_id))
+        except Exception as e:
+            print(f"❌ Failed to unsubscribe from room {room_id} on Redis: {e}")
+    
+    async def _publish(self, channel: str, message_str: str, room_id: Optional[str] = None, exclude_user: Optional[str] = None, coalesce_key: Optional[str] = None):
+        """Publish an already serialized message to the other workers"""
+        if not self.pubsub:
+            return
+        envelope = orjson.dumps({
+            "origin": self.instance_id,
+            "room_id": room_id,
+            "exclude_user": exclude_user,
+            "coalesce_key": coalesce_key,
+            "message": message_str
+        })
+        try:
+            await self.redis.publish(channel, envelope)
+        except Exception as e:
+            print(f"❌ Failed to publish to Redis channel {channel}: {e}")
+    
+    async def _listen_backplane(self):
+        """Deliver broadcasts published by other workers to local sockets"""
+        while True:
+            try:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None or message.get("type") != "message":
+                    continue
+                
+                envelope = orjson.loads(message["data"])
+                if envelope.get("origin") == self.instance_id:
+                    continue
+                
+                if envelope.get("room_id") is not None:
+                    self._deliver_to_room(envelope["message"], envelope["room_id"], envelope.get("exclude_user"), envelope.get("coalesce_key"))
+                else:
+                    self._deliver_to_all(envelope["message"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ WebSocket backplane listener error: {e}")
+                await asyncio.sleep(1)
     
     async def connect(self, websocket: WebSocket, user_id: str):
         """Accept a new WebSocket connection"""
@@ -54,18 +271,31 @@ class ConnectionManager:
         
         self.active_connections[user_id].append(websocket)
         
-        # Send connection confirmation
-        await self.send_personal_message({
+        sender = ConnectionSender(
+            websocket,
+            user_id,
+            settings.WEBSOCKET_SEND_QUEUE_SIZE,
+            settings.WEBSOCKET_OVERFLOW_POLICY
+        )
+        sender.task = asyncio.create_task(sender.run(self.disconnect))
+        self.senders[websocket] = sender
+        
+        # Send connection confirmation to the new device only
+        sender.enqueue(self.encoder.encode({
             "type": "connection_established",
             "message": "Connected to real-time updates",
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.utcnow(),
             "user_id": user_id
-        }, user_id)
+        }))
         
         print(f"✅ User {user_id} connected. Total connections: {self.get_total_connections()}")
     
     async def disconnect(self, websocket: WebSocket, user_id: str):
         """Handle WebSocket disconnection"""
+        sender = self.senders.pop(websocket, None)
+        if sender and sender.task and sender.task is not asyncio.current_task():
+            sender.task.cancel()
+        
         if user_id in self.active_connections:
             if websocket in self.active_connections[user_id]:
                 self.active_connections[user_id].remove(websocket)
@@ -86,6 +316,7 @@ class ConnectionManager:
         """Join a user to a room for group notifications"""
         if room_id not in self.room_subscriptions:
             self.room_subscriptions[room_id] = set()
+            await self._subscribe_room(room_id)
         
         if user_id not in self.user_rooms:
             self.user_rooms[user_id] = set()
@@ -98,7 +329,7 @@ class ConnectionManager:
             "type": "room_joined",
             "room_id": room_id,
             "message": f"Joined room {room_id}",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow()
         }, user_id)
         
         # Notify other room members
@@ -107,7 +338,7 @@ class ConnectionManager:
             "room_id": room_id,
             "user_id": user_id,
             "message": f"User {user_id} joined the room",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow()
         }, room_id, exclude_user=user_id)
         
         print(f"👥 User {user_id} joined room {room_id}")
@@ -120,6 +351,7 @@ class ConnectionManager:
             # Clean up empty rooms
             if not self.room_subscriptions[room_id]:
                 del self.room_subscriptions[room_id]
+                await self._unsubscribe_room(room_id)
         
         if user_id in self.user_rooms:
             self.user_rooms[user_id].discard(room_id)
@@ -130,7 +362,7 @@ class ConnectionManager:
             "room_id": room_id,
             "user_id": user_id,
             "message": f"User {user_id} left the room",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow()
         }, room_id, exclude_user=user_id)
         
         print(f"👋 User {user_id} left room {room_id}")
@@ -138,66 +370,81 @@ class ConnectionManager:
     async def send_personal_message(self, message: Dict[str, Any], user_id: str):
         """Send a message to a specific user"""
         if user_id in self.active_connections:
-            message_str = json.dumps(message)
-            
-            # Send to all user's connections
-            disconnected_connections = []
-            for websocket in self.active_connections[user_id]:
-                try:
-                    await websocket.send_text(message_str)
-                except Exception as e:
-                    print(f"❌ Failed to send message to {user_id}: {e}")
-                    disconnected_connections.append(websocket)
-            
-            # Clean up disconnected connections
-            for websocket in disconnected_connections:
-                await self.disconnect(websocket, user_id)
+            self._enqueue_to_user(self.encoder.encode(message), user_id)
+    
+    def _enqueue_to_user(self, message_str: str, user_id: str, coalesce_key: Optional[str] = None):
+        """Queue a serialized message on every connection of a user"""
+        for websocket in list(self.active_connections.get(user_id, ())):
+            sender = self.senders.get(websocket)
+            if sender is None:
+                continue
+            if not sender.enqueue(message_str, coalesce_key):
+                print(f"🐢 Disconnecting slow consumer {user_id} ({len(sender.queue)} frames queued)")
+                self._disconnect_slow_consumer(websocket, user_id)
+    
+    def _disconnect_slow_consumer(self, websocket: WebSocket, user_id: str):
+        """Close and drop a connection whose send queue overflowed"""
+        # Stop queueing for it right away so the overflow is only handled once
+        sender = self.senders.pop(websocket, None)
+        if sender and sender.task:
+            sender.task.cancel()
+        
+        async def close():
+            try:
+                await websocket.close(code=1013)  # Try again later
+            except Exception:
+                pass
+            await self.disconnect(websocket, user_id)
+        
+        task = asyncio.create_task(close())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    @staticmethod
+    def _coalesce_key(message: Dict[str, Any]) -> Optional[str]:
+        """Key identifying frames that supersede each other (same entity updates)"""
+        message_type = message.get("type")
+        if message_type == "list_update":
+            return f"list_update:{message.get('list_id')}"
+        if message_type == "item_update":
+            data = message.get("data") or {}
+            item_id = data.get("id") or data.get("item_id")
+            if item_id is not None:
+                return f"item_update:{message.get('list_id')}:{item_id}"
+        return None
     
     async def broadcast_to_room(self, message: Dict[str, Any], room_id: str, exclude_user: Optional[str] = None):
         """Broadcast a message to all users in a room"""
-        print(f"🔔 DEBUG: broadcast_to_room called - room: {room_id}, users_in_room: {self.room_subscriptions.get(room_id, [])}")
+        message_str = self.encoder.encode(message)
+        coalesce_key = self._coalesce_key(message)
+        
+        self._deliver_to_room(message_str, room_id, exclude_user, coalesce_key)
+        await self._publish(self._room_channel(room_id), message_str, room_id=room_id, exclude_user=exclude_user, coalesce_key=coalesce_key)
+    
+    def _deliver_to_room(self, message_str: str, room_id: str, exclude_user: Optional[str] = None, coalesce_key: Optional[str] = None):
+        """Queue a serialized message for the room members connected to this worker"""
+        print(f"🔔 DEBUG: broadcast_to_room called - room: {room_id}, users_in_room: {len(self.room_subscriptions.get(room_id, ()))}")
         
         if room_id not in self.room_subscriptions:
             print(f"❌ DEBUG: Room {room_id} not found in rooms: {list(self.room_subscriptions.keys())}")
             return
         
-        message_str = json.dumps(message)
-        
-        for user_id in self.room_subscriptions[room_id]:
+        for user_id in list(self.room_subscriptions.get(room_id, ())):
             if exclude_user and user_id == exclude_user:
                 continue
-            
-            print(f"🔔 DEBUG: Trying to send to user {user_id}, connection exists: {user_id in self.active_connections}")
-            if user_id in self.active_connections:
-                disconnected_connections = []
-                for websocket in self.active_connections[user_id]:
-                    try:
-                        await websocket.send_text(message_str)
-                        print(f"✅ DEBUG: Message sent successfully to {user_id}")
-                    except Exception as e:
-                        print(f"❌ Failed to broadcast to {user_id} in room {room_id}: {e}")
-                        disconnected_connections.append(websocket)
-                
-                # Clean up disconnected connections
-                for websocket in disconnected_connections:
-                    await self.disconnect(websocket, user_id)
+            self._enqueue_to_user(message_str, user_id, coalesce_key)
     
     async def broadcast_to_all(self, message: Dict[str, Any]):
         """Broadcast a message to all connected users"""
-        message_str = json.dumps(message)
-        
-        for user_id, connections in self.active_connections.items():
-            disconnected_connections = []
-            for websocket in connections:
-                try:
-                    await websocket.send_text(message_str)
-                except Exception as e:
-                    print(f"❌ Failed to broadcast to {user_id}: {e}")
-                    disconnected_connections.append(websocket)
-            
-            # Clean up disconnected connections
-            for websocket in disconnected_connections:
-                await self.disconnect(websocket, user_id)
+        message_str = self.encoder.encode(message)
+        
+        self._deliver_to_all(message_str)
+        await self._publish(self._all_channel(), message_str)
+    
+    def _deliver_to_all(self, message_str: str):
+        """Queue a serialized message for every user connected to this worker"""
+        for user_id in list(self.active_connections):
+            self._enqueue_to_user(message_str, user_id)
     
     def get_total_connections(self) -> int:
         """Get total number of active connections"""
@@ -220,7 +467,7 @@ class ConnectionManager:
         notification_message = {
             "type": "notification",
             "data": notification,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow()
         }
         await self.send_personal_message(notification_message, user_id)
     
@@ -231,20 +478,71 @@ class ConnectionManager:
             "type": "list_update",
             "list_id": list_id,
             "data": list_data,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow()
         }
         await self.broadcast_to_room(update_message, room_id)
     
     async def send_item_update(self, item_data: Dict[str, Any], list_id: str):
         """Send shopping item update to all collaborators"""
         room_id = f"list_{list_id}"
-        update_message = {
-            "type": "item_update",
-            "list_id": list_id,
-            "data": item_data,
-            "timestamp": datetime.utcnow().isoformat()
-        }
         print(f"🔔 DEBUG: send_item_update called - room: {room_id}, data: {item_data}")
+        await self.send_item_updates([item_data], list_id)
+    
+    async def send_item_updates(self, items: List[Dict[str, Any]], list_id: str):
+        """Send several shopping item updates to all collaborators as one event"""
+        if not items:
+            return
+        
+        if settings.WEBSOCKET_ITEM_BATCH_WINDOW_MS <= 0:
+            await self._broadcast_item_updates(list_id, items)
+            return
+        
+        # Buffer the updates; repeated edits of the same item collapse to the final state
+        pending = self._pending_item_updates.get(list_id)
+        if pending is None:
+            pending = self._pending_item_updates[list_id] = {}
+            task = asyncio.create_task(self._flush_item_updates(list_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        
+        for item_data in items:
+            item_key = str(item_data.get("id") or len(pending))
+            buffered = pending.pop(item_key, None)
+            if buffered is not None and buffered.get("action") == "created":
+                if item_data.get("action") == "deleted":
+                    # Created and deleted within the window: other members never knew it
+                    continue
+                # Clients only learn about a new item from its "created" event
+                item_data = {**buffered, **item_data, "action": "created"}
+            pending[item_key] = item_data
+    
+    async def _flush_item_updates(self, list_id: str):
+        """Send the item updates buffered for a list once its batch window closes"""
+        await asyncio.sleep(settings.WEBSOCKET_ITEM_BATCH_WINDOW_MS / 1000)
+        pending = self._pending_item_updates.pop(list_id, {})
+        if pending:
+            await self._broadcast_item_updates(list_id, list(pending.values()))
+    
+    async def _broadcast_item_updates(self, list_id: str, items: List[Dict[str, Any]]):
+        """Broadcast a single item_update, or an items_batch_update for several items"""
+        room_id = f"list_{list_id}"
+        if len(items) == 1:
+            update_message = {
+                "type": "item_update",
+                "list_id": list_id,
+                "data": items[0],
+                "timestamp": datetime.utcnow()
+            }
+        else:
+            update_message = {
+                "type": "items_batch_update",
+                "list_id": list_id,
+                "data": {
+                    "items": items,
+                    "count": len(items)
+                },
+                "timestamp": datetime.utcnow()
+            }
         await self.broadcast_to_room(update_message, room_id)
     
     async def send_friend_request_notification(self, request_data: Dict[str, Any], user_id: str):
@@ -252,7 +550,7 @@ class ConnectionManager:
         notification = {
             "type": "friend_request",
             "data": request_data,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow()
         }
         await self.send_notification(notification, user_id)
     
@@ -261,17 +559,25 @@ class ConnectionManager:
         update_message = {
             "type": "friend_status_update",
             "data": friend_data,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow()
         }
         await self.send_personal_message(update_message, user_id)
     
     async def cleanup(self):
         """Cleanup resources"""
-        # Cancel all background tasks
-        for task in self._tasks:
+        # Cancel all background tasks and connection writers
+        for task in list(self._tasks):
             task.cancel()
+        for sender in list(self.senders.values()):
+            if sender.task:
+                sender.task.cancel()
+        self.senders.clear()
+        self._pending_item_updates.clear()
         
-        # Close Redis connection
+        # Close Redis pub/sub and connection
+        if self.pubsub:
+            await self.pubsub.close()
+            self.pubsub = None
         if self.redis:
             await self.redis.close()
 
@@ -1,11 +1,27 @@
 """
 Database configuration and session management
 """
+from decimal import Decimal
+import orjson
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
+
+def _json_default(value):
+    """JSON column values orjson does not handle natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def json_serializer(value) -> str:
+    """Serialize JSON/JSONB column values (Decimals are stored as numbers)"""
+    return orjson.dumps(value, default=_json_default).decode()
+
+
 # Create database engine with error handling
 try:
     engine = create_engine(
@@ -13,7 +29,8 @@ try:
         pool_pre_ping=True,
         pool_recycle=300,
         pool_size=10,
-        max_overflow=20
+        max_overflow=20,
+        json_serializer=json_serializer
     )
 except Exception as e:
     print(f"❌ Database engine creation failed: {str(e)}")
@@ -28,6 +45,34 @@ except Exception as e:
     print(f"❌ SessionLocal creation failed: {str(e)}")
     SessionLocal = None
 
+# Create async (asyncpg) engine used by the API request path
+try:
+    async_engine = create_async_engine(
+        settings.async_database_url,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        pool_size=10,
+        max_overflow=20,
+        json_serializer=json_serializer
+    )
+except Exception as e:
+    print(f"❌ Async database engine creation failed: {str(e)}")
+    async_engine = None
+
+# Create async session factory
+# expire_on_commit is disabled so ORM objects stay readable after commit
+# without triggering implicit (blocking) refresh IO during response serialization
+try:
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False
+    ) if async_engine else None
+except Exception as e:
+    print(f"❌ AsyncSessionLocal creation failed: {str(e)}")
+    AsyncSessionLocal = None
+
 # Create base class for models
 Base = declarative_base()
 
@@ -42,3 +87,12 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency to get async database session"""
+    if AsyncSessionLocal is None:
+        raise Exception("Database not available - AsyncSessionLocal is None")
+    
+    async with AsyncSessionLocal() as db:
+        yield db
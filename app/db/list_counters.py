@@ -0,0 +1,99 @@
+"""
+Denormalized item counters on shopping_lists
+"""
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+LIST_COUNTER_COLUMNS = ("item_count", "completed_count", "estimated_total", "actual_total")
+
+# Counters recomputed from shopping_items for lists whose id is in :list_ids
+# (or every list when :list_ids is NULL)
+_ACTUAL_COUNTERS_SQL = """
+    SELECT l.id,
+           count(i.id) AS item_count,
+           count(i.id) FILTER (WHERE i.completed) AS completed_count,
+           coalesce(sum(i.estimated_price), 0) AS estimated_total,
+           coalesce(sum(i.actual_price), 0) AS actual_total
+    FROM shopping_lists l
+    LEFT JOIN shopping_items i ON i.list_id = l.id
+    WHERE CAST(:list_ids AS uuid[]) IS NULL OR l.id = ANY(CAST(:list_ids AS uuid[]))
+    GROUP BY l.id
+"""
+
+_DRIFTED_CONDITION = """
+    (l.item_count, l.completed_count, l.estimated_total, l.actual_total)
+    IS DISTINCT FROM (c.item_count, c.completed_count, c.estimated_total, c.actual_total)
+"""
+
+DRIFTED_LISTS_SQL = f"""
+    SELECT l.id
+    FROM shopping_lists l
+    JOIN ({_ACTUAL_COUNTERS_SQL}) c ON c.id = l.id
+    WHERE {_DRIFTED_CONDITION}
+    ORDER BY l.id
+"""
+
+LOCK_LISTS_SQL = """
+    SELECT id FROM shopping_lists WHERE id = ANY(CAST(:list_ids AS uuid[])) ORDER BY id FOR UPDATE
+"""
+
+REPAIR_COUNTERS_SQL = f"""
+    UPDATE shopping_lists l
+    SET item_count = c.item_count,
+        completed_count = c.completed_count,
+        estimated_total = c.estimated_total,
+        actual_total = c.actual_total
+    FROM ({_ACTUAL_COUNTERS_SQL}) c
+    WHERE c.id = l.id AND {_DRIFTED_CONDITION}
+    RETURNING l.id
+"""
+
+
+def item_counter_fields(item: Any) -> Dict[str, Any]:
+    """Counters a single shopping item contributes to its list"""
+    return {
+        "item_count": 1,
+        "completed_count": 1 if item.completed else 0,
+        "estimated_total": item.estimated_price or Decimal(0),
+        "actual_total": item.actual_price or Decimal(0),
+    }
+
+
+def counter_delta(
+    before: Iterable[Dict[str, Any]] = (),
+    after: Iterable[Dict[str, Any]] = ()
+) -> Dict[str, Any]:
+    """Per-column change to a list's counters, given the written items' counters before and after"""
+    delta = dict.fromkeys(LIST_COUNTER_COLUMNS, 0)
+    for fields in after:
+        for column in LIST_COUNTER_COLUMNS:
+            delta[column] += fields[column]
+    for fields in before:
+        for column in LIST_COUNTER_COLUMNS:
+            delta[column] -= fields[column]
+    return {column: change for column, change in delta.items() if change}
+
+
+def drifted_list_ids(conn: Connection) -> List[str]:
+    """Lists whose stored counters don't match their items"""
+    result = conn.execute(text(DRIFTED_LISTS_SQL), {"list_ids": None})
+    return [str(row[0]) for row in result]
+
+
+def reconcile_list_counters(conn: Connection, list_ids: List[str]) -> List[str]:
+    """
+    Recompute the counters of the given lists; returns the lists that were fixed
+    
+    The lists are locked first and recounted in a later statement: item writes
+    update their list's row in the same transaction, so once the lock is held
+    every committed item is visible and no uncommitted one can commit until
+    the repair does (its delta then applies on top of the repaired value).
+    """
+    if not list_ids:
+        return []
+    conn.execute(text(LOCK_LISTS_SQL), {"list_ids": list_ids})
+    result = conn.execute(text(REPAIR_COUNTERS_SQL), {"list_ids": list_ids})
+    return [str(row[0]) for row in result]
@@ -0,0 +1,137 @@
+"""
+Monthly range partitions for the activity_logs table
+"""
+from datetime import date, datetime
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+ACTIVITY_LOGS_TABLE = "activity_logs"
+ACTIVITY_LOGS_DEFAULT_PARTITION = "activity_logs_default"
+
+
+def month_start(value: date) -> date:
+    """First day of the month containing value"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """Shift a month start by a number of months"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Name of the partition holding the given month, e.g. activity_logs_2025_01"""
+    return f"{ACTIVITY_LOGS_TABLE}_{month:%Y_%m}"
+
+
+def create_partition_sql(month: date) -> str:
+    """DDL for the partition covering [month, next month)"""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {ACTIVITY_LOGS_TABLE} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def create_activity_log_partition(conn: Connection, month: date) -> int:
+    """
+    Create the partition for a month, moving its rows out of the default
+    partition first; returns how many rows were moved
+    
+    PostgreSQL refuses to create a partition while the default partition
+    holds rows in its range, so within the caller's transaction the parent
+    is locked against writes, the month's rows are deleted from the default
+    partition into a temporary table, the partition is created and the rows
+    are inserted back through the parent.
+    """
+    bounds = {"start": month, "end": add_months(month, 1)}
+    conn.execute(text(f"LOCK TABLE {ACTIVITY_LOGS_TABLE} IN SHARE ROW EXCLUSIVE MODE"))
+    conn.execute(text(
+        f"CREATE TEMP TABLE activity_logs_moving (LIKE {ACTIVITY_LOGS_TABLE}) ON COMMIT DROP"
+    ))
+    moved = conn.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {ACTIVITY_LOGS_DEFAULT_PARTITION}
+            WHERE created_at >= :start AND created_at < :end
+            RETURNING *
+        )
+        INSERT INTO activity_logs_moving SELECT * FROM moved
+    """), bounds).rowcount
+    conn.execute(text(create_partition_sql(month)))
+    if moved:
+        conn.execute(text(f"INSERT INTO {ACTIVITY_LOGS_TABLE} SELECT * FROM activity_logs_moving"))
+    conn.execute(text("DROP TABLE activity_logs_moving"))
+    return moved
+
+
+def is_partitioned(conn: Connection) -> bool:
+    """Whether activity_logs is a partitioned table (the migration has run)"""
+    relkind = conn.execute(
+        text("SELECT relkind::text FROM pg_class WHERE relname = :table AND relkind IN ('r', 'p')"),
+        {"table": ACTIVITY_LOGS_TABLE}
+    ).scalar()
+    return relkind == "p"
+
+
+def ensure_activity_log_partitions(conn: Connection, months_ahead: int, today: date = None) -> List[str]:
+    """
+    Create partitions for the current month, the next months_ahead months and
+    any month whose rows ended up in the default partition
+    """
+    if not is_partitioned(conn):
+        return []
+    
+    current = month_start(today or date.today())
+    months = {add_months(current, offset) for offset in range(months_ahead + 1)}
+    months.update(
+        month_start(month) for month in conn.execute(text(
+            f"SELECT DISTINCT date_trunc('month', created_at)::date FROM {ACTIVITY_LOGS_DEFAULT_PARTITION}"
+        )).scalars()
+    )
+    
+    created = []
+    for month in sorted(months):
+        name = partition_name(month)
+        exists = conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+        if not exists:
+            create_activity_log_partition(conn, month)
+            created.append(name)
+    return created
+
+
+def list_activity_log_partitions(conn: Connection) -> List[Tuple[str, date]]:
+    """Monthly partitions of activity_logs as (name, month), oldest first"""
+    rows = conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table
+    """), {"table": ACTIVITY_LOGS_TABLE}).scalars().all()
+    
+    partitions = []
+    prefix = f"{ACTIVITY_LOGS_TABLE}_"
+    for name in rows:
+        try:
+            month = datetime.strptime(name[len(prefix):], "%Y_%m").date()
+        except ValueError:
+            continue  # The default partition
+        partitions.append((name, month))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def expired_activity_log_partitions(conn: Connection, cutoff: datetime) -> List[str]:
+    """Partitions whose whole month is older than cutoff"""
+    cutoff_day = cutoff.date() if isinstance(cutoff, datetime) else cutoff
+    return [
+        name for name, month in list_activity_log_partitions(conn)
+        if add_months(month, 1) <= cutoff_day
+    ]
+
+
+def drop_activity_log_partition(conn: Connection, name: str):
+    """Detach and drop one partition (metadata-only, no row-by-row delete)"""
+    conn.execute(text(f"ALTER TABLE {ACTIVITY_LOGS_TABLE} DETACH PARTITION {name}"))
+    conn.execute(text(f"DROP TABLE {name}"))
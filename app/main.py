@@ -9,6 +9,13 @@ from fastapi.staticfiles import StaticFiles
 from app.core.config import settings
 from app.api.v1.api import api_router
 from app.core.websocket import connection_manager
+from app.core.activity_writer import activity_writer
+from app.core.pantry_alerts import pantry_alert_scheduler
+from app.core.partition_maintenance import partition_maintenance
+from app.core.product_catalog import product_cache
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.rate_limit import RATE_LIMIT_HEADERS, RateLimitMiddleware
+from app.core.security import password_hasher
 import os
 
 
@@ -23,11 +30,11 @@ async def lifespan(app: FastAPI):
         
         # Test database connection (optional - don't fail if DB is not available)
         try:
-            from app.db.database import engine
-            if engine is not None:
-                with engine.connect() as conn:
+            from app.db.database import async_engine
+            if async_engine is not None:
+                async with async_engine.connect() as conn:
                     from sqlalchemy import text
-                    result = conn.execute(text("SELECT 1"))
+                    result = await conn.execute(text("SELECT 1"))
                     result.fetchone()
                 print("✅ Database connection successful")
             else:
@@ -43,6 +50,14 @@ async def lifespan(app: FastAPI):
             print(f"⚠️ Redis initialization failed (continuing without Redis): {str(redis_error)}")
             # Don't raise - the connection_manager.initialize_redis() already handles this gracefully
         
+        await activity_writer.start()
+        
+        # Make sure upcoming activity log partitions exist before rows arrive
+        await partition_maintenance.start()
+        
+        if settings.PANTRY_ALERTS_ENABLED:
+            await pantry_alert_scheduler.start()
+        
         print("🚀 PentryPal API started successfully")
         
     except Exception as e:
@@ -56,7 +71,14 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     try:
+        await pantry_alert_scheduler.stop()
+        await partition_maintenance.stop()
         await connection_manager.cleanup()
+        await activity_writer.stop()
+        
+        from app.db.database import async_engine
+        if async_engine is not None:
+            await async_engine.dispose()
         print("👋 PentryPal API shutdown complete")
     except Exception as cleanup_error:
         print(f"⚠️ Cleanup error (ignoring): {str(cleanup_error)}")
@@ -92,7 +114,9 @@ app = FastAPI(
     ```
 
     ### Rate Limiting
-    API requests are rate-limited to prevent abuse. Current limit: 60 requests per minute.
+    API requests are rate-limited per user (per IP when unauthenticated) with a token bucket.
+    Every response carries `RateLimit-Limit`, `RateLimit-Remaining` and `RateLimit-Reset` headers;
+    a `429` response also has `Retry-After`.
     """,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url=f"{settings.API_V1_STR}/docs",
@@ -117,6 +141,10 @@ app = FastAPI(
     ]
 )
 
+# Add rate limiting (added before CORS so 429 responses still get CORS headers)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -124,6 +152,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, *RATE_LIMIT_HEADERS],
 )
 
 # Add trusted host middleware for security
@@ -159,7 +188,15 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "pentrypal-api"}
+    return {
+        "status": "healthy",
+        "service": "pentrypal-api",
+        "password_hasher": password_hasher.get_stats(),
+        "activity_writer": activity_writer.get_stats(),
+        "pantry_alerts": pantry_alert_scheduler.get_stats(),
+        "partition_maintenance": partition_maintenance.get_stats(),
+        "product_cache": product_cache.get_stats()
+    }
 
 
 if __name__ == "__main__":
@@ -3,11 +3,12 @@ Database models
 """
 from .user import User, UserPreferences
 from .security import SecuritySettings, BiometricKey
-from .shopping_list import ShoppingList, ShoppingItem, ListCollaborator
+from .shopping_list import ShoppingList, ShoppingItem, ListCollaborator, SyncTombstone
 from .category import ItemCategory
 from .social import Friendship, FriendRequest
 from .pantry import PantryItem
 from .activity import ActivityLog
+from .product import Product
 
 __all__ = [
     "User",
@@ -17,9 +18,11 @@ __all__ = [
     "ShoppingList",
     "ShoppingItem",
     "ListCollaborator",
+    "SyncTombstone",
     "ItemCategory",
     "Friendship",
     "FriendRequest",
     "PantryItem",
-    "ActivityLog"
+    "ActivityLog",
+    "Product"
 ]
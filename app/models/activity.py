@@ -2,7 +2,7 @@
 Activity logging related database models
 """
 import uuid
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, DDL, event
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -18,10 +18,25 @@ class ActivityLog(Base):
     entity_id = Column(UUID(as_uuid=True), nullable=True)  # ID of the related entity
     action = Column(String(50), nullable=False)  # created, updated, deleted, completed, etc.
     meta_data = Column(JSONB, default={})  # Additional context data
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Part of the primary key because the table is range-partitioned on it
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     
     # Relationships
     user = relationship("User", back_populates="activity_logs")
     
+    __table_args__ = (
+        Index("ix_activity_logs_user_id_created_at", "user_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    
     def __repr__(self):
         return f"<ActivityLog(id={self.id}, user_id={self.user_id}, entity_type={self.entity_type}, action={self.action})>"
+
+
+# Rows outside every monthly partition land here until the partition exists
+# (monthly partitions are created by app.db.partitions)
+event.listen(
+    ActivityLog.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS activity_logs_default PARTITION OF activity_logs DEFAULT")
+)
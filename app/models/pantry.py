@@ -2,7 +2,7 @@
 Pantry management related database models
 """
 import uuid
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Numeric, Date
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Numeric, Date, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -23,6 +23,8 @@ class PantryItem(Base):
     low_stock_threshold = Column(Numeric(10, 3), nullable=False, default=1)
     barcode = Column(String(50), nullable=True)
     image_url = Column(Text, nullable=True)
+    expiry_alerted_on = Column(Date, nullable=True)  # Expiration date the last expiry alert was sent for
+    low_stock_alerted_at = Column(DateTime(timezone=True), nullable=True)  # Cleared once the item is restocked
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
@@ -30,5 +32,10 @@ class PantryItem(Base):
     user = relationship("User", back_populates="pantry_items")
     category = relationship("ItemCategory", back_populates="pantry_items")
     
+    __table_args__ = (
+        Index("ix_pantry_items_user_id_expiration_date", "user_id", "expiration_date"),
+        Index("ix_pantry_items_user_id_name", "user_id", "name"),
+    )
+    
     def __repr__(self):
         return f"<PantryItem(id={self.id}, name={self.name}, user_id={self.user_id})>"
@@ -0,0 +1,30 @@
+"""
+Product catalog database models
+"""
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class Product(Base):
+    """Shared product data keyed by barcode, loaded from an offline GTIN dataset"""
+    __tablename__ = "products"
+    
+    # Normalized GTIN-13 (UPC-A and EAN-8 are zero-padded). The "C" collation lets
+    # the primary key index answer prefix searches (LIKE '400638%') in order
+    gtin = Column(String(13, collation="C"), primary_key=True)
+    name = Column(String(255), nullable=False)
+    brand = Column(String(255), nullable=True)
+    category_id = Column(UUID(as_uuid=True), ForeignKey("item_categories.id", ondelete="SET NULL"), nullable=True)
+    default_unit = Column(String(50), nullable=False, default="pcs")
+    image_url = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    category = relationship("ItemCategory")
+    
+    def __repr__(self):
+        return f"<Product(gtin={self.gtin}, name={self.name})>"
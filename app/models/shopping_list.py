@@ -3,7 +3,7 @@ Shopping list related database models
 """
 import uuid
 from decimal import Decimal
-from sqlalchemy import Boolean, Column, String, DateTime, Text, ForeignKey, Numeric
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Text, ForeignKey, Numeric, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -21,6 +21,11 @@ class ShoppingList(Base):
     budget_amount = Column(Numeric(10, 2), nullable=True)
     budget_currency = Column(String(3), default="USD", nullable=True)
     meta_data = Column(JSONB, default={})  # For storing additional data like tags, recurring patterns, etc.
+    # Denormalized item counters, maintained by the item write paths (see app/db/list_counters.py)
+    item_count = Column(Integer, nullable=False, default=0, server_default="0")
+    completed_count = Column(Integer, nullable=False, default=0, server_default="0")
+    estimated_total = Column(Numeric(12, 2), nullable=False, default=0, server_default="0")
+    actual_total = Column(Numeric(12, 2), nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
@@ -29,6 +34,10 @@ class ShoppingList(Base):
     items = relationship("ShoppingItem", back_populates="shopping_list", cascade="all, delete-orphan")
     collaborators = relationship("ListCollaborator", back_populates="shopping_list", cascade="all, delete-orphan")
     
+    __table_args__ = (
+        Index("ix_shopping_lists_owner_id_created_at", "owner_id", "created_at"),
+    )
+    
     def __repr__(self):
         return f"<ShoppingList(id={self.id}, name={self.name}, owner_id={self.owner_id})>"
 
@@ -58,6 +67,10 @@ class ShoppingItem(Base):
     category = relationship("ItemCategory", back_populates="shopping_items")
     assigned_user = relationship("User", back_populates="assigned_items")
     
+    __table_args__ = (
+        Index("ix_shopping_items_list_id", "list_id"),
+    )
+    
     def __repr__(self):
         return f"<ShoppingItem(id={self.id}, name={self.name}, list_id={self.list_id})>"
 
@@ -84,5 +97,29 @@ class ListCollaborator(Base):
     shopping_list = relationship("ShoppingList", back_populates="collaborators")
     user = relationship("User", back_populates="collaborations")
     
+    __table_args__ = (
+        Index("ix_list_collaborators_list_id_user_id", "list_id", "user_id"),
+        Index("ix_list_collaborators_user_id", "user_id"),
+    )
+    
     def __repr__(self):
         return f"<ListCollaborator(list_id={self.list_id}, user_id={self.user_id}, role={self.role})>"
+
+
+class SyncTombstone(Base):
+    """Deletion marker per affected user, consumed by the delta-sync endpoint"""
+    __tablename__ = "sync_tombstones"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    entity_type = Column(String(20), nullable=False)  # list, item, collaborator
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+    list_id = Column(UUID(as_uuid=True), nullable=False)  # No FK: the list itself may be gone
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        Index("ix_sync_tombstones_user_id_deleted_at", "user_id", "deleted_at"),
+    )
+    
+    def __repr__(self):
+        return f"<SyncTombstone(user_id={self.user_id}, entity_type={self.entity_type}, entity_id={self.entity_id})>"
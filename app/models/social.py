@@ -2,7 +2,7 @@
 Social features related database models
 """
 import uuid
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -25,6 +25,11 @@ class Friendship(Base):
     user2 = relationship("User", foreign_keys=[user2_id], back_populates="friendships_as_user2")
     initiator = relationship("User", foreign_keys=[initiated_by], back_populates="initiated_friendships")
     
+    __table_args__ = (
+        Index("ix_friendships_user1_id_status", "user1_id", "status"),
+        Index("ix_friendships_user2_id_status", "user2_id", "status"),
+    )
+    
     def __repr__(self):
         return f"<Friendship(id={self.id}, user1_id={self.user1_id}, user2_id={self.user2_id}, status={self.status})>"
 
@@ -44,5 +49,11 @@ class FriendRequest(Base):
     from_user = relationship("User", foreign_keys=[from_user_id], back_populates="sent_friend_requests")
     to_user = relationship("User", foreign_keys=[to_user_id], back_populates="received_friend_requests")
     
+    # Pending requests are the only ones listed; newest first
+    __table_args__ = (
+        Index("ix_friend_requests_to_user_id_pending", "to_user_id", "created_at", postgresql_where=text("status = 'pending'")),
+        Index("ix_friend_requests_from_user_id_pending", "from_user_id", "created_at", postgresql_where=text("status = 'pending'")),
+    )
+    
     def __repr__(self):
         return f"<FriendRequest(id={self.id}, from_user_id={self.from_user_id}, to_user_id={self.to_user_id}, status={self.status})>"
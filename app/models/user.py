@@ -2,9 +2,9 @@
 User related database models
 """
 import uuid
-from sqlalchemy import Boolean, Column, String, DateTime, Text, ForeignKey, UniqueConstraint
+from sqlalchemy import DDL, Boolean, Column, String, DateTime, Text, ForeignKey, Index, UniqueConstraint, event
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import query_expression, relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
 
@@ -23,9 +23,15 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    # Similarity score, only populated by user search
+    search_rank = query_expression()
+    
     # Table constraints
     __table_args__ = (
         UniqueConstraint('phone', 'country_code', name='unique_phone_per_country'),
+        # Trigram indexes serve substring and similarity search on name/email
+        Index('ix_users_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        Index('ix_users_email_trgm', 'email', postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}),
     )
     
     # Relationships
@@ -75,6 +81,10 @@ class User(Base):
         return f"<User(id={self.id}, email={self.email}, name={self.name})>"
 
 
+# The trigram indexes need pg_trgm when tables are built with create_all
+event.listen(User.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+
 class UserPreferences(Base):
     __tablename__ = "user_preferences"
     
@@ -8,7 +8,8 @@ from .user import (
 from .shopping_list import (
     ShoppingListCreate, ShoppingListUpdate, ShoppingListResponse,
     ShoppingItemCreate, ShoppingItemUpdate, ShoppingItemResponse,
-    ListCollaboratorCreate, ListCollaboratorResponse
+    ListCollaboratorCreate, ListCollaboratorResponse, ShoppingListSyncResponse,
+    ShoppingListSummary, ShoppingItemBatchRequest, ShoppingItemBatchResponse
 )
 from .category import ItemCategoryCreate, ItemCategoryResponse
 from .social import (
@@ -17,6 +18,7 @@ from .social import (
 )
 from .pantry import PantryItemCreate, PantryItemUpdate, PantryItemResponse
 from .activity import ActivityLogResponse
+from .product import ProductResponse
 
 __all__ = [
     # User schemas
@@ -26,7 +28,8 @@ __all__ = [
     # Shopping list schemas
     "ShoppingListCreate", "ShoppingListUpdate", "ShoppingListResponse",
     "ShoppingItemCreate", "ShoppingItemUpdate", "ShoppingItemResponse",
-    "ListCollaboratorCreate", "ListCollaboratorResponse",
+    "ListCollaboratorCreate", "ListCollaboratorResponse", "ShoppingListSyncResponse",
+    "ShoppingListSummary", "ShoppingItemBatchRequest", "ShoppingItemBatchResponse",
     
     # Category schemas
     "ItemCategoryCreate", "ItemCategoryResponse",
@@ -38,5 +41,8 @@ __all__ = [
     "PantryItemCreate", "PantryItemUpdate", "PantryItemResponse",
     
     # Activity schemas
-    "ActivityLogResponse"
+    "ActivityLogResponse",
+    
+    # Product catalog schemas
+    "ProductResponse"
 ]
@@ -67,6 +67,25 @@ class PantryItemBulkUpdate(BaseModel):
     updates: PantryItemUpdate
 
 
+class PantryItemBulkUpdateResponse(BaseModel):
+    updated: list[PantryItemResponse]
+    not_found: list[str]  # Ids that don't exist or aren't the user's
+
+
+class PantryImportError(BaseModel):
+    row: int  # Line number in the file where the row starts
+    error: str
+
+
+class PantryImportResponse(BaseModel):
+    total_rows: int
+    imported: int
+    failed: int
+    errors: list[PantryImportError]  # First PANTRY_IMPORT_MAX_ERRORS rejected rows
+    duration_ms: float
+    rows_per_second: float
+
+
 class PantryItemConsume(BaseModel):
     quantity_used: Decimal = Field(..., gt=0)
     notes: Optional[str] = Field(None, max_length=500)
\ No newline at end of file
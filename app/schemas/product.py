@@ -0,0 +1,26 @@
+"""
+Product catalog related Pydantic schemas
+"""
+from typing import Optional
+from uuid import UUID
+from pydantic import BaseModel, field_validator
+
+
+class ProductResponse(BaseModel):
+    gtin: str  # Normalized GTIN-13
+    name: str
+    brand: Optional[str] = None
+    category_id: Optional[str] = None
+    category_name: Optional[str] = None
+    default_unit: str
+    image_url: Optional[str] = None
+    
+    @field_validator('category_id', mode='before')
+    @classmethod
+    def convert_uuid_to_str(cls, v):
+        if isinstance(v, UUID):
+            return str(v)
+        return v
+    
+    class Config:
+        from_attributes = True
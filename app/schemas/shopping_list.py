@@ -5,7 +5,7 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 from decimal import Decimal
 from uuid import UUID
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 from app.schemas.user import UserResponse
 
@@ -81,6 +81,36 @@ class ShoppingItemResponse(ShoppingItemBase):
         from_attributes = True
 
 
+class ShoppingItemBatchOperation(BaseModel):
+    """One add/update/delete/complete step of a batch item request"""
+    op: str = Field(..., pattern='^(add|update|delete|complete)$')
+    item_id: Optional[str] = None  # update, delete, complete
+    item: Optional[ShoppingItemCreate] = None  # add
+    changes: Optional[ShoppingItemUpdate] = None  # update
+    completed: bool = True  # complete; false un-checks the item
+    
+    @model_validator(mode='after')
+    def check_operation(self):
+        if self.op == "add":
+            if self.item is None:
+                raise ValueError("add operations need an item")
+        elif self.item_id is None:
+            raise ValueError(f"{self.op} operations need an item_id")
+        if self.op == "update" and self.changes is None:
+            raise ValueError("update operations need changes")
+        return self
+
+
+class ShoppingItemBatchRequest(BaseModel):
+    operations: List[ShoppingItemBatchOperation] = Field(..., min_length=1)
+
+
+class ShoppingItemBatchResponse(BaseModel):
+    added: List[ShoppingItemResponse] = []
+    updated: List[ShoppingItemResponse] = []
+    deleted: List[str] = []
+
+
 class ListCollaboratorBase(BaseModel):
     user_id: str
     role: str = Field(..., pattern='^(owner|editor|viewer)$')
@@ -128,3 +158,74 @@ class ShoppingListResponse(ShoppingListBase):
     
     class Config:
         from_attributes = True
+
+
+class ShoppingListSyncEntry(ShoppingListBase):
+    """List fields without nested items/collaborators (sent separately on sync)"""
+    id: str
+    owner_id: str
+    status: str
+    created_at: datetime
+    updated_at: datetime
+    
+    @field_validator('id', 'owner_id', mode='before')
+    @classmethod
+    def convert_uuid_to_str(cls, v):
+        if isinstance(v, UUID):
+            return str(v)
+        return v
+    
+    class Config:
+        from_attributes = True
+
+
+class ShoppingListSummary(BaseModel):
+    """List header with its denormalized item counters, without items or collaborators"""
+    id: str
+    name: str
+    owner_id: str
+    status: str
+    budget_amount: Optional[Decimal] = None
+    budget_currency: Optional[str] = None
+    item_count: int
+    completed_count: int
+    estimated_total: Decimal
+    actual_total: Decimal
+    created_at: datetime
+    updated_at: datetime
+    
+    @field_validator('id', 'owner_id', mode='before')
+    @classmethod
+    def convert_uuid_to_str(cls, v):
+        if isinstance(v, UUID):
+            return str(v)
+        return v
+    
+    class Config:
+        from_attributes = True
+
+
+class SyncTombstoneResponse(BaseModel):
+    entity_type: str  # list, item, collaborator
+    entity_id: str
+    list_id: str
+    deleted_at: datetime
+    
+    @field_validator('entity_id', 'list_id', mode='before')
+    @classmethod
+    def convert_uuid_to_str(cls, v):
+        if isinstance(v, UUID):
+            return str(v)
+        return v
+    
+    class Config:
+        from_attributes = True
+
+
+class ShoppingListSyncResponse(BaseModel):
+    lists: List[ShoppingListSyncEntry] = []
+    items: List[ShoppingItemResponse] = []
+    collaborators: List[ListCollaboratorResponse] = []
+    deleted: List[SyncTombstoneResponse] = []
+    full_sync: bool  # True when the client must replace its local copy
+    next_cursor: str
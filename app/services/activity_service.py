@@ -0,0 +1,94 @@
+"""
+Activity Service - Activity Feed Business Logic
+"""
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.activity_timeline import (
+    activity_entry, activity_timeline, friend_ids_select, list_activity_filter, shared_activity_filter
+)
+from app.core.pagination import CursorPage, Keyset, encode_cursor
+from app.models.activity import ActivityLog
+from app.services.shopping_list_service import accessible_list_ids
+
+
+class ActivityService:
+    """Service class for activity feeds"""
+    
+    def _keyset(self) -> Keyset:
+        return Keyset(ActivityLog.created_at, ActivityLog.id, descending=True)
+    
+    async def get_user_activity(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        entity_type: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> CursorPage:
+        """Get a user's own activity, most recent first"""
+        query = select(ActivityLog).where(ActivityLog.user_id == user_id)
+        if entity_type:
+            query = query.where(ActivityLog.entity_type == entity_type)
+        
+        keyset = self._keyset()
+        query = keyset.apply(query, cursor)
+        if not cursor:
+            query = query.offset(skip)
+        
+        result = await db.execute(query.limit(limit))
+        page = keyset.page(result.scalars().all(), limit)
+        return CursorPage([activity_entry(row) for row in page], page.next_cursor)
+    
+    async def get_friends_activity(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> CursorPage:
+        """Get friends' activity, most recent first, from the precomputed timeline when it's warm"""
+        timeline = await activity_timeline.read(user_id, limit, cursor)
+        
+        if timeline is None:
+            if cursor is None and activity_timeline.available:
+                # Cold timeline: one query both backfills it and serves the first page
+                entries = await self._friends_activity_from_db(db, user_id, activity_timeline.size)
+                await activity_timeline.fill(user_id, entries)
+                return self._page(entries[:limit], limit)
+            return self._page(await self._friends_activity_from_db(db, user_id, limit, cursor), limit)
+        
+        entries, complete = timeline
+        if len(entries) < limit and not complete:
+            # Older than the trimmed timeline reaches; continue from SQL
+            after = self._cursor(entries[-1]) if entries else cursor
+            entries += await self._friends_activity_from_db(db, user_id, limit - len(entries), after)
+        return self._page(entries, limit)
+    
+    async def _friends_activity_from_db(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        limit: int,
+        cursor: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        query = select(ActivityLog).where(
+            ActivityLog.user_id.in_(friend_ids_select(user_id)),
+            shared_activity_filter(),
+            list_activity_filter(accessible_list_ids(user_id))
+        )
+        query = self._keyset().apply(query, cursor)
+        
+        result = await db.execute(query.limit(limit))
+        return [activity_entry(row) for row in result.scalars().all()]
+    
+    def _cursor(self, entry: Dict[str, Any]) -> str:
+        return encode_cursor(entry["created_at"], UUID(entry["id"]))
+    
+    def _page(self, entries: List[Dict[str, Any]], limit: int) -> CursorPage:
+        next_cursor = self._cursor(entries[-1]) if entries and len(entries) >= limit else None
+        return CursorPage(entries, next_cursor)
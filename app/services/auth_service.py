@@ -3,10 +3,12 @@ Authentication service
 """
 from typing import Optional
 from datetime import timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
+from app.core.principal_cache import Principal, principal_cache
 from app.core.security import (
-    verify_password, create_access_token, create_refresh_token, verify_token
+    password_hasher, create_access_token, create_refresh_token, verify_token
 )
 from app.schemas.user import TokenResponse
 from app.models.user import User
@@ -19,7 +21,7 @@ class AuthService:
         self.user_service = UserService()
     
     async def authenticate_user(
-        self, db: Session, email_or_phone: str, password: str
+        self, db: AsyncSession, email_or_phone: str, password: str
     ) -> Optional[User]:
         """
         Authenticate user with email/phone and password
@@ -48,7 +50,7 @@ class AuthService:
         if not user:
             return None
         
-        if not verify_password(password, user.password_hash):
+        if not await password_hasher.verify(password, user.password_hash):
             return None
         
         return user
@@ -98,7 +100,7 @@ class AuthService:
             expires_in=30 * 60  # 30 minutes
         )
     
-    async def refresh_tokens(self, db: Session, refresh_token: str) -> TokenResponse:
+    async def refresh_tokens(self, db: AsyncSession, refresh_token: str) -> TokenResponse:
         """
         Refresh access token using refresh token
         """
@@ -120,7 +122,7 @@ class AuthService:
         
         return await self.create_tokens(user_id)
     
-    async def logout_user(self, db: Session, access_token: str) -> bool:
+    async def logout_user(self, db: AsyncSession, access_token: str) -> bool:
         """
         Logout user (in a real implementation, you might want to blacklist the token)
         """
@@ -140,9 +142,9 @@ class AuthService:
         
         return True
     
-    async def get_current_user(self, db: Session, token: str) -> User:
+    async def get_current_user(self, db: AsyncSession, token: str) -> Principal:
         """
-        Get current user from access token
+        Get the current principal from access token (cached, see principal_cache)
         """
         user_id = verify_token(token, token_type="access")
         
@@ -152,30 +154,35 @@ class AuthService:
                 detail="Invalid access token"
             )
         
-        user = await self.user_service.get_user_by_id(db, user_id)
+        principal = await principal_cache.get(user_id)
         
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found"
-            )
+        if principal is None:
+            user = await self.user_service.get_user_by_id(db, user_id)
+            
+            if not user:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="User not found"
+                )
+            
+            principal = await principal_cache.set(user)
         
-        if not user.is_active:
+        if not principal.is_active:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User account is deactivated"
             )
         
-        return user
+        return principal
     
     async def verify_password(self, password: str, password_hash: str) -> bool:
         """
         Verify password against hash
         """
-        return verify_password(password, password_hash)
+        return await password_hasher.verify(password, password_hash)
     
     async def authenticate_biometric(
-        self, db: Session, user_id: str, signature: str, device_id: str
+        self, db: AsyncSession, user_id: str, signature: str, device_id: str
     ) -> Optional[User]:
         """
         Authenticate user with biometric signature
@@ -191,11 +198,14 @@ class AuthService:
             return None
         
         # Find active biometric key for this device
-        biometric_key = db.query(BiometricKey).filter(
-            BiometricKey.security_settings_id == security_settings.id,
-            BiometricKey.device_id == device_id,
-            BiometricKey.is_active == True
-        ).first()
+        result = await db.execute(
+            select(BiometricKey).where(
+                BiometricKey.security_settings_id == security_settings.id,
+                BiometricKey.device_id == device_id,
+                BiometricKey.is_active == True
+            )
+        )
+        biometric_key = result.scalars().first()
         
         if not biometric_key:
             return None
@@ -208,6 +218,6 @@ class AuthService:
         # Update last used timestamp
         from sqlalchemy.sql import func
         biometric_key.last_used_at = func.now()
-        db.commit()
+        await db.commit()
         
         return user
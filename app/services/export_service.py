@@ -0,0 +1,153 @@
+"""
+Export Service - Streaming Data Exports
+"""
+import csv
+import io
+import zlib
+from datetime import date, datetime
+from typing import Any, AsyncIterator, List, Sequence
+
+import orjson
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.activity import ActivityLog
+from app.models.category import ItemCategory
+from app.models.pantry import PantryItem
+from app.models.shopping_list import ShoppingItem, ShoppingList
+from app.services.shopping_list_service import accessible_list_ids
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _csv_value(value: Any) -> Any:
+    """CSV cell for a column value"""
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode()
+    return value
+
+
+def _encode_rows(file_format: str, columns: Sequence[str], rows: List[Sequence[Any]]) -> bytes:
+    """Encode one batch of rows as NDJSON lines or CSV records"""
+    if file_format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([_csv_value(value) for value in row] for row in rows)
+        return buffer.getvalue().encode()
+    # Decimals are written as strings, like the API's JSON responses
+    return b"".join(
+        orjson.dumps(dict(zip(columns, row)), default=str) + b"\n" for row in rows
+    )
+
+
+class ExportService:
+    """
+    Service class for account data exports
+    
+    Each export is a single query streamed through a server-side cursor
+    (yield_per) on its own session, so the session outlives the request
+    handler and memory holds one batch of rows however big the account is.
+    Every fetched batch is encoded and sent right away; the CSV header (or
+    the gzip header) goes out before the query runs.
+    """
+    
+    def __init__(self, batch_size: int = settings.EXPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+    
+    def pantry_items(self, user_id: str, file_format: str, gzip: bool = False) -> AsyncIterator[bytes]:
+        """Stream the user's pantry items, alphabetically"""
+        query = (
+            select(
+                PantryItem.id,
+                PantryItem.name,
+                ItemCategory.name.label("category"),
+                PantryItem.quantity,
+                PantryItem.unit,
+                PantryItem.location,
+                PantryItem.expiration_date,
+                PantryItem.low_stock_threshold,
+                PantryItem.barcode,
+                PantryItem.image_url,
+                PantryItem.created_at,
+                PantryItem.updated_at
+            )
+            .outerjoin(ItemCategory, PantryItem.category_id == ItemCategory.id)
+            .where(PantryItem.user_id == user_id)
+            .order_by(PantryItem.name, PantryItem.id)
+        )
+        return self._stream(query, file_format, gzip)
+    
+    def shopping_lists(self, user_id: str, file_format: str, gzip: bool = False) -> AsyncIterator[bytes]:
+        """Stream the user's owned and shared lists, one row per item (lists without items get one empty row)"""
+        query = (
+            select(
+                ShoppingList.id.label("list_id"),
+                ShoppingList.name.label("list_name"),
+                ShoppingList.description.label("list_description"),
+                ShoppingList.status.label("list_status"),
+                ShoppingList.budget_amount,
+                ShoppingList.budget_currency,
+                ShoppingList.created_at.label("list_created_at"),
+                ShoppingItem.id.label("item_id"),
+                ShoppingItem.name.label("item_name"),
+                ShoppingItem.description.label("item_description"),
+                ItemCategory.name.label("item_category"),
+                ShoppingItem.quantity,
+                ShoppingItem.unit,
+                ShoppingItem.completed,
+                ShoppingItem.estimated_price,
+                ShoppingItem.actual_price,
+                ShoppingItem.notes,
+                ShoppingItem.barcode,
+                ShoppingItem.completed_at,
+                ShoppingItem.created_at.label("item_created_at")
+            )
+            .outerjoin(ShoppingItem, ShoppingItem.list_id == ShoppingList.id)
+            .outerjoin(ItemCategory, ShoppingItem.category_id == ItemCategory.id)
+            .where(ShoppingList.id.in_(accessible_list_ids(user_id)))
+            .order_by(ShoppingList.created_at, ShoppingList.id, ShoppingItem.created_at, ShoppingItem.id)
+        )
+        return self._stream(query, file_format, gzip)
+    
+    def activity(self, user_id: str, file_format: str, gzip: bool = False) -> AsyncIterator[bytes]:
+        """Stream the user's activity log, most recent first"""
+        query = (
+            select(
+                ActivityLog.id,
+                ActivityLog.entity_type,
+                ActivityLog.entity_id,
+                ActivityLog.action,
+                ActivityLog.meta_data,
+                ActivityLog.created_at
+            )
+            .where(ActivityLog.user_id == user_id)
+            .order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc())
+        )
+        return self._stream(query, file_format, gzip)
+    
+    async def _stream(self, query, file_format: str, gzip: bool) -> AsyncIterator[bytes]:
+        columns = [column.name for column in query.selected_columns]
+        # wbits=31 writes a gzip container rather than a raw zlib stream
+        compressor = zlib.compressobj(wbits=31) if gzip else None
+        
+        def emit(data: bytes) -> bytes:
+            if compressor is None:
+                return data
+            # Sync-flush so each batch reaches the client instead of sitting in the compressor
+            return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        
+        header = _encode_rows("csv", columns, [columns]) if file_format == "csv" else b""
+        if header or compressor is not None:
+            yield emit(header)
+        
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(query.execution_options(yield_per=self.batch_size))
+            async for rows in result.partitions():
+                yield emit(_encode_rows(file_format, columns, rows))
+        
+        if compressor is not None:
+            yield compressor.flush()
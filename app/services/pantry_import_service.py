@@ -0,0 +1,349 @@
+"""
+Pantry Import Service - Streaming CSV/NDJSON Pantry Import
+"""
+import codecs
+import csv
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+import orjson
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.activity_writer import activity_writer
+from app.core.config import settings
+from app.core.pantry_stats_cache import pantry_stats_cache
+from app.models.category import ItemCategory
+from app.models.pantry import PantryItem
+from app.schemas.pantry import PantryItemCreate
+
+# Columns an import row may set; anything else in the file is ignored
+IMPORT_FIELDS = (
+    "name", "quantity", "unit", "location", "expiration_date",
+    "low_stock_threshold", "barcode", "image_url"
+)
+
+STAGING_COLUMNS = (
+    "row_number", "id", "name", "category_id", "quantity", "unit", "location",
+    "expiration_date", "low_stock_threshold", "barcode", "image_url"
+)
+
+CREATE_STAGING_TABLE = """
+    CREATE TEMP TABLE pantry_import_staging (
+        row_number integer NOT NULL,
+        id uuid NOT NULL,
+        name varchar(255) NOT NULL,
+        category_id uuid,
+        quantity numeric(10, 3) NOT NULL,
+        unit varchar(50) NOT NULL,
+        location varchar(100),
+        expiration_date date,
+        low_stock_threshold numeric(10, 3) NOT NULL,
+        barcode varchar(50),
+        image_url text
+    ) ON COMMIT DROP
+"""
+
+# Keeps the first row per barcode and skips barcodes the user already has
+# (including ones added by a concurrent request since the import started)
+MERGE_STAGING_ROWS = """
+    WITH ranked AS (
+        SELECT s.*, row_number() OVER (PARTITION BY s.barcode ORDER BY s.row_number) AS barcode_rank
+        FROM pantry_import_staging s
+    )
+    INSERT INTO pantry_items (
+        id, user_id, name, category_id, quantity, unit, location,
+        expiration_date, low_stock_threshold, barcode, image_url
+    )
+    SELECT
+        id, :user_id, name, category_id, quantity, unit, location,
+        expiration_date, low_stock_threshold, barcode, image_url
+    FROM ranked
+    WHERE barcode IS NULL OR (
+        barcode_rank = 1 AND NOT EXISTS (
+            SELECT 1 FROM pantry_items p WHERE p.user_id = :user_id AND p.barcode = ranked.barcode
+        )
+    )
+"""
+
+SKIPPED_STAGING_ROWS = """
+    SELECT s.row_number, s.barcode
+    FROM pantry_import_staging s
+    WHERE NOT EXISTS (SELECT 1 FROM pantry_items p WHERE p.id = s.id)
+    ORDER BY s.row_number
+    LIMIT :limit
+"""
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines without holding more than one line"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    try:
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line.rstrip("\r")
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Import file must be UTF-8 encoded"
+        )
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def _csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """(line number, row dict) per CSV record; quoted fields may span lines"""
+    header: Optional[List[str]] = None
+    record: List[str] = []
+    open_quotes = False
+    line_number = start_line = 0
+    
+    async for line in lines:
+        line_number += 1
+        if not record:
+            if not line.strip():
+                continue
+            start_line = line_number
+        record.append(line)
+        # An odd number of quotes leaves a quoted field open onto the next line
+        if line.count('"') % 2:
+            open_quotes = not open_quotes
+        if open_quotes:
+            continue
+        
+        values = next(csv.reader(["\n".join(record)]))
+        record = []
+        if header is None:
+            header = [column.strip().lower() for column in values]
+            continue
+        yield start_line, {column: value for column, value in zip(header, values) if column}
+    
+    if record:
+        yield start_line, {"__error__": "Unterminated quoted field"}
+
+
+async def _ndjson_rows(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """(line number, row dict) per NDJSON line"""
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            row = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            yield line_number, {"__error__": "Invalid JSON"}
+            continue
+        if not isinstance(row, dict):
+            yield line_number, {"__error__": "Each line must be a JSON object"}
+            continue
+        yield line_number, {str(key).strip().lower(): value for key, value in row.items()}
+
+
+class PantryImportService:
+    """Service class for streaming pantry imports"""
+    
+    def __init__(
+        self,
+        batch_size: int = settings.PANTRY_IMPORT_BATCH_SIZE,
+        max_rows: int = settings.PANTRY_IMPORT_MAX_ROWS,
+        max_errors: int = settings.PANTRY_IMPORT_MAX_ERRORS
+    ):
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+        self.max_errors = max_errors
+    
+    async def import_items(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        chunks: AsyncIterator[bytes],
+        file_format: str
+    ) -> Dict[str, Any]:
+        """
+        Import pantry items from a CSV or NDJSON byte stream
+        
+        Rows are validated as they are parsed, against category and barcode
+        indexes built once, and valid rows are COPYed into a temporary staging
+        table in batches, so memory stays flat however large the file is. One
+        INSERT ... SELECT then merges the staged rows, skipping barcodes that
+        repeat within the file or already exist. Everything is committed
+        together; a file over PANTRY_IMPORT_MAX_ROWS imports nothing.
+        """
+        started = time.perf_counter()
+        categories_by_name, category_ids = await self._category_index(db)
+        barcodes = await self._barcode_index(db, user_id)
+        
+        await db.execute(text(CREATE_STAGING_TABLE))
+        
+        errors: List[Dict[str, Any]] = []
+        failed = total_rows = staged = 0
+        batch: List[tuple] = []
+        
+        rows = _csv_rows(_lines(chunks)) if file_format == "csv" else _ndjson_rows(_lines(chunks))
+        async for row_number, raw in rows:
+            total_rows += 1
+            if total_rows > self.max_rows:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Imports are limited to {self.max_rows} rows"
+                )
+            
+            try:
+                batch.append(self._staging_record(row_number, raw, categories_by_name, category_ids, barcodes))
+            except ValueError as e:
+                failed += 1
+                if len(errors) < self.max_errors:
+                    errors.append({"row": row_number, "error": str(e)})
+                continue
+            
+            if len(batch) >= self.batch_size:
+                await self._copy_to_staging(db, batch)
+                staged += len(batch)
+                batch = []
+        
+        if batch:
+            await self._copy_to_staging(db, batch)
+            staged += len(batch)
+        
+        result = await db.execute(text(MERGE_STAGING_ROWS), {"user_id": user_id})
+        imported = result.rowcount
+        
+        if imported < staged:
+            # Rows the merge skipped are duplicate barcodes
+            failed += staged - imported
+            result = await db.execute(
+                text(SKIPPED_STAGING_ROWS), {"limit": max(self.max_errors - len(errors), 0)}
+            )
+            for row_number, barcode in result:
+                errors.append({"row": row_number, "error": f"Duplicate barcode {barcode}"})
+            errors.sort(key=lambda error: error["row"])
+        
+        await db.commit()
+        
+        if imported:
+            await pantry_stats_cache.invalidate(user_id)
+            await self._log_activity(
+                user_id, "pantry_item", None, "imported",
+                {"format": file_format, "imported": imported, "failed": failed}
+            )
+        
+        duration = time.perf_counter() - started
+        return {
+            "total_rows": total_rows,
+            "imported": imported,
+            "failed": failed,
+            "errors": errors,
+            "duration_ms": round(duration * 1000, 2),
+            "rows_per_second": round(total_rows / duration, 1) if duration else 0.0
+        }
+    
+    async def _category_index(self, db: AsyncSession) -> Tuple[Dict[str, str], Set[str]]:
+        """Categories by lower-cased name, and the set of valid category ids"""
+        result = await db.execute(select(ItemCategory.id, ItemCategory.name))
+        by_name, ids = {}, set()
+        for category_id, name in result:
+            by_name[name.strip().lower()] = str(category_id)
+            ids.add(str(category_id))
+        return by_name, ids
+    
+    async def _barcode_index(self, db: AsyncSession, user_id: str) -> Set[str]:
+        """Barcodes already in the user's pantry"""
+        result = await db.execute(
+            select(PantryItem.barcode).where(PantryItem.user_id == user_id, PantryItem.barcode.isnot(None))
+        )
+        return set(result.scalars().all())
+    
+    def _staging_record(
+        self,
+        row_number: int,
+        raw: Dict[str, Any],
+        categories_by_name: Dict[str, str],
+        category_ids: Set[str],
+        barcodes: Set[str]
+    ) -> tuple:
+        """Validate one parsed row into a staging table record; ValueError explains a rejected row"""
+        if "__error__" in raw:
+            raise ValueError(raw["__error__"])
+        
+        # Blank CSV cells and JSON nulls mean "not given"
+        fields = {
+            key: value.strip() if isinstance(value, str) else value
+            for key, value in raw.items()
+        }
+        fields = {key: value for key, value in fields.items() if value not in (None, "")}
+        
+        category_id = fields.get("category_id")
+        category = fields.get("category")
+        if category_id is not None:
+            if str(category_id) not in category_ids:
+                raise ValueError(f"Unknown category_id {category_id}")
+        elif category is not None:
+            category_id = categories_by_name.get(str(category).lower())
+            if category_id is None:
+                raise ValueError(f"Unknown category {category}")
+        
+        values = {field: fields[field] for field in IMPORT_FIELDS if field in fields}
+        values.setdefault("quantity", 1)
+        values.setdefault("unit", "pcs")
+        try:
+            item = PantryItemCreate(category_id=category_id, **values)
+        except ValidationError as e:
+            raise ValueError("; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            ))
+        
+        if item.barcode and item.barcode in barcodes:
+            raise ValueError(f"Barcode {item.barcode} is already in your pantry")
+        
+        return (
+            row_number,
+            uuid.uuid4(),
+            item.name,
+            uuid.UUID(item.category_id) if item.category_id else None,
+            item.quantity,
+            item.unit,
+            item.location,
+            item.expiration_date,
+            item.low_stock_threshold,
+            item.barcode,
+            item.image_url
+        )
+    
+    async def _copy_to_staging(self, db: AsyncSession, records: List[tuple]):
+        """COPY a batch into the staging table on the session's connection"""
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+        
+        if hasattr(driver_connection, "copy_records_to_table"):
+            await driver_connection.copy_records_to_table(
+                "pantry_import_staging", records=records, columns=STAGING_COLUMNS
+            )
+        else:
+            # Drivers without COPY support fall back to a multi-row insert
+            await db.execute(
+                text(
+                    f"INSERT INTO pantry_import_staging ({', '.join(STAGING_COLUMNS)}) "
+                    f"VALUES ({', '.join(':' + column for column in STAGING_COLUMNS)})"
+                ),
+                [dict(zip(STAGING_COLUMNS, record)) for record in records]
+            )
+    
+    async def _log_activity(
+        self,
+        user_id: str,
+        entity_type: str,
+        entity_id: Optional[str],
+        action: str,
+        metadata: dict
+    ):
+        """Queue user activity for the batched activity log writer (no extra commit)"""
+        activity_writer.record(user_id, entity_type, entity_id, action, metadata)
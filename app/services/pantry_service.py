@@ -1,29 +1,41 @@
 """
 Pantry Service - Inventory Management Business Logic
 """
+import uuid
+from types import SimpleNamespace
 from typing import List, Optional, Dict, Any
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func, desc, asc
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import select, update, and_, or_, func, asc, tuple_, any_, bindparam
 from fastapi import HTTPException, status
 
+from app.core.pagination import CursorPage, Keyset
 from app.models.pantry import PantryItem
 from app.models.user import User
 from app.models.category import ItemCategory
-from app.models.activity import ActivityLog
+from app.core.activity_writer import activity_writer
+from app.core.pantry_stats_cache import EXPIRING_SOON_DAYS, item_stat_fields, pantry_stats_cache, stats_from_counters
 from app.schemas.pantry import (
     PantryItemCreate, PantryItemUpdate, PantryStatsResponse, 
     PantryItemBulkUpdate, PantryItemConsume
 )
 
 
+# Stands in for a missing expiration date when paginating by it; sorts exactly
+# where PostgreSQL puts NULLs (last ascending, first descending)
+NO_EXPIRATION_SORT_VALUE = date(9999, 12, 31)
+
+
 class PantryService:
     """Service class for pantry inventory management"""
     
     async def get_user_pantry_items(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_id: str,
         category_id: Optional[str] = None,
         location: Optional[str] = None,
@@ -33,23 +45,24 @@ class PantryService:
         sort_by: str = "name",
         sort_order: str = "asc",
         skip: int = 0,
-        limit: int = 100
-    ) -> List[PantryItem]:
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> CursorPage:
         """Get user's pantry items with filtering and sorting"""
-        query = db.query(PantryItem).options(
+        query = select(PantryItem).options(
             joinedload(PantryItem.category),
             joinedload(PantryItem.user)
-        ).filter(PantryItem.user_id == user_id)
+        ).where(PantryItem.user_id == user_id)
         
         # Apply filters
         if category_id:
-            query = query.filter(PantryItem.category_id == category_id)
+            query = query.where(PantryItem.category_id == category_id)
         
         if location:
-            query = query.filter(PantryItem.location.ilike(f"%{location}%"))
+            query = query.where(PantryItem.location.ilike(f"%{location}%"))
         
         if search:
-            query = query.filter(
+            query = query.where(
                 or_(
                     PantryItem.name.ilike(f"%{search}%"),
                     PantryItem.barcode.ilike(f"%{search}%")
@@ -59,7 +72,7 @@ class PantryService:
         # Filter by expiring soon (within 3 days)
         if expiring_soon is True:
             three_days_from_now = date.today() + timedelta(days=3)
-            query = query.filter(
+            query = query.where(
                 and_(
                     PantryItem.expiration_date.isnot(None),
                     PantryItem.expiration_date <= three_days_from_now,
@@ -69,15 +82,17 @@ class PantryService:
         
         # Filter by low stock
         if low_stock is True:
-            query = query.filter(PantryItem.quantity <= PantryItem.low_stock_threshold)
+            query = query.where(PantryItem.quantity <= PantryItem.low_stock_threshold)
         
-        # Apply sorting
+        # Apply sorting (id breaks ties so cursors are stable)
+        row_value = None
         if sort_by == "name":
             order_col = PantryItem.name
         elif sort_by == "quantity":
             order_col = PantryItem.quantity
         elif sort_by == "expiration_date":
-            order_col = PantryItem.expiration_date
+            order_col = func.coalesce(PantryItem.expiration_date, NO_EXPIRATION_SORT_VALUE)
+            row_value = lambda item: item.expiration_date or NO_EXPIRATION_SORT_VALUE
         elif sort_by == "created_at":
             order_col = PantryItem.created_at
         elif sort_by == "updated_at":
@@ -85,39 +100,44 @@ class PantryService:
         else:
             order_col = PantryItem.name
         
-        if sort_order.lower() == "desc":
-            query = query.order_by(desc(order_col))
-        else:
-            query = query.order_by(asc(order_col))
+        keyset = Keyset(order_col, PantryItem.id, descending=sort_order.lower() == "desc", row_value=row_value)
+        query = keyset.apply(query, cursor)
+        if not cursor:
+            query = query.offset(skip)
         
-        return query.offset(skip).limit(limit).all()
+        result = await db.execute(query.limit(limit))
+        return keyset.page(result.scalars().all(), limit)
     
     async def get_pantry_item_by_id(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         item_id: str, 
         user_id: str
     ) -> Optional[PantryItem]:
         """Get a specific pantry item by ID"""
-        return db.query(PantryItem).options(
-            joinedload(PantryItem.category),
-            joinedload(PantryItem.user)
-        ).filter(
-            and_(
-                PantryItem.id == item_id,
-                PantryItem.user_id == user_id
+        result = await db.execute(
+            select(PantryItem).options(
+                joinedload(PantryItem.category),
+                joinedload(PantryItem.user)
+            ).where(
+                and_(
+                    PantryItem.id == item_id,
+                    PantryItem.user_id == user_id
+                )
             )
-        ).first()
+        )
+        return result.scalars().first()
     
     async def create_pantry_item(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         item_data: PantryItemCreate, 
         user_id: str
     ) -> PantryItem:
         """Create a new pantry item"""
         # Verify user exists
-        user = db.query(User).filter(User.id == user_id).first()
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalars().first()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -126,9 +146,10 @@ class PantryService:
         
         # Validate category if provided
         if item_data.category_id:
-            category = db.query(ItemCategory).filter(
-                ItemCategory.id == item_data.category_id
-            ).first()
+            result = await db.execute(
+                select(ItemCategory).where(ItemCategory.id == item_data.category_id)
+            )
+            category = result.scalars().first()
             if not category:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -137,12 +158,15 @@ class PantryService:
         
         # Check for duplicate barcode if provided
         if item_data.barcode:
-            existing_item = db.query(PantryItem).filter(
-                and_(
-                    PantryItem.user_id == user_id,
-                    PantryItem.barcode == item_data.barcode
+            result = await db.execute(
+                select(PantryItem).where(
+                    and_(
+                        PantryItem.user_id == user_id,
+                        PantryItem.barcode == item_data.barcode
+                    )
                 )
-            ).first()
+            )
+            existing_item = result.scalars().first()
             if existing_item:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -164,8 +188,10 @@ class PantryService:
         )
         
         db.add(db_item)
-        db.commit()
-        db.refresh(db_item)
+        async with pantry_stats_cache.write(user_id) as stats:
+            await db.commit()
+            await db.refresh(db_item)
+            stats.apply(after=[item_stat_fields(db_item)])
         
         # Log activity
         await self._log_activity(
@@ -177,7 +203,7 @@ class PantryService:
     
     async def update_pantry_item(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         item_id: str, 
         item_data: PantryItemUpdate, 
         user_id: str
@@ -189,9 +215,10 @@ class PantryService:
         
         # Validate category if provided
         if item_data.category_id:
-            category = db.query(ItemCategory).filter(
-                ItemCategory.id == item_data.category_id
-            ).first()
+            result = await db.execute(
+                select(ItemCategory).where(ItemCategory.id == item_data.category_id)
+            )
+            category = result.scalars().first()
             if not category:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -200,13 +227,16 @@ class PantryService:
         
         # Check for duplicate barcode if provided and different from current
         if item_data.barcode and item_data.barcode != db_item.barcode:
-            existing_item = db.query(PantryItem).filter(
-                and_(
-                    PantryItem.user_id == user_id,
-                    PantryItem.barcode == item_data.barcode,
-                    PantryItem.id != item_id
+            result = await db.execute(
+                select(PantryItem).where(
+                    and_(
+                        PantryItem.user_id == user_id,
+                        PantryItem.barcode == item_data.barcode,
+                        PantryItem.id != item_id
+                    )
                 )
-            ).first()
+            )
+            existing_item = result.scalars().first()
             if existing_item:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -216,12 +246,15 @@ class PantryService:
         # Update fields
         update_data = item_data.dict(exclude_unset=True)
         old_quantity = db_item.quantity
+        old_stats = item_stat_fields(db_item)
         
         for field, value in update_data.items():
             setattr(db_item, field, value)
         
-        db.commit()
-        db.refresh(db_item)
+        async with pantry_stats_cache.write(user_id) as stats:
+            await db.commit()
+            await db.refresh(db_item)
+            stats.apply(before=[old_stats], after=[item_stat_fields(db_item)])
         
         # Log activity with changes
         changes = {}
@@ -238,7 +271,7 @@ class PantryService:
     
     async def delete_pantry_item(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         item_id: str, 
         user_id: str
     ) -> bool:
@@ -253,14 +286,17 @@ class PantryService:
             {"item_name": db_item.name, "quantity": float(db_item.quantity)}
         )
         
-        db.delete(db_item)
-        db.commit()
+        old_stats = item_stat_fields(db_item)
+        await db.delete(db_item)
+        async with pantry_stats_cache.write(user_id) as stats:
+            await db.commit()
+            stats.apply(before=[old_stats])
         
         return True
     
     async def consume_pantry_item(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         item_id: str, 
         consume_data: PantryItemConsume, 
         user_id: str
@@ -277,14 +313,17 @@ class PantryService:
             )
         
         old_quantity = db_item.quantity
+        old_stats = item_stat_fields(db_item)
         db_item.quantity -= consume_data.quantity_used
         
         # If quantity reaches zero or below, optionally delete the item
         if db_item.quantity <= 0:
             db_item.quantity = Decimal('0')
         
-        db.commit()
-        db.refresh(db_item)
+        async with pantry_stats_cache.write(user_id) as stats:
+            await db.commit()
+            await db.refresh(db_item)
+            stats.apply(before=[old_stats], after=[item_stat_fields(db_item)])
         
         # Log consumption activity
         await self._log_activity(
@@ -302,199 +341,280 @@ class PantryService:
     
     async def bulk_update_pantry_items(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         bulk_data: PantryItemBulkUpdate, 
         user_id: str
-    ) -> List[PantryItem]:
-        """Bulk update multiple pantry items"""
-        updated_items = []
-        
-        for item_id in bulk_data.item_ids:
-            db_item = await self.get_pantry_item_by_id(db, item_id, user_id)
-            if db_item:
-                # Apply updates
-                update_data = bulk_data.updates.dict(exclude_unset=True)
-                for field, value in update_data.items():
-                    if value is not None:
-                        setattr(db_item, field, value)
-                
-                updated_items.append(db_item)
-        
-        if updated_items:
-            db.commit()
-            for item in updated_items:
-                db.refresh(item)
+    ) -> Dict[str, Any]:
+        """
+        Apply the same updates to many pantry items in one statement
+        
+        A single ownership-checked UPDATE ... RETURNING changes every item the
+        user owns and reports each item's previous values (for the stats
+        cache). Ids that don't exist or belong to someone else are returned in
+        not_found.
+        """
+        update_data = {
+            field: value for field, value in bulk_data.updates.dict(exclude_unset=True).items()
+            if value is not None
+        }
+        
+        # Keep request order, drop duplicates and ids that can't be UUIDs
+        item_ids, not_found = [], []
+        for item_id in dict.fromkeys(bulk_data.item_ids):
+            try:
+                item_ids.append(uuid.UUID(item_id))
+            except ValueError:
+                not_found.append(item_id)
+        
+        if "barcode" in update_data and len(item_ids) > 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Barcode can only be set on one item at a time"
+            )
+        
+        if update_data.get("category_id"):
+            result = await db.execute(
+                select(ItemCategory).where(ItemCategory.id == update_data["category_id"])
+            )
+            if not result.scalars().first():
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Category not found"
+                )
+        
+        if not item_ids or not update_data:
+            # Nothing to change: report which ids the user owns without writing
+            result = await db.execute(
+                select(PantryItem).where(
+                    PantryItem.id == any_(self._uuid_array(item_ids)),
+                    PantryItem.user_id == user_id
+                )
+            )
+            items = result.scalars().all()
+        else:
+            # Lock and read the current values, then update the same rows
+            previous = select(
+                PantryItem.id,
+                PantryItem.quantity,
+                PantryItem.low_stock_threshold,
+                PantryItem.category_id,
+                PantryItem.location,
+                PantryItem.expiration_date
+            ).where(
+                PantryItem.id == any_(self._uuid_array(item_ids)),
+                PantryItem.user_id == user_id
+            ).with_for_update().subquery("previous")
             
-            # Log bulk update activity
-            await self._log_activity(
-                db, user_id, "pantry_item", "bulk", "bulk_updated",
-                {"items_count": len(updated_items), "updates": bulk_data.updates.dict(exclude_unset=True)}
+            result = await db.execute(
+                update(PantryItem)
+                .where(PantryItem.id == previous.c.id)
+                .values(**update_data)
+                .returning(
+                    PantryItem,
+                    previous.c.quantity,
+                    previous.c.low_stock_threshold,
+                    previous.c.category_id,
+                    previous.c.location,
+                    previous.c.expiration_date
+                ),
+                execution_options={"synchronize_session": False}
             )
+            rows = result.all()
+            items = [row[0] for row in rows]
+            async with pantry_stats_cache.write(user_id) as stats:
+                await db.commit()
+                stats.apply(
+                    before=[item_stat_fields(SimpleNamespace(**row._mapping)) for row in rows],
+                    after=[item_stat_fields(item) for item in items]
+                )
+            
+            if items:
+                await self._log_activity(
+                    db, user_id, "pantry_item", None, "bulk_updated",
+                    {
+                        "items_count": len(items),
+                        "item_ids": [str(item.id) for item in items],
+                        "updates": bulk_data.updates.dict(exclude_unset=True)
+                    }
+                )
         
-        return updated_items
+        # One query for every category the updated items reference
+        category_ids = {item.category_id for item in items if item.category_id}
+        categories = {}
+        if category_ids:
+            result = await db.execute(select(ItemCategory).where(ItemCategory.id.in_(category_ids)))
+            categories = {category.id: category for category in result.scalars().all()}
+        for item in items:
+            set_committed_value(item, "category", categories.get(item.category_id))
+        
+        found = {str(item.id) for item in items}
+        items_by_id = {str(item.id): item for item in items}
+        return {
+            "updated": [items_by_id[str(item_id)] for item_id in item_ids if str(item_id) in found],
+            "not_found": not_found + [str(item_id) for item_id in item_ids if str(item_id) not in found]
+        }
+    
+    def _uuid_array(self, ids: List[uuid.UUID]):
+        """Bind a list of ids as one uuid[] parameter (for = ANY(...))"""
+        return bindparam("ids", ids, type_=ARRAY(UUID(as_uuid=True)))
     
     async def get_pantry_stats(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_id: str
     ) -> PantryStatsResponse:
-        """Get pantry statistics for the user"""
-        # Total items
-        total_items = db.query(PantryItem).filter(PantryItem.user_id == user_id).count()
-        
-        # Items expiring within 3 days
-        three_days_from_now = date.today() + timedelta(days=3)
-        expiring_soon = db.query(PantryItem).filter(
-            and_(
-                PantryItem.user_id == user_id,
-                PantryItem.expiration_date.isnot(None),
-                PantryItem.expiration_date <= three_days_from_now,
-                PantryItem.expiration_date >= date.today()
-            )
-        ).count()
-        
-        # Expired items
-        expired_items = db.query(PantryItem).filter(
-            and_(
-                PantryItem.user_id == user_id,
-                PantryItem.expiration_date.isnot(None),
-                PantryItem.expiration_date < date.today()
-            )
-        ).count()
-        
-        # Low stock items
-        low_stock_items = db.query(PantryItem).filter(
-            and_(
-                PantryItem.user_id == user_id,
-                PantryItem.quantity <= PantryItem.low_stock_threshold
-            )
-        ).count()
-        
-        # Categories count
-        categories_count = db.query(PantryItem.category_id).filter(
-            and_(
-                PantryItem.user_id == user_id,
-                PantryItem.category_id.isnot(None)
-            )
-        ).distinct().count()
-        
-        # Locations count
-        locations_count = db.query(PantryItem.location).filter(
-            and_(
-                PantryItem.user_id == user_id,
-                PantryItem.location.isnot(None)
+        """Get pantry statistics for the user (from the stats cache when warm)"""
+        counters = await pantry_stats_cache.get(user_id)
+        if counters is not None:
+            return stats_from_counters(counters)
+        
+        if not pantry_stats_cache.available:
+            return await self._pantry_stats_from_db(db, user_id)
+        
+        # Read before the query, so a write committing meanwhile keeps the result out of the cache
+        generation = await pantry_stats_cache.fill_generation(user_id)
+        counters = await self._pantry_stat_counters_from_db(db, user_id)
+        if generation is not None:
+            await pantry_stats_cache.fill(user_id, counters, generation)
+        return stats_from_counters(counters)
+    
+    async def _pantry_stats_from_db(self, db: AsyncSession, user_id: str) -> PantryStatsResponse:
+        """All stats in one pass over the user's items"""
+        today = date.today()
+        expiring_by = today + timedelta(days=EXPIRING_SOON_DAYS)
+        
+        result = await db.execute(
+            select(
+                func.count().label("total_items"),
+                func.count().filter(
+                    and_(PantryItem.expiration_date >= today, PantryItem.expiration_date <= expiring_by)
+                ).label("expiring_soon"),
+                func.count().filter(PantryItem.expiration_date < today).label("expired_items"),
+                func.count().filter(PantryItem.quantity <= PantryItem.low_stock_threshold).label("low_stock_items"),
+                func.count(func.distinct(PantryItem.category_id)).label("categories_count"),
+                func.count(func.distinct(PantryItem.location)).label("locations_count")
+            ).where(PantryItem.user_id == user_id)
+        )
+        return PantryStatsResponse(**result.one()._mapping)
+    
+    async def _pantry_stat_counters_from_db(self, db: AsyncSession, user_id: str) -> Dict[str, int]:
+        """Stats cache counters (see item_stat_fields) in one grouped pass over the user's items"""
+        # Bit set in GROUPING(...) for each column a row is NOT grouped by
+        grouping = func.grouping(PantryItem.category_id, PantryItem.location, PantryItem.expiration_date)
+        result = await db.execute(
+            select(
+                grouping.label("grouping"),
+                PantryItem.category_id,
+                PantryItem.location,
+                PantryItem.expiration_date,
+                func.count().label("items"),
+                func.count().filter(PantryItem.quantity <= PantryItem.low_stock_threshold).label("low_stock")
+            ).where(
+                PantryItem.user_id == user_id
+            ).group_by(
+                func.grouping_sets(tuple_(), PantryItem.category_id, PantryItem.location, PantryItem.expiration_date)
             )
-        ).distinct().count()
-        
-        return PantryStatsResponse(
-            total_items=total_items,
-            expiring_soon=expiring_soon,
-            expired_items=expired_items,
-            low_stock_items=low_stock_items,
-            categories_count=categories_count,
-            locations_count=locations_count
         )
+        
+        counters = {"total": 0, "low_stock": 0}
+        for row in result:
+            if row.grouping == 0b111:
+                counters["total"] = row.items
+                counters["low_stock"] = row.low_stock
+            elif row.grouping == 0b011 and row.category_id is not None:
+                counters[f"cat:{row.category_id}"] = row.items
+            elif row.grouping == 0b101 and row.location is not None:
+                counters[f"loc:{row.location}"] = row.items
+            elif row.grouping == 0b110 and row.expiration_date is not None:
+                counters[f"exp:{row.expiration_date.isoformat()}"] = row.items
+        return counters
     
     async def get_pantry_locations(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_id: str
     ) -> List[str]:
         """Get all unique locations used by the user"""
-        locations = db.query(PantryItem.location).filter(
-            and_(
-                PantryItem.user_id == user_id,
-                PantryItem.location.isnot(None)
-            )
-        ).distinct().all()
+        result = await db.execute(
+            select(PantryItem.location).where(
+                and_(
+                    PantryItem.user_id == user_id,
+                    PantryItem.location.isnot(None)
+                )
+            ).distinct()
+        )
         
-        return [location[0] for location in locations if location[0]]
+        return [location for location in result.scalars().all() if location]
     
     async def search_by_barcode(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         barcode: str, 
         user_id: str
     ) -> Optional[PantryItem]:
         """Search for pantry item by barcode"""
-        return db.query(PantryItem).options(
-            joinedload(PantryItem.category)
-        ).filter(
-            and_(
-                PantryItem.user_id == user_id,
-                PantryItem.barcode == barcode
+        result = await db.execute(
+            select(PantryItem).options(
+                joinedload(PantryItem.category)
+            ).where(
+                and_(
+                    PantryItem.user_id == user_id,
+                    PantryItem.barcode == barcode
+                )
             )
-        ).first()
+        )
+        return result.scalars().first()
     
     async def get_expiring_items(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_id: str,
         days_ahead: int = 7
     ) -> List[PantryItem]:
         """Get items expiring within specified days"""
         target_date = date.today() + timedelta(days=days_ahead)
         
-        return db.query(PantryItem).options(
-            joinedload(PantryItem.category)
-        ).filter(
-            and_(
-                PantryItem.user_id == user_id,
-                PantryItem.expiration_date.isnot(None),
-                PantryItem.expiration_date <= target_date,
-                PantryItem.expiration_date >= date.today()
-            )
-        ).order_by(asc(PantryItem.expiration_date)).all()
+        result = await db.execute(
+            select(PantryItem).options(
+                joinedload(PantryItem.category)
+            ).where(
+                and_(
+                    PantryItem.user_id == user_id,
+                    PantryItem.expiration_date.isnot(None),
+                    PantryItem.expiration_date <= target_date,
+                    PantryItem.expiration_date >= date.today()
+                )
+            ).order_by(asc(PantryItem.expiration_date))
+        )
+        return result.scalars().all()
     
     async def get_low_stock_items(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_id: str
     ) -> List[PantryItem]:
         """Get items with low stock"""
-        return db.query(PantryItem).options(
-            joinedload(PantryItem.category)
-        ).filter(
-            and_(
-                PantryItem.user_id == user_id,
-                PantryItem.quantity <= PantryItem.low_stock_threshold
-            )
-        ).order_by(asc(PantryItem.quantity)).all()
+        result = await db.execute(
+            select(PantryItem).options(
+                joinedload(PantryItem.category)
+            ).where(
+                and_(
+                    PantryItem.user_id == user_id,
+                    PantryItem.quantity <= PantryItem.low_stock_threshold
+                )
+            ).order_by(asc(PantryItem.quantity))
+        )
+        return result.scalars().all()
     
     # Private helper methods
     async def _log_activity(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_id: str, 
         entity_type: str, 
         entity_id: str, 
         action: str, 
         metadata: dict
     ):
-        """Log user activity"""
-        # Convert any non-serializable values
-        serializable_metadata = {}
-        for key, value in metadata.items():
-            if hasattr(value, '__float__'):  # Decimal, etc.
-                serializable_metadata[key] = float(value)
-            elif isinstance(value, dict):
-                # Handle nested dictionaries
-                nested_dict = {}
-                for nested_key, nested_value in value.items():
-                    if hasattr(nested_value, '__float__'):
-                        nested_dict[nested_key] = float(nested_value)
-                    else:
-                        nested_dict[nested_key] = nested_value
-                serializable_metadata[key] = nested_dict
-            else:
-                serializable_metadata[key] = value
-        
-        activity = ActivityLog(
-            user_id=user_id,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            action=action,
-            meta_data=serializable_metadata
-        )
-        db.add(activity)
-        db.commit()
+        """Queue user activity for the batched activity log writer (no extra commit)"""
+        activity_writer.record(user_id, entity_type, entity_id, action, metadata)
@@ -0,0 +1,57 @@
+"""
+Product Service - Barcode Product Catalog
+"""
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.product_catalog import CatalogProduct, normalize_gtin, product_cache
+from app.models.category import ItemCategory
+from app.models.product import Product
+
+
+class ProductService:
+    """Service class for product catalog lookups"""
+    
+    def _query(self):
+        return select(
+            Product.gtin,
+            Product.name,
+            Product.brand,
+            Product.category_id,
+            ItemCategory.name.label("category_name"),
+            Product.default_unit,
+            Product.image_url
+        ).outerjoin(ItemCategory, Product.category_id == ItemCategory.id)
+    
+    async def lookup_barcode(self, db: AsyncSession, barcode: str) -> Optional[CatalogProduct]:
+        """Resolve a scanned barcode to a catalog product (cached in-process)"""
+        gtin = normalize_gtin(barcode)
+        if gtin is None:
+            return None
+        
+        cached, product = product_cache.get(gtin)
+        if cached:
+            return product
+        
+        result = await db.execute(self._query().where(Product.gtin == gtin))
+        row = result.first()
+        product = CatalogProduct(**row._mapping) if row else None
+        product_cache.set(gtin, product)
+        return product
+    
+    async def search_by_prefix(
+        self,
+        db: AsyncSession,
+        prefix: str,
+        limit: int = 20
+    ) -> List[CatalogProduct]:
+        """Catalog products whose GTIN-13 starts with the given digits"""
+        result = await db.execute(
+            self._query()
+            .where(Product.gtin.startswith(prefix, autoescape=True))
+            .order_by(Product.gtin)
+            .limit(limit)
+        )
+        return [CatalogProduct(**row._mapping) for row in result.all()]
@@ -1,86 +1,261 @@
 """
 Shopping List Service - Business Logic Layer
 """
-from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
 from uuid import UUID
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy import select, insert, update, delete, values, column, case, and_, or_, func, union
 from fastapi import HTTPException, status
 
-from app.models.shopping_list import ShoppingList, ShoppingItem, ListCollaborator
+from app.core.activity_timeline import activity_timeline
+from app.core.config import settings
+from app.core.list_permissions import (
+    ListPermission, ROLE_PERMISSIONS, list_permission_cache, permission_mask
+)
+from app.core.pagination import CursorPage, Keyset
+from app.db.list_counters import counter_delta, item_counter_fields
+from app.models.shopping_list import ShoppingList, ShoppingItem, ListCollaborator, SyncTombstone
 from app.models.user import User
 from app.models.category import ItemCategory
-from app.models.activity import ActivityLog
+from app.core.activity_writer import activity_writer
 from app.schemas.shopping_list import (
     ShoppingListCreate, ShoppingListUpdate, ShoppingItemCreate, 
-    ShoppingItemUpdate, ListCollaboratorCreate
+    ShoppingItemUpdate, ListCollaboratorCreate, ShoppingItemBatchOperation
+)
+
+
+# Rows written by transactions that started before a sync but committed after it
+# carry an older updated_at, so every sync re-reads this much history
+SYNC_CURSOR_OVERLAP = timedelta(seconds=5)
+
+# Columns of a list summary: the list header and its denormalized counters
+LIST_SUMMARY_COLUMNS = (
+    ShoppingList.id,
+    ShoppingList.name,
+    ShoppingList.owner_id,
+    ShoppingList.status,
+    ShoppingList.budget_amount,
+    ShoppingList.budget_currency,
+    ShoppingList.item_count,
+    ShoppingList.completed_count,
+    ShoppingList.estimated_total,
+    ShoppingList.actual_total,
+    ShoppingList.created_at,
+    ShoppingList.updated_at,
+)
+
+# Loading strategy for full list payloads. Lists are fetched on their own (so
+# LIMIT/OFFSET applies to lists, not joined rows) and each collection is then
+# batched with one "WHERE list_id IN (...)" query. Many-to-one references are
+# joined into those batch queries since they cannot multiply rows.
+LIST_DETAIL_LOADERS = (
+    joinedload(ShoppingList.owner),
+    selectinload(ShoppingList.items).joinedload(ShoppingItem.category),
+    selectinload(ShoppingList.items).joinedload(ShoppingItem.assigned_user),
+    selectinload(ShoppingList.collaborators).joinedload(ListCollaborator.user),
 )
 
 
+def accessible_list_ids(user_id: str):
+    """Subquery of list IDs the user owns or collaborates on"""
+    # A UNION lets each side use its own index; "owner_id = x OR EXISTS (...)"
+    # can only be answered by scanning every list
+    return union(
+        select(ShoppingList.id).where(ShoppingList.owner_id == user_id),
+        select(ListCollaborator.list_id).where(ListCollaborator.user_id == user_id)
+    )
+
+
 class ShoppingListService:
     """Service class for shopping list operations"""
     
     async def get_user_lists(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_id: str, 
         status: Optional[str] = None,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[ShoppingList]:
-        """Get all shopping lists for a user (owned + collaborated)"""
-        query = db.query(ShoppingList).options(
-            joinedload(ShoppingList.items).joinedload(ShoppingItem.category),
-            joinedload(ShoppingList.items).joinedload(ShoppingItem.assigned_user),
-            joinedload(ShoppingList.collaborators).joinedload(ListCollaborator.user),
-            joinedload(ShoppingList.owner)
-        ).filter(
-            or_(
-                ShoppingList.owner_id == user_id,
-                ShoppingList.collaborators.any(ListCollaborator.user_id == user_id)
-            )
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> CursorPage:
+        """Get all shopping lists for a user (owned + collaborated), newest first"""
+        query = select(ShoppingList).options(*LIST_DETAIL_LOADERS).where(
+            ShoppingList.id.in_(accessible_list_ids(user_id))
+        )
+        
+        if status:
+            query = query.where(ShoppingList.status == status)
+        
+        keyset = Keyset(ShoppingList.created_at, ShoppingList.id, descending=True)
+        query = keyset.apply(query, cursor)
+        if not cursor:
+            query = query.offset(skip)
+        
+        result = await db.execute(query.limit(limit))
+        return keyset.page(result.scalars().all(), limit)
+    
+    async def get_user_list_summaries(
+        self, 
+        db: AsyncSession, 
+        user_id: str, 
+        status: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> CursorPage:
+        """Get the user's lists with item counters only, newest first (no items or collaborators are loaded)"""
+        query = select(*LIST_SUMMARY_COLUMNS).where(
+            ShoppingList.id.in_(accessible_list_ids(user_id))
         )
         
         if status:
-            query = query.filter(ShoppingList.status == status)
+            query = query.where(ShoppingList.status == status)
         
-        return query.offset(skip).limit(limit).all()
+        keyset = Keyset(ShoppingList.created_at, ShoppingList.id, descending=True)
+        result = await db.execute(keyset.apply(query, cursor).limit(limit))
+        return keyset.page(result.all(), limit)
+    
+    async def sync_user_lists(
+        self, 
+        db: AsyncSession, 
+        user_id: str, 
+        since: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Get lists, items and collaborators changed since a cursor, plus deletions"""
+        now = await db.scalar(select(func.now()))
+        if since is not None and since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        
+        accessible_ids = accessible_list_ids(user_id)
+        accessible = ShoppingList.id.in_(accessible_ids)
+        
+        # Tombstones older than the retention window are purged, so stale clients start over
+        retention_start = now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        full_sync = since is None or since < retention_start
+        
+        if full_sync:
+            lists_result = await db.execute(select(ShoppingList).where(accessible))
+            items_result = await db.execute(
+                select(ShoppingItem).where(ShoppingItem.list_id.in_(accessible_ids))
+            )
+            collaborators_result = await db.execute(
+                select(ListCollaborator).options(selectinload(ListCollaborator.user))
+                .where(ListCollaborator.list_id.in_(accessible_ids))
+            )
+            return {
+                "lists": lists_result.scalars().all(),
+                "items": items_result.scalars().all(),
+                "collaborators": collaborators_result.scalars().all(),
+                "deleted": [],
+                "full_sync": True,
+                "next_cursor": now.isoformat()
+            }
+        
+        cutoff = since - SYNC_CURSOR_OVERLAP
+        
+        # Lists shared with the user since the cursor are sent in full
+        new_access_ids = select(ListCollaborator.list_id).where(
+            and_(ListCollaborator.user_id == user_id, ListCollaborator.invited_at > cutoff)
+        )
+        
+        lists_result = await db.execute(
+            select(ShoppingList).where(
+                and_(
+                    accessible,
+                    or_(ShoppingList.updated_at > cutoff, ShoppingList.id.in_(new_access_ids))
+                )
+            )
+        )
+        items_result = await db.execute(
+            select(ShoppingItem).where(
+                and_(
+                    ShoppingItem.list_id.in_(accessible_ids),
+                    or_(ShoppingItem.updated_at > cutoff, ShoppingItem.list_id.in_(new_access_ids))
+                )
+            )
+        )
+        collaborators_result = await db.execute(
+            select(ListCollaborator).options(selectinload(ListCollaborator.user)).where(
+                and_(
+                    ListCollaborator.list_id.in_(accessible_ids),
+                    or_(
+                        ListCollaborator.invited_at > cutoff,
+                        ListCollaborator.accepted_at > cutoff,
+                        ListCollaborator.list_id.in_(new_access_ids)
+                    )
+                )
+            )
+        )
+        tombstones_result = await db.execute(
+            select(SyncTombstone).where(
+                and_(SyncTombstone.user_id == user_id, SyncTombstone.deleted_at > cutoff)
+            ).order_by(SyncTombstone.deleted_at)
+        )
+        
+        return {
+            "lists": lists_result.scalars().all(),
+            "items": items_result.scalars().all(),
+            "collaborators": collaborators_result.scalars().all(),
+            "deleted": tombstones_result.scalars().all(),
+            "full_sync": False,
+            "next_cursor": now.isoformat()
+        }
     
     async def get_list_by_id(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         list_id: str, 
         user_id: str
     ) -> Optional[ShoppingList]:
         """Get a specific shopping list by ID"""
-        shopping_list = db.query(ShoppingList).options(
-            joinedload(ShoppingList.items).joinedload(ShoppingItem.category),
-            joinedload(ShoppingList.items).joinedload(ShoppingItem.assigned_user),
-            joinedload(ShoppingList.collaborators).joinedload(ListCollaborator.user),
-            joinedload(ShoppingList.owner)
-        ).filter(ShoppingList.id == list_id).first()
-        
-        if not shopping_list:
+        if await self._authorize(db, list_id, user_id) is None:
+            return None
+        return await self._load_list(db, list_id)
+    
+    async def get_list_permissions(
+        self, 
+        db: AsyncSession, 
+        list_id: str, 
+        user_id: str
+    ) -> Optional[ListPermission]:
+        """The user's permission mask on a list (empty without access), or None if the list doesn't exist"""
+        try:
+            list_id = str(UUID(str(list_id)))
+        except ValueError:
             return None
         
-        # Check if user has access to this list
-        if not await self._user_has_access(shopping_list, user_id):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have access to this shopping list"
+        permissions = await list_permission_cache.get(list_id, user_id)
+        if permissions is not None:
+            return permissions
+        
+        # One row from the primary key and the (list_id, user_id) index; no list graph
+        result = await db.execute(
+            select(ShoppingList.owner_id, ListCollaborator.role, ListCollaborator.permissions)
+            .outerjoin(
+                ListCollaborator,
+                and_(ListCollaborator.list_id == ShoppingList.id, ListCollaborator.user_id == user_id)
             )
+            .where(ShoppingList.id == list_id)
+        )
+        row = result.first()
+        if row is None:
+            return None
         
-        return shopping_list
+        permissions = permission_mask(str(row.owner_id) == str(user_id), row.role, row.permissions)
+        await list_permission_cache.set(list_id, user_id, permissions)
+        return permissions
     
     async def create_list(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         list_data: ShoppingListCreate, 
         owner_id: str
     ) -> ShoppingList:
         """Create a new shopping list"""
         # Verify owner exists
-        owner = db.query(User).filter(User.id == owner_id).first()
+        result = await db.execute(select(User).where(User.id == owner_id))
+        owner = result.scalars().first()
         if not owner:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -95,12 +270,15 @@ class ShoppingListService:
             budget_amount=list_data.budget_amount,
             budget_currency=list_data.budget_currency,
             meta_data=list_data.meta_data or {},
-            status="active"
+            status="active",
+            owner=owner,
+            items=[],
+            collaborators=[]
         )
         
         db.add(db_list)
-        db.commit()
-        db.refresh(db_list)
+        await db.commit()
+        await db.refresh(db_list, ["created_at", "updated_at"])
         
         # Log activity
         await self._log_activity(
@@ -115,30 +293,26 @@ class ShoppingListService:
     
     async def update_list(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         list_id: str, 
         list_data: ShoppingListUpdate, 
         user_id: str
     ) -> Optional[ShoppingList]:
         """Update a shopping list"""
-        db_list = await self.get_list_by_id(db, list_id, user_id)
+        permissions = await self._authorize(
+            db, list_id, user_id, ListPermission.EDIT_LIST, "You don't have permission to edit this list"
+        )
+        db_list = await self._load_list(db, list_id) if permissions is not None else None
         if not db_list:
             return None
         
-        # Check if user can edit this list
-        if not await self._user_can_edit_list(db_list, user_id):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have permission to edit this list"
-            )
-        
         # Update fields
         update_data = list_data.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_list, field, value)
         
-        db.commit()
-        db.refresh(db_list)
+        await db.commit()
+        await db.refresh(db_list)
         
         # Log activity
         # Convert Decimal values to float for JSON serialization
@@ -161,22 +335,18 @@ class ShoppingListService:
     
     async def delete_list(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         list_id: str, 
         user_id: str
     ) -> bool:
         """Delete a shopping list (only owner can delete)"""
-        db_list = await self.get_list_by_id(db, list_id, user_id)
+        permissions = await self._authorize(
+            db, list_id, user_id, ListPermission.OWNER, "Only the list owner can delete the list"
+        )
+        db_list = await self._load_list(db, list_id) if permissions is not None else None
         if not db_list:
             return False
         
-        # Only owner can delete
-        if db_list.owner_id != user_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Only the list owner can delete the list"
-            )
-        
         # Log activity before deletion
         await self._log_activity(
             db, user_id, "shopping_list", list_id, "deleted",
@@ -186,38 +356,39 @@ class ShoppingListService:
         # Send real-time notification for list deletion
         await self._notify_list_update(db_list, "deleted")
         
-        db.delete(db_list)
-        db.commit()
+        member_ids = self._list_member_ids(db_list)
+        self._add_tombstones(db, "list", db_list.id, db_list.id, member_ids)
+        await db.delete(db_list)
+        await db.commit()
+        await list_permission_cache.invalidate(list_id, member_ids)
+        # Friends' feeds only show list activity to members; rebuild those that changed
+        await activity_timeline.invalidate(*member_ids)
         
         return True
     
     async def add_item(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         list_id: str, 
         item_data: ShoppingItemCreate, 
         user_id: str
     ) -> ShoppingItem:
         """Add an item to a shopping list"""
-        db_list = await self.get_list_by_id(db, list_id, user_id)
-        if not db_list:
+        permissions = await self._authorize(
+            db, list_id, user_id, ListPermission.ADD_ITEMS, "You don't have permission to add items to this list"
+        )
+        if permissions is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Shopping list not found"
             )
         
-        # Check if user can add items
-        if not await self._user_can_add_items(db_list, user_id):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have permission to add items to this list"
-            )
-        
         # Validate category if provided
         if item_data.category_id:
-            category = db.query(ItemCategory).filter(
-                ItemCategory.id == item_data.category_id
-            ).first()
+            result = await db.execute(
+                select(ItemCategory).where(ItemCategory.id == item_data.category_id)
+            )
+            category = result.scalars().first()
             if not category:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -226,7 +397,7 @@ class ShoppingListService:
         
         # Validate assigned user if provided
         if item_data.assigned_to:
-            if not await self._user_has_access(db_list, item_data.assigned_to):
+            if not await self._user_has_access(db, list_id, item_data.assigned_to):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Cannot assign item to user who doesn't have access to this list"
@@ -248,8 +419,9 @@ class ShoppingListService:
         )
         
         db.add(db_item)
-        db.commit()
-        db.refresh(db_item)
+        await self._apply_list_counters(db, list_id, after=[item_counter_fields(db_item)])
+        await db.commit()
+        await db.refresh(db_item)
         
         # Log activity
         await self._log_activity(
@@ -264,23 +436,28 @@ class ShoppingListService:
     
     async def update_item(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         list_id: str, 
         item_id: str, 
         item_data: ShoppingItemUpdate, 
         user_id: str
     ) -> Optional[ShoppingItem]:
         """Update a shopping list item"""
-        db_list = await self.get_list_by_id(db, list_id, user_id)
-        if not db_list:
+        permissions = await self._authorize(
+            db, list_id, user_id, ListPermission.EDIT_ITEMS, "You don't have permission to edit items in this list"
+        )
+        if permissions is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Shopping list not found"
             )
         
-        db_item = db.query(ShoppingItem).filter(
-            and_(ShoppingItem.id == item_id, ShoppingItem.list_id == list_id)
-        ).first()
+        result = await db.execute(
+            select(ShoppingItem).where(
+                and_(ShoppingItem.id == item_id, ShoppingItem.list_id == list_id)
+            )
+        )
+        db_item = result.scalars().first()
         
         if not db_item:
             raise HTTPException(
@@ -288,13 +465,6 @@ class ShoppingListService:
                 detail="Item not found"
             )
         
-        # Check permissions
-        if not await self._user_can_edit_items(db_list, user_id):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have permission to edit items in this list"
-            )
-        
         # Update fields
         update_data = item_data.dict(exclude_unset=True)
         
@@ -306,11 +476,13 @@ class ShoppingListService:
             elif not update_data["completed"] and db_item.completed:
                 update_data["completed_at"] = None
         
+        counters_before = item_counter_fields(db_item)
         for field, value in update_data.items():
             setattr(db_item, field, value)
+        await self._apply_list_counters(db, list_id, [counters_before], [item_counter_fields(db_item)])
         
-        db.commit()
-        db.refresh(db_item)
+        await db.commit()
+        await db.refresh(db_item)
         
         # Log activity
         action = "completed" if update_data.get("completed") else "updated"
@@ -339,30 +511,28 @@ class ShoppingListService:
     
     async def delete_item(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         list_id: str, 
         item_id: str, 
         user_id: str
     ) -> bool:
         """Delete a shopping list item"""
-        db_list = await self.get_list_by_id(db, list_id, user_id)
-        if not db_list:
+        permissions = await self._authorize(
+            db, list_id, user_id, ListPermission.DELETE_ITEMS, "You don't have permission to delete items from this list"
+        )
+        if permissions is None:
             return False
         
-        db_item = db.query(ShoppingItem).filter(
-            and_(ShoppingItem.id == item_id, ShoppingItem.list_id == list_id)
-        ).first()
+        result = await db.execute(
+            select(ShoppingItem).where(
+                and_(ShoppingItem.id == item_id, ShoppingItem.list_id == list_id)
+            )
+        )
+        db_item = result.scalars().first()
         
         if not db_item:
             return False
         
-        # Check permissions
-        if not await self._user_can_delete_items(db_list, user_id):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have permission to delete items from this list"
-            )
-        
         # Log activity before deletion
         await self._log_activity(
             db, user_id, "shopping_item", item_id, "deleted",
@@ -372,37 +542,261 @@ class ShoppingListService:
         # Send real-time notification for item deletion
         await self._notify_item_update(db_item, "deleted")
         
-        db.delete(db_item)
-        db.commit()
+        self._add_tombstones(db, "item", db_item.id, db_item.list_id, await self._load_member_ids(db, list_id))
+        await self._apply_list_counters(db, list_id, before=[item_counter_fields(db_item)])
+        await db.delete(db_item)
+        await db.commit()
         
         return True
     
+    async def apply_item_batch(
+        self, 
+        db: AsyncSession, 
+        list_id: str, 
+        operations: List[ShoppingItemBatchOperation], 
+        user_id: str
+    ) -> Dict[str, Any]:
+        """
+        Apply add/update/delete/complete operations to a list's items in one transaction
+        
+        Access and permissions are checked once for the whole batch, deletes,
+        updates and adds each run as a single statement, and the list's
+        counters are adjusted once. The batch is logged as one activity entry
+        and collaborators get one coalesced items_batch_update event. Any
+        invalid operation rejects the whole batch.
+        """
+        if len(operations) > settings.SHOPPING_ITEM_BATCH_MAX_OPERATIONS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Batches are limited to {settings.SHOPPING_ITEM_BATCH_MAX_OPERATIONS} operations"
+            )
+        
+        permissions = await self._authorize(db, list_id, user_id)
+        if permissions is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Shopping list not found"
+            )
+        
+        kinds = {operation.op for operation in operations}
+        if "add" in kinds and not permissions & ListPermission.ADD_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You don't have permission to add items to this list"
+            )
+        if kinds & {"update", "complete"} and not permissions & ListPermission.EDIT_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You don't have permission to edit items in this list"
+            )
+        if "delete" in kinds and not permissions & ListPermission.DELETE_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You don't have permission to delete items from this list"
+            )
+        
+        new_items = [operation.item for operation in operations if operation.op == "add"]
+        changes: Dict[UUID, Dict[str, Any]] = {}
+        deleted_ids: List[UUID] = []
+        for operation in operations:
+            if operation.op == "add":
+                continue
+            try:
+                item_id = UUID(operation.item_id)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Item not found: {operation.item_id}"
+                )
+            if item_id in changes or item_id in deleted_ids:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Item {operation.item_id} appears in more than one operation"
+                )
+            if operation.op == "delete":
+                deleted_ids.append(item_id)
+            elif operation.op == "complete":
+                changes[item_id] = {"completed": operation.completed}
+            else:
+                # null can't clear a required field; treat it as not given
+                changes[item_id] = {
+                    field: value for field, value in operation.changes.dict(exclude_unset=True).items()
+                    if value is not None or ShoppingItem.__table__.c[field].nullable
+                }
+        
+        await self._check_item_references(db, list_id, new_items, list(changes.values()))
+        
+        # Current values as plain rows, so the items RETURNING produces are fresh ORM objects
+        existing: Dict[UUID, Any] = {}
+        referenced = list(changes) + deleted_ids
+        if referenced:
+            result = await db.execute(
+                select(*ShoppingItem.__table__.c)
+                .where(ShoppingItem.list_id == list_id, ShoppingItem.id.in_(referenced))
+                .with_for_update()
+            )
+            existing = {row.id: row for row in result}
+            missing = [item_id for item_id in referenced if item_id not in existing]
+            if missing:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Item not found: {missing[0]}"
+                )
+        counters_before = [item_counter_fields(existing[item_id]) for item_id in referenced]
+        deleted_events = [self._item_event_data(existing[item_id], "deleted") for item_id in deleted_ids]
+        
+        if deleted_ids:
+            await db.execute(
+                delete(ShoppingItem).where(ShoppingItem.id.in_(deleted_ids)),
+                execution_options={"synchronize_session": False}
+            )
+            member_ids = await self._load_member_ids(db, list_id)
+            await db.execute(insert(SyncTombstone), [
+                {"user_id": member_id, "entity_type": "item", "entity_id": item_id, "list_id": list_id}
+                for item_id in deleted_ids
+                for member_id in member_ids
+            ])
+        
+        updated = await self._update_items(db, changes, existing)
+        
+        added: List[ShoppingItem] = []
+        if new_items:
+            result = await db.execute(
+                insert(ShoppingItem).returning(ShoppingItem, sort_by_parameter_order=True),
+                [dict(item.dict(), list_id=list_id, completed=False) for item in new_items]
+            )
+            added = list(result.scalars().all())
+        
+        await self._apply_list_counters(
+            db, list_id, counters_before, [item_counter_fields(item) for item in added + updated]
+        )
+        await db.commit()
+        
+        await self._log_activity(
+            db, user_id, "shopping_list", list_id, "items_batch_updated",
+            {"added": len(added), "updated": len(updated), "deleted": len(deleted_ids)}
+        )
+        
+        events = [self._item_event_data(item, "created") for item in added]
+        events.extend(
+            self._item_event_data(item, "completed" if changes[item.id].get("completed") else "updated")
+            for item in updated
+        )
+        events.extend(deleted_events)
+        await self._notify_items_update(list_id, events)
+        
+        return {
+            "added": added,
+            "updated": updated,
+            "deleted": [str(item_id) for item_id in deleted_ids]
+        }
+    
+    async def _check_item_references(
+        self,
+        db: AsyncSession,
+        list_id: str,
+        new_items: List[ShoppingItemCreate],
+        changes: List[Dict[str, Any]]
+    ):
+        """Validate the categories and assignees a batch refers to"""
+        category_ids = {item.category_id for item in new_items if item.category_id}
+        category_ids.update(change["category_id"] for change in changes if change.get("category_id"))
+        if category_ids:
+            result = await db.execute(select(ItemCategory.id).where(ItemCategory.id.in_(category_ids)))
+            if len(result.all()) < len(category_ids):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Category not found"
+                )
+        
+        assignees = {item.assigned_to for item in new_items if item.assigned_to}
+        assignees.update(change["assigned_to"] for change in changes if change.get("assigned_to"))
+        for assignee in assignees:
+            if not await self._user_has_access(db, list_id, assignee):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Cannot assign item to user who doesn't have access to this list"
+                )
+    
+    async def _update_items(
+        self,
+        db: AsyncSession,
+        changes: Dict[UUID, Dict[str, Any]],
+        existing: Dict[UUID, Any]
+    ) -> List[ShoppingItem]:
+        """
+        Apply per-item changes with one UPDATE ... FROM (VALUES ...) RETURNING
+        
+        Each VALUES row carries every column touched by any change, filled
+        with the item's current (locked) value where its own change leaves
+        the column alone. Returns the updated items in the order of changes.
+        """
+        fields = sorted({field for change in changes.values() for field in change})
+        if not changes:
+            return []
+        if not fields:
+            # Nothing to write, but callers still get items, not the locked rows
+            result = await db.execute(
+                select(ShoppingItem)
+                .where(ShoppingItem.id.in_(list(changes)))
+                .execution_options(populate_existing=True)
+            )
+            loaded = {item.id: item for item in result.scalars().all()}
+            return [loaded[item_id] for item_id in changes]
+        
+        item_columns = ShoppingItem.__table__.c
+        rows = [
+            (item_id, *[change.get(field, getattr(existing[item_id], field)) for field in fields])
+            for item_id, change in changes.items()
+        ]
+        new_values = values(
+            column("id", item_columns.id.type),
+            *[column(field, item_columns[field].type) for field in fields],
+            name="new_values"
+        ).data(rows)
+        
+        assignments = {field: new_values.c[field] for field in fields}
+        if "completed" in fields:
+            # SET expressions see the row as it was before this UPDATE
+            assignments["completed_at"] = case(
+                (and_(new_values.c.completed, ~ShoppingItem.completed), func.now()),
+                (~new_values.c.completed, None),
+                else_=ShoppingItem.completed_at
+            )
+        
+        result = await db.execute(
+            update(ShoppingItem)
+            .where(ShoppingItem.id == new_values.c.id)
+            .values(**assignments)
+            .returning(ShoppingItem),
+            execution_options={"synchronize_session": False}
+        )
+        updated = {item.id: item for item in result.scalars().all()}
+        return [updated[item_id] for item_id in changes]
+    
     async def add_collaborator(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         list_id: str, 
         collaborator_data: ListCollaboratorCreate, 
         user_id: str
     ) -> ListCollaborator:
         """Add a collaborator to a shopping list"""
-        db_list = await self.get_list_by_id(db, list_id, user_id)
+        permissions = await self._authorize(
+            db, list_id, user_id, ListPermission.OWNER, "Only the list owner can add collaborators"
+        )
+        db_list = await self._load_list(db, list_id) if permissions is not None else None
         if not db_list:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Shopping list not found"
             )
         
-        # Only owner can add collaborators
-        if str(db_list.owner_id) != str(user_id):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Only the list owner can add collaborators"
-            )
-        
         # Check if user exists
-        collaborator_user = db.query(User).filter(
-            User.id == collaborator_data.user_id
-        ).first()
+        result = await db.execute(
+            select(User).where(User.id == collaborator_data.user_id)
+        )
+        collaborator_user = result.scalars().first()
         if not collaborator_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -410,12 +804,15 @@ class ShoppingListService:
             )
         
         # Check if user is already a collaborator
-        existing = db.query(ListCollaborator).filter(
-            and_(
-                ListCollaborator.list_id == list_id,
-                ListCollaborator.user_id == collaborator_data.user_id
+        result = await db.execute(
+            select(ListCollaborator).where(
+                and_(
+                    ListCollaborator.list_id == list_id,
+                    ListCollaborator.user_id == collaborator_data.user_id
+                )
             )
-        ).first()
+        )
+        existing = result.scalars().first()
         
         if existing:
             raise HTTPException(
@@ -428,12 +825,16 @@ class ShoppingListService:
             list_id=list_id,
             user_id=collaborator_data.user_id,
             role=collaborator_data.role,
-            permissions=collaborator_data.permissions or self._get_default_permissions(collaborator_data.role)
+            permissions=collaborator_data.permissions or self._get_default_permissions(collaborator_data.role),
+            user=collaborator_user
         )
         
         db.add(db_collaborator)
-        db.commit()
-        db.refresh(db_collaborator)
+        await db.commit()
+        await list_permission_cache.invalidate(list_id, [collaborator_data.user_id])
+        await activity_timeline.invalidate(collaborator_data.user_id)
+        await db.refresh(db_collaborator, ["invited_at"])
+        await db.refresh(db_list, ["collaborators"])
         
         # Log activity
         await self._log_activity(
@@ -451,29 +852,28 @@ class ShoppingListService:
     
     async def remove_collaborator(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         list_id: str, 
         collaborator_user_id: str, 
         user_id: str
     ) -> bool:
         """Remove a collaborator from a shopping list"""
-        db_list = await self.get_list_by_id(db, list_id, user_id)
+        permissions = await self._authorize(
+            db, list_id, user_id, ListPermission.OWNER, "Only the list owner can remove collaborators"
+        )
+        db_list = await self._load_list(db, list_id) if permissions is not None else None
         if not db_list:
             return False
         
-        # Only owner can remove collaborators
-        if str(db_list.owner_id) != str(user_id):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Only the list owner can remove collaborators"
-            )
-        
-        db_collaborator = db.query(ListCollaborator).filter(
-            and_(
-                ListCollaborator.list_id == list_id,
-                ListCollaborator.user_id == collaborator_user_id
+        result = await db.execute(
+            select(ListCollaborator).where(
+                and_(
+                    ListCollaborator.list_id == list_id,
+                    ListCollaborator.user_id == collaborator_user_id
+                )
             )
-        ).first()
+        )
+        db_collaborator = result.scalars().first()
         
         if not db_collaborator:
             raise HTTPException(
@@ -482,7 +882,8 @@ class ShoppingListService:
             )
         
         # Log activity before deletion
-        collaborator_user = db.query(User).filter(User.id == collaborator_user_id).first()
+        result = await db.execute(select(User).where(User.id == collaborator_user_id))
+        collaborator_user = result.scalars().first()
         await self._log_activity(
             db, user_id, "list_collaborator", str(db_collaborator.id), "removed",
             {"collaborator_name": collaborator_user.name if collaborator_user else "Unknown", "list_id": list_id}
@@ -491,100 +892,130 @@ class ShoppingListService:
         # Send real-time notification for collaborator removal
         await self._notify_list_update(db_list, "collaborator_removed")
         
-        db.delete(db_collaborator)
-        db.commit()
+        # Remaining members drop the collaborator, the removed user drops the whole list
+        remaining_ids = [
+            member_id for member_id in self._list_member_ids(db_list)
+            if member_id != db_collaborator.user_id
+        ]
+        self._add_tombstones(db, "collaborator", db_collaborator.id, db_list.id, remaining_ids)
+        self._add_tombstones(db, "list", db_list.id, db_list.id, [db_collaborator.user_id])
+        await db.delete(db_collaborator)
+        await db.commit()
+        await list_permission_cache.invalidate(list_id, [db_collaborator.user_id])
+        await activity_timeline.invalidate(db_collaborator.user_id)
         
         return True
     
     # Private helper methods
-    async def _user_has_access(self, shopping_list: ShoppingList, user_id: str) -> bool:
-        """Check if user has access to the shopping list"""
-        if str(shopping_list.owner_id) == str(user_id):
-            return True
-        
-        return any(str(c.user_id) == str(user_id) for c in shopping_list.collaborators)
+    async def _apply_list_counters(
+        self,
+        db: AsyncSession,
+        list_id: str,
+        before: Iterable[Dict[str, Any]] = (),
+        after: Iterable[Dict[str, Any]] = ()
+    ):
+        """
+        Apply item writes to their list's counters, in the caller's transaction
+        
+        The change is a relative "SET item_count = item_count + n", so
+        concurrent writes to the same list serialize on the row lock instead
+        of overwriting each other's counts.
+        """
+        delta = counter_delta(before, after)
+        if not delta:
+            return
+        await db.execute(
+            update(ShoppingList)
+            .where(ShoppingList.id == list_id)
+            .values(
+                **{column: getattr(ShoppingList, column) + change for column, change in delta.items()},
+                # Counters aren't list edits; keep onupdate from bumping updated_at
+                updated_at=ShoppingList.updated_at
+            ),
+            execution_options={"synchronize_session": False}
+        )
     
-    async def _user_can_edit_list(self, shopping_list: ShoppingList, user_id: str) -> bool:
-        """Check if user can edit the shopping list"""
-        if str(shopping_list.owner_id) == str(user_id):
-            return True
-        
-        collaborator = next((c for c in shopping_list.collaborators if str(c.user_id) == str(user_id)), None)
-        return collaborator and collaborator.permissions.get("can_edit_list", False)
+    def _list_member_ids(self, shopping_list: ShoppingList) -> List[UUID]:
+        """Owner and collaborator user IDs of a list"""
+        return [shopping_list.owner_id] + [c.user_id for c in shopping_list.collaborators]
     
-    async def _user_can_add_items(self, shopping_list: ShoppingList, user_id: str) -> bool:
-        """Check if user can add items to the shopping list"""
-        if str(shopping_list.owner_id) == str(user_id):
-            return True
-        
-        collaborator = next((c for c in shopping_list.collaborators if str(c.user_id) == str(user_id)), None)
-        return collaborator and collaborator.permissions.get("can_add_items", True)
+    def _add_tombstones(
+        self, 
+        db: AsyncSession, 
+        entity_type: str, 
+        entity_id: UUID, 
+        list_id: UUID, 
+        user_ids: List[UUID]
+    ):
+        """Record a deletion for each affected user (committed with the delete)"""
+        for member_id in user_ids:
+            db.add(SyncTombstone(
+                user_id=member_id,
+                entity_type=entity_type,
+                entity_id=entity_id,
+                list_id=list_id
+            ))
     
-    async def _user_can_edit_items(self, shopping_list: ShoppingList, user_id: str) -> bool:
-        """Check if user can edit items in the shopping list"""
-        if str(shopping_list.owner_id) == str(user_id):
-            return True
+    async def _authorize(
+        self,
+        db: AsyncSession,
+        list_id: str,
+        user_id: str,
+        required: ListPermission = ListPermission.VIEW,
+        detail: str = "You don't have access to this shopping list"
+    ) -> Optional[ListPermission]:
+        """Check the user's permissions on a list before loading it; None if the list doesn't exist"""
+        permissions = await self.get_list_permissions(db, list_id, user_id)
+        if permissions is None:
+            return None
         
-        collaborator = next((c for c in shopping_list.collaborators if str(c.user_id) == str(user_id)), None)
-        return collaborator and collaborator.permissions.get("can_edit_items", True)
+        if not permissions & ListPermission.VIEW:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You don't have access to this shopping list"
+            )
+        if permissions & required != required:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=detail
+            )
+        return permissions
     
-    async def _user_can_delete_items(self, shopping_list: ShoppingList, user_id: str) -> bool:
-        """Check if user can delete items from the shopping list"""
-        if str(shopping_list.owner_id) == str(user_id):
-            return True
-        
-        collaborator = next((c for c in shopping_list.collaborators if str(c.user_id) == str(user_id)), None)
-        return collaborator and collaborator.permissions.get("can_delete_items", False)
+    async def _load_list(self, db: AsyncSession, list_id: str) -> Optional[ShoppingList]:
+        """Load a list with its items and collaborators (after authorization)"""
+        result = await db.execute(
+            select(ShoppingList).options(*LIST_DETAIL_LOADERS).where(ShoppingList.id == list_id)
+        )
+        return result.scalars().first()
+    
+    async def _load_member_ids(self, db: AsyncSession, list_id: str) -> List[UUID]:
+        """Owner and collaborator user IDs of a list, without loading it"""
+        result = await db.execute(union(
+            select(ShoppingList.owner_id).where(ShoppingList.id == list_id),
+            select(ListCollaborator.user_id).where(ListCollaborator.list_id == list_id)
+        ))
+        return list(result.scalars().all())
+    
+    async def _user_has_access(self, db: AsyncSession, list_id: str, user_id: str) -> bool:
+        """Check if user has access to the shopping list"""
+        permissions = await self.get_list_permissions(db, list_id, user_id)
+        return bool(permissions and permissions & ListPermission.VIEW)
     
     def _get_default_permissions(self, role: str) -> dict:
         """Get default permissions for a role"""
-        if role == "owner":
-            return {
-                "can_edit_items": True,
-                "can_add_items": True,
-                "can_delete_items": True,
-                "can_assign_items": True,
-                "can_invite_others": True,
-                "can_edit_list": True
-            }
-        elif role == "editor":
-            return {
-                "can_edit_items": True,
-                "can_add_items": True,
-                "can_delete_items": False,
-                "can_assign_items": True,
-                "can_invite_others": False,
-                "can_edit_list": False
-            }
-        else:  # viewer
-            return {
-                "can_edit_items": False,
-                "can_add_items": False,
-                "can_delete_items": False,
-                "can_assign_items": False,
-                "can_invite_others": False,
-                "can_edit_list": False
-            }
+        return dict(ROLE_PERMISSIONS.get(role, ROLE_PERMISSIONS["viewer"]))
     
     async def _log_activity(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_id: str, 
         entity_type: str, 
         entity_id: str, 
         action: str, 
         metadata: dict
     ):
-        """Log user activity"""
-        activity = ActivityLog(
-            user_id=user_id,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            action=action,
-            meta_data=metadata
-        )
-        db.add(activity)
-        db.commit()
+        """Queue user activity for the batched activity log writer (no extra commit)"""
+        activity_writer.record(user_id, entity_type, entity_id, action, metadata)
     
     async def _notify_list_update(self, shopping_list: ShoppingList, action: str):
         """Send real-time notification for list updates"""
@@ -613,6 +1044,19 @@ class ShoppingListService:
             # Don't fail the main operation if WebSocket notification fails
             print(f"Failed to send list update notification: {e}")
     
+    def _item_event_data(self, shopping_item: ShoppingItem, action: str) -> Dict[str, Any]:
+        """Item payload of item_update / items_batch_update events"""
+        return {
+            "id": str(shopping_item.id),
+            "name": shopping_item.name,
+            "quantity": float(shopping_item.quantity) if shopping_item.quantity else None,
+            "unit": shopping_item.unit,
+            "completed": shopping_item.completed,
+            "assigned_to": str(shopping_item.assigned_to) if shopping_item.assigned_to else None,
+            "action": action,
+            "list_id": str(shopping_item.list_id)
+        }
+    
     async def _notify_item_update(self, shopping_item: ShoppingItem, action: str):
         """Send real-time notification for item updates"""
         try:
@@ -620,16 +1064,7 @@ class ShoppingListService:
             # Import here to avoid circular imports
             from app.api.v1.endpoints.websocket import notify_item_update
             
-            item_data = {
-                "id": str(shopping_item.id),
-                "name": shopping_item.name,
-                "quantity": float(shopping_item.quantity) if shopping_item.quantity else None,
-                "unit": shopping_item.unit,
-                "completed": shopping_item.completed,
-                "assigned_to": str(shopping_item.assigned_to) if shopping_item.assigned_to else None,
-                "action": action,
-                "list_id": str(shopping_item.list_id)
-            }
+            item_data = self._item_event_data(shopping_item, action)
             
             print(f"🔔 DEBUG: Sending item update notification: {item_data}")
             await notify_item_update(item_data, str(shopping_item.list_id))
@@ -640,7 +1075,18 @@ class ShoppingListService:
             import traceback
             traceback.print_exc()
     
-    async def _notify_collaborator_added(self, db: Session, shopping_list: ShoppingList, collaborator_user: "User", inviter_id: str):
+    async def _notify_items_update(self, list_id: str, items_data: List[Dict[str, Any]]):
+        """Send one real-time notification covering several item changes"""
+        try:
+            # Import here to avoid circular imports
+            from app.api.v1.endpoints.websocket import notify_items_update
+            
+            await notify_items_update(items_data, str(list_id))
+        except Exception as e:
+            # Don't fail the main operation if WebSocket notification fails
+            print(f"❌ Failed to send item batch notification: {e}")
+    
+    async def _notify_collaborator_added(self, db: AsyncSession, shopping_list: ShoppingList, collaborator_user: "User", inviter_id: str):
         """Send notification to newly added collaborator"""
         try:
             # Import here to avoid circular imports
@@ -648,7 +1094,8 @@ class ShoppingListService:
             from app.models.user import User
             
             # Get inviter name
-            inviter = db.query(User).filter(User.id == inviter_id).first()
+            result = await db.execute(select(User).where(User.id == inviter_id))
+            inviter = result.scalars().first()
             inviter_name = inviter.name if inviter else "Someone"
             
             # Create notification data
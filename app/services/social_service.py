@@ -3,13 +3,16 @@ Social Service - Friend Management Business Logic
 """
 from typing import List, Optional
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, with_expression
+from sqlalchemy import select, and_, or_, func
 from fastapi import HTTPException, status
 
+from app.core.pagination import CursorPage, Keyset
 from app.models.social import Friendship, FriendRequest
 from app.models.user import User
-from app.models.activity import ActivityLog
+from app.core.activity_timeline import activity_timeline
+from app.core.activity_writer import activity_writer
 from app.schemas.social import FriendRequestCreate, FriendRequestUpdate
 
 
@@ -18,17 +21,18 @@ class SocialService:
     
     async def get_user_friends(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_id: str,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[Friendship]:
-        """Get all friends for a user"""
-        friendships = db.query(Friendship).options(
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> CursorPage:
+        """Get all friends for a user, most recent first"""
+        query = select(Friendship).options(
             joinedload(Friendship.user1),
             joinedload(Friendship.user2),
             joinedload(Friendship.initiator)
-        ).filter(
+        ).where(
             and_(
                 or_(
                     Friendship.user1_id == user_id,
@@ -36,112 +40,136 @@ class SocialService:
                 ),
                 Friendship.status == "active"
             )
-        ).offset(skip).limit(limit).all()
+        )
         
-        return friendships
+        keyset = Keyset(Friendship.created_at, Friendship.id, descending=True)
+        query = keyset.apply(query, cursor)
+        if not cursor:
+            query = query.offset(skip)
+        
+        result = await db.execute(query.limit(limit))
+        return keyset.page(result.scalars().all(), limit)
     
     async def get_friend_requests_received(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_id: str,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[FriendRequest]:
-        """Get friend requests received by user"""
-        requests = db.query(FriendRequest).options(
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> CursorPage:
+        """Get friend requests received by user, most recent first"""
+        query = select(FriendRequest).options(
             joinedload(FriendRequest.from_user),
             joinedload(FriendRequest.to_user)
-        ).filter(
+        ).where(
             and_(
                 FriendRequest.to_user_id == user_id,
                 FriendRequest.status == "pending"
             )
-        ).offset(skip).limit(limit).all()
+        )
+        
+        keyset = Keyset(FriendRequest.created_at, FriendRequest.id, descending=True)
+        query = keyset.apply(query, cursor)
+        if not cursor:
+            query = query.offset(skip)
         
-        return requests
+        result = await db.execute(query.limit(limit))
+        return keyset.page(result.scalars().all(), limit)
     
     async def get_friend_requests_sent(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_id: str,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[FriendRequest]:
-        """Get friend requests sent by user"""
-        requests = db.query(FriendRequest).options(
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> CursorPage:
+        """Get friend requests sent by user, most recent first"""
+        query = select(FriendRequest).options(
             joinedload(FriendRequest.from_user),
             joinedload(FriendRequest.to_user)
-        ).filter(
+        ).where(
             and_(
                 FriendRequest.from_user_id == user_id,
                 FriendRequest.status == "pending"
             )
-        ).offset(skip).limit(limit).all()
+        )
+        
+        keyset = Keyset(FriendRequest.created_at, FriendRequest.id, descending=True)
+        query = keyset.apply(query, cursor)
+        if not cursor:
+            query = query.offset(skip)
         
-        return requests
+        result = await db.execute(query.limit(limit))
+        return keyset.page(result.scalars().all(), limit)
     
     async def search_users(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         current_user_id: str,
         query: str,
         skip: int = 0,
-        limit: int = 20
-    ) -> List[User]:
-        """Search for users by name or email (excluding current user and existing friends)"""
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> CursorPage:
+        """Search for users by name or email, best matches first (excluding current user, friends and pending requests)"""
         if not query or len(query.strip()) < 2:
-            return []
-        
-        # Get existing friend IDs to exclude from search
-        existing_friends = await self.get_user_friends(db, current_user_id, 0, 1000)
-        friend_ids = set()
-        for friendship in existing_friends:
-            if str(friendship.user1_id) == str(current_user_id):
-                friend_ids.add(str(friendship.user2_id))
-            else:
-                friend_ids.add(str(friendship.user1_id))
-        
-        # Get pending friend request IDs to exclude
-        sent_requests = await self.get_friend_requests_sent(db, current_user_id, 0, 1000)
-        received_requests = await self.get_friend_requests_received(db, current_user_id, 0, 1000)
-        
-        pending_ids = set()
-        for req in sent_requests:
-            pending_ids.add(str(req.to_user_id))
-        for req in received_requests:
-            pending_ids.add(str(req.from_user_id))
+            return CursorPage([])
         
-        # Exclude current user, friends, and pending requests
-        exclude_ids = friend_ids.union(pending_ids)
-        exclude_ids.add(str(current_user_id))
+        term = query.strip()
+        rank = func.greatest(func.similarity(User.name, term), func.similarity(User.email, term))
         
-        # Search users
-        search_query = db.query(User).filter(
+        # Substring matches keep the old behaviour, the % operator adds typo-tolerant
+        # matches; pg_trgm GIN indexes serve all three
+        search_query = select(User).options(
+            with_expression(User.search_rank, rank)
+        ).where(
             and_(
                 User.is_active == True,
+                User.id != current_user_id,
                 or_(
-                    User.name.ilike(f"%{query}%"),
-                    User.email.ilike(f"%{query}%")
-                )
+                    User.name.ilike(f"%{term}%"),
+                    User.email.ilike(f"%{term}%"),
+                    User.name.op("%")(term)
+                ),
+                *self._search_exclusions(current_user_id)
             )
         )
         
-        if exclude_ids:
-            search_query = search_query.filter(~User.id.in_(exclude_ids))
+        keyset = Keyset(rank, User.id, descending=True, row_value=lambda user: user.search_rank)
+        search_query = keyset.apply(search_query, cursor)
+        if not cursor:
+            search_query = search_query.offset(skip)
         
-        users = search_query.offset(skip).limit(limit).all()
-        return users
+        result = await db.execute(search_query.limit(limit))
+        return keyset.page(result.scalars().all(), limit)
+    
+    def _search_exclusions(self, current_user_id: str) -> list:
+        """NOT EXISTS conditions dropping friends and pending requests (planned as anti-joins)"""
+        friendship = select(Friendship.id).where(Friendship.status == "active")
+        pending = select(FriendRequest.id).where(FriendRequest.status == "pending")
+        
+        # One clause per direction so each can use its own index
+        return [
+            ~friendship.where(Friendship.user1_id == current_user_id, Friendship.user2_id == User.id).exists(),
+            ~friendship.where(Friendship.user2_id == current_user_id, Friendship.user1_id == User.id).exists(),
+            ~pending.where(FriendRequest.from_user_id == current_user_id, FriendRequest.to_user_id == User.id).exists(),
+            ~pending.where(FriendRequest.to_user_id == current_user_id, FriendRequest.from_user_id == User.id).exists(),
+        ]
     
     async def send_friend_request(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         request_data: FriendRequestCreate, 
         from_user_id: str
     ) -> FriendRequest:
         """Send a friend request"""
         # Validate that users exist
-        from_user = db.query(User).filter(User.id == from_user_id).first()
-        to_user = db.query(User).filter(User.id == request_data.to_user_id).first()
+        result = await db.execute(select(User).where(User.id == from_user_id))
+        from_user = result.scalars().first()
+        result = await db.execute(select(User).where(User.id == request_data.to_user_id))
+        to_user = result.scalars().first()
         
         if not from_user:
             raise HTTPException(
@@ -162,15 +190,18 @@ class SocialService:
             )
         
         # Check if users are already friends
-        existing_friendship = db.query(Friendship).filter(
-            and_(
-                or_(
-                    and_(Friendship.user1_id == from_user_id, Friendship.user2_id == request_data.to_user_id),
-                    and_(Friendship.user1_id == request_data.to_user_id, Friendship.user2_id == from_user_id)
-                ),
-                Friendship.status == "active"
+        result = await db.execute(
+            select(Friendship).where(
+                and_(
+                    or_(
+                        and_(Friendship.user1_id == from_user_id, Friendship.user2_id == request_data.to_user_id),
+                        and_(Friendship.user1_id == request_data.to_user_id, Friendship.user2_id == from_user_id)
+                    ),
+                    Friendship.status == "active"
+                )
             )
-        ).first()
+        )
+        existing_friendship = result.scalars().first()
         
         if existing_friendship:
             raise HTTPException(
@@ -179,15 +210,18 @@ class SocialService:
             )
         
         # Check if there's already a pending request
-        existing_request = db.query(FriendRequest).filter(
-            and_(
-                or_(
-                    and_(FriendRequest.from_user_id == from_user_id, FriendRequest.to_user_id == request_data.to_user_id),
-                    and_(FriendRequest.from_user_id == request_data.to_user_id, FriendRequest.to_user_id == from_user_id)
-                ),
-                FriendRequest.status == "pending"
+        result = await db.execute(
+            select(FriendRequest).where(
+                and_(
+                    or_(
+                        and_(FriendRequest.from_user_id == from_user_id, FriendRequest.to_user_id == request_data.to_user_id),
+                        and_(FriendRequest.from_user_id == request_data.to_user_id, FriendRequest.to_user_id == from_user_id)
+                    ),
+                    FriendRequest.status == "pending"
+                )
             )
-        ).first()
+        )
+        existing_request = result.scalars().first()
         
         if existing_request:
             raise HTTPException(
@@ -200,12 +234,14 @@ class SocialService:
             from_user_id=from_user_id,
             to_user_id=request_data.to_user_id,
             message=request_data.message,
-            status="pending"
+            status="pending",
+            from_user=from_user,
+            to_user=to_user
         )
         
         db.add(friend_request)
-        db.commit()
-        db.refresh(friend_request)
+        await db.commit()
+        await db.refresh(friend_request, ["created_at"])
         
         # Log activity
         await self._log_activity(
@@ -217,16 +253,19 @@ class SocialService:
     
     async def respond_to_friend_request(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         request_id: str, 
         response_data: FriendRequestUpdate, 
         user_id: str
     ) -> Optional[Friendship]:
         """Respond to a friend request (accept or reject)"""
-        friend_request = db.query(FriendRequest).options(
-            joinedload(FriendRequest.from_user),
-            joinedload(FriendRequest.to_user)
-        ).filter(FriendRequest.id == request_id).first()
+        result = await db.execute(
+            select(FriendRequest).options(
+                joinedload(FriendRequest.from_user),
+                joinedload(FriendRequest.to_user)
+            ).where(FriendRequest.id == request_id)
+        )
+        friend_request = result.scalars().first()
         
         if not friend_request:
             raise HTTPException(
@@ -259,12 +298,15 @@ class SocialService:
                 user1_id=friend_request.from_user_id,
                 user2_id=friend_request.to_user_id,
                 status="active",
-                initiated_by=friend_request.from_user_id
+                initiated_by=friend_request.from_user_id,
+                user1=friend_request.from_user,
+                user2=friend_request.to_user
             )
             
             db.add(friendship)
-            db.commit()  # Commit to get the friendship ID
-            db.refresh(friendship)
+            await db.commit()  # Commit to get the friendship ID
+            await db.refresh(friendship, ["created_at", "updated_at"])
+            await activity_timeline.invalidate(friend_request.from_user_id, friend_request.to_user_id)
             
             # Log activity for both users
             await self._log_activity(
@@ -282,18 +324,19 @@ class SocialService:
                 db, user_id, "friend_request", request_id, "rejected",
                 {"from_user_name": friend_request.from_user.name, "from_user_id": str(friend_request.from_user_id)}
             )
-            db.commit()  # Only commit for rejection case
+            await db.commit()  # Only commit for rejection case
         
         return friendship
     
     async def cancel_friend_request(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         request_id: str, 
         user_id: str
     ) -> bool:
         """Cancel a sent friend request"""
-        friend_request = db.query(FriendRequest).filter(FriendRequest.id == request_id).first()
+        result = await db.execute(select(FriendRequest).where(FriendRequest.id == request_id))
+        friend_request = result.scalars().first()
         
         if not friend_request:
             return False
@@ -315,7 +358,7 @@ class SocialService:
         friend_request.status = "cancelled"
         friend_request.responded_at = func.now()
         
-        db.commit()
+        await db.commit()
         
         # Log activity
         await self._log_activity(
@@ -327,15 +370,18 @@ class SocialService:
     
     async def remove_friend(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         friendship_id: str, 
         user_id: str
     ) -> bool:
         """Remove a friend (unfriend)"""
-        friendship = db.query(Friendship).options(
-            joinedload(Friendship.user1),
-            joinedload(Friendship.user2)
-        ).filter(Friendship.id == friendship_id).first()
+        result = await db.execute(
+            select(Friendship).options(
+                joinedload(Friendship.user1),
+                joinedload(Friendship.user2)
+            ).where(Friendship.id == friendship_id)
+        )
+        friendship = result.scalars().first()
         
         if not friendship:
             return False
@@ -363,14 +409,15 @@ class SocialService:
         )
         
         # Delete the friendship
-        db.delete(friendship)
-        db.commit()
+        await db.delete(friendship)
+        await db.commit()
+        await activity_timeline.invalidate(friendship.user1_id, friendship.user2_id)
         
         return True
     
     async def block_user(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_to_block_id: str, 
         user_id: str
     ) -> bool:
@@ -382,7 +429,8 @@ class SocialService:
             )
         
         # Check if user exists
-        user_to_block = db.query(User).filter(User.id == user_to_block_id).first()
+        result = await db.execute(select(User).where(User.id == user_to_block_id))
+        user_to_block = result.scalars().first()
         if not user_to_block:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -390,29 +438,35 @@ class SocialService:
             )
         
         # Remove existing friendship if any
-        existing_friendship = db.query(Friendship).filter(
-            and_(
-                or_(
-                    and_(Friendship.user1_id == user_id, Friendship.user2_id == user_to_block_id),
-                    and_(Friendship.user1_id == user_to_block_id, Friendship.user2_id == user_id)
-                ),
-                Friendship.status == "active"
+        result = await db.execute(
+            select(Friendship).where(
+                and_(
+                    or_(
+                        and_(Friendship.user1_id == user_id, Friendship.user2_id == user_to_block_id),
+                        and_(Friendship.user1_id == user_to_block_id, Friendship.user2_id == user_id)
+                    ),
+                    Friendship.status == "active"
+                )
             )
-        ).first()
+        )
+        existing_friendship = result.scalars().first()
         
         if existing_friendship:
-            db.delete(existing_friendship)
+            await db.delete(existing_friendship)
         
         # Cancel any pending friend requests between users
-        pending_requests = db.query(FriendRequest).filter(
-            and_(
-                or_(
-                    and_(FriendRequest.from_user_id == user_id, FriendRequest.to_user_id == user_to_block_id),
-                    and_(FriendRequest.from_user_id == user_to_block_id, FriendRequest.to_user_id == user_id)
-                ),
-                FriendRequest.status == "pending"
+        result = await db.execute(
+            select(FriendRequest).where(
+                and_(
+                    or_(
+                        and_(FriendRequest.from_user_id == user_id, FriendRequest.to_user_id == user_to_block_id),
+                        and_(FriendRequest.from_user_id == user_to_block_id, FriendRequest.to_user_id == user_id)
+                    ),
+                    FriendRequest.status == "pending"
+                )
             )
-        ).all()
+        )
+        pending_requests = result.scalars().all()
         
         for request in pending_requests:
             request.status = "cancelled"
@@ -427,7 +481,9 @@ class SocialService:
         )
         
         db.add(blocked_relationship)
-        db.commit()
+        await db.commit()
+        if existing_friendship:
+            await activity_timeline.invalidate(user_id, user_to_block_id)
         
         # Log activity
         await self._log_activity(
@@ -439,25 +495,28 @@ class SocialService:
     
     async def unblock_user(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_to_unblock_id: str, 
         user_id: str
     ) -> bool:
         """Unblock a user"""
-        blocked_relationship = db.query(Friendship).filter(
-            and_(
-                Friendship.user1_id == user_id,
-                Friendship.user2_id == user_to_unblock_id,
-                Friendship.status == "blocked"
+        result = await db.execute(
+            select(Friendship).where(
+                and_(
+                    Friendship.user1_id == user_id,
+                    Friendship.user2_id == user_to_unblock_id,
+                    Friendship.status == "blocked"
+                )
             )
-        ).first()
+        )
+        blocked_relationship = result.scalars().first()
         
         if not blocked_relationship:
             return False
         
         # Remove the blocked relationship
-        db.delete(blocked_relationship)
-        db.commit()
+        await db.delete(blocked_relationship)
+        await db.commit()
         
         # Log activity
         await self._log_activity(
@@ -469,45 +528,52 @@ class SocialService:
     
     async def get_blocked_users(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_id: str,
         skip: int = 0,
         limit: int = 100
     ) -> List[Friendship]:
         """Get users blocked by the current user"""
-        blocked_relationships = db.query(Friendship).options(
-            joinedload(Friendship.user2)
-        ).filter(
-            and_(
-                Friendship.user1_id == user_id,
-                Friendship.status == "blocked"
-            )
-        ).offset(skip).limit(limit).all()
+        result = await db.execute(
+            select(Friendship).options(
+                joinedload(Friendship.user1),
+                joinedload(Friendship.user2)
+            ).where(
+                and_(
+                    Friendship.user1_id == user_id,
+                    Friendship.status == "blocked"
+                )
+            ).offset(skip).limit(limit)
+        )
+        blocked_relationships = result.scalars().all()
         
         return blocked_relationships
     
     async def is_blocked(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user1_id: str, 
         user2_id: str
     ) -> bool:
         """Check if user1 has blocked user2 or vice versa"""
-        blocked_relationship = db.query(Friendship).filter(
-            and_(
-                or_(
-                    and_(Friendship.user1_id == user1_id, Friendship.user2_id == user2_id),
-                    and_(Friendship.user1_id == user2_id, Friendship.user2_id == user1_id)
-                ),
-                Friendship.status == "blocked"
+        result = await db.execute(
+            select(Friendship).where(
+                and_(
+                    or_(
+                        and_(Friendship.user1_id == user1_id, Friendship.user2_id == user2_id),
+                        and_(Friendship.user1_id == user2_id, Friendship.user2_id == user1_id)
+                    ),
+                    Friendship.status == "blocked"
+                )
             )
-        ).first()
+        )
+        blocked_relationship = result.scalars().first()
         
         return blocked_relationship is not None
     
     async def get_friendship_status(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user1_id: str, 
         user2_id: str
     ) -> str:
@@ -520,29 +586,35 @@ class SocialService:
             return "blocked"
         
         # Check for active friendship
-        friendship = db.query(Friendship).filter(
-            and_(
-                or_(
-                    and_(Friendship.user1_id == user1_id, Friendship.user2_id == user2_id),
-                    and_(Friendship.user1_id == user2_id, Friendship.user2_id == user1_id)
-                ),
-                Friendship.status == "active"
+        result = await db.execute(
+            select(Friendship).where(
+                and_(
+                    or_(
+                        and_(Friendship.user1_id == user1_id, Friendship.user2_id == user2_id),
+                        and_(Friendship.user1_id == user2_id, Friendship.user2_id == user1_id)
+                    ),
+                    Friendship.status == "active"
+                )
             )
-        ).first()
+        )
+        friendship = result.scalars().first()
         
         if friendship:
             return "friends"
         
         # Check for pending friend request
-        pending_request = db.query(FriendRequest).filter(
-            and_(
-                or_(
-                    and_(FriendRequest.from_user_id == user1_id, FriendRequest.to_user_id == user2_id),
-                    and_(FriendRequest.from_user_id == user2_id, FriendRequest.to_user_id == user1_id)
-                ),
-                FriendRequest.status == "pending"
+        result = await db.execute(
+            select(FriendRequest).where(
+                and_(
+                    or_(
+                        and_(FriendRequest.from_user_id == user1_id, FriendRequest.to_user_id == user2_id),
+                        and_(FriendRequest.from_user_id == user2_id, FriendRequest.to_user_id == user1_id)
+                    ),
+                    FriendRequest.status == "pending"
+                )
             )
-        ).first()
+        )
+        pending_request = result.scalars().first()
         
         if pending_request:
             if str(pending_request.from_user_id) == str(user1_id):
@@ -555,31 +627,15 @@ class SocialService:
     # Private helper methods
     async def _log_activity(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_id: str, 
         entity_type: str, 
         entity_id: str, 
         action: str, 
         metadata: dict
     ):
-        """Log user activity"""
-        # Convert any non-serializable values
-        serializable_metadata = {}
-        for key, value in metadata.items():
-            if hasattr(value, '__float__'):  # Decimal, etc.
-                serializable_metadata[key] = float(value)
-            else:
-                serializable_metadata[key] = value
-        
-        activity = ActivityLog(
-            user_id=user_id,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            action=action,
-            meta_data=serializable_metadata
-        )
-        db.add(activity)
-        db.commit()
+        """Queue user activity for the batched activity log writer (no extra commit)"""
+        activity_writer.record(user_id, entity_type, entity_id, action, metadata)
     
     async def _notify_friend_request(self, friend_request: FriendRequest, action: str):
         """Send real-time notification for friend request updates"""
@@ -4,30 +4,35 @@ User service
 import os
 import uuid
 from typing import Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, or_
 from fastapi import UploadFile
-from app.core.security import get_password_hash, verify_password
+from app.core.activity_timeline import activity_timeline, friend_ids_select
+from app.core.principal_cache import principal_cache
+from app.core.security import password_hasher
 from app.models.user import User, UserPreferences
 from app.models.security import SecuritySettings, BiometricKey
 from app.schemas.user import UserCreate, UserUpdate, UserPreferencesUpdate, SecuritySettingsUpdate
 
 
 class UserService:
-    async def get_user_by_id(self, db: Session, user_id: str) -> Optional[User]:
+    async def get_user_by_id(self, db: AsyncSession, user_id: str) -> Optional[User]:
         """Get user by ID"""
-        return db.query(User).filter(User.id == user_id).first()
+        result = await db.execute(select(User).where(User.id == user_id))
+        return result.scalars().first()
     
-    async def get_user_by_email(self, db: Session, email: str) -> Optional[User]:
+    async def get_user_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
         """Get user by email"""
-        return db.query(User).filter(User.email == email).first()
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
     
-    async def get_user_by_phone(self, db: Session, phone: str) -> Optional[User]:
+    async def get_user_by_phone(self, db: AsyncSession, phone: str) -> Optional[User]:
         """Get user by phone"""
-        return db.query(User).filter(User.phone == phone).first()
+        result = await db.execute(select(User).where(User.phone == phone))
+        return result.scalars().first()
     
     async def get_user_by_email_or_phone(
-        self, db: Session, email: Optional[str], phone: Optional[str]
+        self, db: AsyncSession, email: Optional[str], phone: Optional[str]
     ) -> Optional[User]:
         """Get user by email or phone"""
         conditions = []
@@ -39,21 +44,25 @@ class UserService:
         if not conditions:
             return None
             
-        return db.query(User).filter(or_(*conditions)).first()
+        result = await db.execute(select(User).where(or_(*conditions)))
+        return result.scalars().first()
     
     async def get_user_by_phone_and_country(
-        self, db: Session, phone: str, country_code: str
+        self, db: AsyncSession, phone: str, country_code: str
     ) -> Optional[User]:
         """Get user by phone number and country code"""
-        return db.query(User).filter(
-            User.phone == phone,
-            User.country_code == country_code
-        ).first()
+        result = await db.execute(
+            select(User).where(
+                User.phone == phone,
+                User.country_code == country_code
+            )
+        )
+        return result.scalars().first()
     
-    async def create_user(self, db: Session, user_data: UserCreate) -> User:
+    async def create_user(self, db: AsyncSession, user_data: UserCreate) -> User:
         """Create a new user"""
         # Hash password
-        password_hash = get_password_hash(user_data.password)
+        password_hash = await password_hasher.hash(user_data.password)
         
         # Create user with default values for optional fields
         db_user = User(
@@ -67,8 +76,8 @@ class UserService:
         )
         
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         
         # Create default user preferences
         preferences = UserPreferences(
@@ -103,13 +112,13 @@ class UserService:
         )
         
         db.add(security_settings)
-        db.commit()
-        db.refresh(preferences)
+        await db.commit()
+        await db.refresh(preferences)
         
         return db_user
     
     async def update_user(
-        self, db: Session, user_id: str, user_data: UserUpdate
+        self, db: AsyncSession, user_id: str, user_data: UserUpdate
     ) -> Optional[User]:
         """Update user information"""
         db_user = await self.get_user_by_id(db, user_id)
@@ -122,18 +131,26 @@ class UserService:
         for field, value in update_data.items():
             setattr(db_user, field, value)
         
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await principal_cache.invalidate(user_id)
+        await db.refresh(db_user)
         
         return db_user
     
+    async def get_user_preferences(
+        self, db: AsyncSession, user_id: str
+    ) -> Optional[UserPreferences]:
+        """Get user preferences"""
+        result = await db.execute(
+            select(UserPreferences).where(UserPreferences.user_id == user_id)
+        )
+        return result.scalars().first()
+    
     async def update_user_preferences(
-        self, db: Session, user_id: str, preferences_data: UserPreferencesUpdate
+        self, db: AsyncSession, user_id: str, preferences_data: UserPreferencesUpdate
     ) -> Optional[UserPreferences]:
         """Update user preferences"""
-        db_preferences = db.query(UserPreferences).filter(
-            UserPreferences.user_id == user_id
-        ).first()
+        db_preferences = await self.get_user_preferences(db, user_id)
         
         if not db_preferences:
             return None
@@ -149,12 +166,12 @@ class UserService:
             else:
                 setattr(db_preferences, field, value)
         
-        db.commit()
-        db.refresh(db_preferences)
+        await db.commit()
+        await db.refresh(db_preferences)
         
         return db_preferences
     
-    async def deactivate_user(self, db: Session, user_id: str) -> bool:
+    async def deactivate_user(self, db: AsyncSession, user_id: str) -> bool:
         """Deactivate user account"""
         db_user = await self.get_user_by_id(db, user_id)
         
@@ -162,11 +179,12 @@ class UserService:
             return False
         
         db_user.is_active = False
-        db.commit()
+        await db.commit()
+        await principal_cache.invalidate(user_id)
         
         return True
     
-    async def activate_user(self, db: Session, user_id: str) -> bool:
+    async def activate_user(self, db: AsyncSession, user_id: str) -> bool:
         """Activate user account"""
         db_user = await self.get_user_by_id(db, user_id)
         
@@ -174,12 +192,13 @@ class UserService:
             return False
         
         db_user.is_active = True
-        db.commit()
+        await db.commit()
+        await principal_cache.invalidate(user_id)
         
         return True
     
     async def change_password(
-        self, db: Session, user_id: str, current_password: str, new_password: str
+        self, db: AsyncSession, user_id: str, current_password: str, new_password: str
     ) -> bool:
         """Change user password"""
         db_user = await self.get_user_by_id(db, user_id)
@@ -188,17 +207,17 @@ class UserService:
             return False
         
         # Verify current password
-        if not verify_password(current_password, db_user.password_hash):
+        if not await password_hasher.verify(current_password, db_user.password_hash):
             return False
         
         # Update password
-        db_user.password_hash = get_password_hash(new_password)
-        db.commit()
+        db_user.password_hash = await password_hasher.hash(new_password)
+        await db.commit()
         
         return True
     
     async def upload_avatar(
-        self, db: Session, user_id: str, file: UploadFile
+        self, db: AsyncSession, user_id: str, file: UploadFile
     ) -> Optional[str]:
         """Upload user avatar and return the URL"""
         db_user = await self.get_user_by_id(db, user_id)
@@ -223,11 +242,12 @@ class UserService:
         # Update user avatar URL (full URL for frontend)
         avatar_url = f"http://localhost:8000/uploads/avatars/{filename}"
         db_user.avatar_url = avatar_url
-        db.commit()
+        await db.commit()
+        await principal_cache.invalidate(user_id)
         
         return avatar_url
     
-    async def remove_avatar(self, db: Session, user_id: str) -> Optional[User]:
+    async def remove_avatar(self, db: AsyncSession, user_id: str) -> Optional[User]:
         """Remove user avatar"""
         db_user = await self.get_user_by_id(db, user_id)
         
@@ -242,13 +262,14 @@ class UserService:
         
         # Update user
         db_user.avatar_url = None
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await principal_cache.invalidate(user_id)
+        await db.refresh(db_user)
         
         return db_user
     
     async def deactivate_account(
-        self, db: Session, user_id: str, reason: Optional[str] = None
+        self, db: AsyncSession, user_id: str, reason: Optional[str] = None
     ) -> bool:
         """Deactivate user account with reason"""
         db_user = await self.get_user_by_id(db, user_id)
@@ -258,11 +279,12 @@ class UserService:
         
         db_user.is_active = False
         # You could store the reason in a separate table or metadata if needed
-        db.commit()
+        await db.commit()
+        await principal_cache.invalidate(user_id)
         
         return True
     
-    async def delete_account(self, db: Session, user_id: str) -> bool:
+    async def delete_account(self, db: AsyncSession, user_id: str) -> bool:
         """Permanently delete user account"""
         db_user = await self.get_user_by_id(db, user_id)
         
@@ -275,19 +297,25 @@ class UserService:
             if os.path.exists(file_path):
                 os.remove(file_path)
         
+        # Friends' timelines still hold this user's activity
+        friend_ids = (await db.execute(friend_ids_select(user_id))).scalars().all()
+        
         # Delete user (cascading will handle related records)
-        db.delete(db_user)
-        db.commit()
+        await db.delete(db_user)
+        await db.commit()
+        await principal_cache.invalidate(user_id)
+        await activity_timeline.invalidate(*friend_ids)
         
         return True
     
     async def get_security_settings(
-        self, db: Session, user_id: str
+        self, db: AsyncSession, user_id: str
     ) -> Optional[SecuritySettings]:
         """Get user security settings, create if not exists"""
-        security_settings = db.query(SecuritySettings).filter(
-            SecuritySettings.user_id == user_id
-        ).first()
+        result = await db.execute(
+            select(SecuritySettings).where(SecuritySettings.user_id == user_id)
+        )
+        security_settings = result.scalars().first()
         
         # Create default security settings if they don't exist
         if not security_settings:
@@ -299,13 +327,13 @@ class UserService:
                 max_sessions=5
             )
             db.add(security_settings)
-            db.commit()
-            db.refresh(security_settings)
+            await db.commit()
+            await db.refresh(security_settings)
         
         return security_settings
     
     async def update_security_settings(
-        self, db: Session, user_id: str, settings_data: SecuritySettingsUpdate
+        self, db: AsyncSession, user_id: str, settings_data: SecuritySettingsUpdate
     ) -> Optional[SecuritySettings]:
         """Update user security settings"""
         db_settings = await self.get_security_settings(db, user_id)
@@ -318,13 +346,13 @@ class UserService:
         for field, value in update_data.items():
             setattr(db_settings, field, value)
         
-        db.commit()
-        db.refresh(db_settings)
+        await db.commit()
+        await db.refresh(db_settings)
         
         return db_settings
     
     async def enable_biometric_auth(
-        self, db: Session, user_id: str, public_key: str, device_id: str
+        self, db: AsyncSession, user_id: str, public_key: str, device_id: str
     ) -> bool:
         """Enable biometric authentication for user"""
         db_settings = await self.get_security_settings(db, user_id)
@@ -333,10 +361,13 @@ class UserService:
             return False
         
         # Check if biometric key already exists for this device
-        existing_key = db.query(BiometricKey).filter(
-            BiometricKey.security_settings_id == db_settings.id,
-            BiometricKey.device_id == device_id
-        ).first()
+        result = await db.execute(
+            select(BiometricKey).where(
+                BiometricKey.security_settings_id == db_settings.id,
+                BiometricKey.device_id == device_id
+            )
+        )
+        existing_key = result.scalars().first()
         
         if existing_key:
             # Update existing key
@@ -355,11 +386,11 @@ class UserService:
         
         # Enable biometric authentication
         db_settings.biometric_enabled = True
-        db.commit()
+        await db.commit()
         
         return True
     
-    async def disable_biometric_auth(self, db: Session, user_id: str) -> bool:
+    async def disable_biometric_auth(self, db: AsyncSession, user_id: str) -> bool:
         """Disable biometric authentication for user"""
         db_settings = await self.get_security_settings(db, user_id)
         
@@ -367,12 +398,14 @@ class UserService:
             return False
         
         # Deactivate all biometric keys
-        db.query(BiometricKey).filter(
-            BiometricKey.security_settings_id == db_settings.id
-        ).update({"is_active": False})
+        await db.execute(
+            update(BiometricKey)
+            .where(BiometricKey.security_settings_id == db_settings.id)
+            .values(is_active=False)
+        )
         
         # Disable biometric authentication
         db_settings.biometric_enabled = False
-        db.commit()
+        await db.commit()
         
         return True
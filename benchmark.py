@@ -0,0 +1,629 @@
+#!/usr/bin/env python3
+"""
+PentryPal Benchmark Script
+==========================
+
+Micro-benchmarks for the hot paths of the PentryPal API.
+Each benchmark runs against the database/redis configured in settings
+(or .env) and prints a short throughput report.
+
+Usage:
+    python benchmark.py <benchmark> [options]
+
+Benchmarks:
+    db                  Sync Session vs AsyncSession request throughput
+    ws                  Room broadcast latency with simulated slow sockets
+    encode              json.dumps vs serialize-once orjson encode per event type
+    lists               Joined vs batched (selectin) loading of full shopping lists
+    auth                Event loop stalls from bcrypt inline vs on the password hash pool
+    activity            Per-mutation activity log commit vs the batched activity writer
+
+Options:
+    --concurrency       Number of concurrent simulated requests
+    --requests          Total number of simulated requests
+    --query-latency-ms  Extra server-side latency per query (pg_sleep)
+    --recipients        Comma separated room sizes for the ws benchmark
+    --slow-fraction     Fraction of ws recipients that are slow
+    --slow-delay-ms     Send latency of a slow ws recipient
+    --lists             Lists in the seeded fixture (lists benchmark)
+    --items-per-list    Items per seeded list (lists benchmark)
+    --collaborators     Collaborators per seeded list (lists benchmark)
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import json
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Tuple
+
+from sqlalchemy import delete, event, insert, select, text
+from sqlalchemy.orm import joinedload
+
+# Add the project root to the path so we can import the app package
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.activity_writer import ActivityLogWriter
+from app.core.config import settings
+from app.core.security import PasswordHasher, get_password_hash, verify_password
+from app.core.websocket import ConnectionManager, MessageEncoder
+from app.db.database import SessionLocal, AsyncSessionLocal, async_engine, engine
+from app.models.activity import ActivityLog
+from app.models.shopping_list import ShoppingList, ShoppingItem, ListCollaborator
+from app.models.user import User
+from app.services.shopping_list_service import LIST_DETAIL_LOADERS
+
+
+@dataclass
+class BenchmarkResult:
+    """Throughput numbers for a single benchmark run"""
+    name: str
+    requests: int
+    elapsed: float
+    
+    @property
+    def requests_per_second(self) -> float:
+        return self.requests / self.elapsed if self.elapsed else 0.0
+    
+    def report(self):
+        print(f"   {self.name:<28} {self.requests:>7} req  {self.elapsed:>8.3f}s  {self.requests_per_second:>10.1f} req/s")
+
+
+# =============================================================================
+# db: sync vs async session throughput
+# =============================================================================
+
+async def _run_concurrently(handler, total: int, concurrency: int) -> float:
+    """Run `total` calls of handler with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def one():
+        async with semaphore:
+            await handler()
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return time.perf_counter() - start
+
+
+async def benchmark_db(args) -> list:
+    """Compare the old blocking Session request path with AsyncSession"""
+    latency = args.query_latency_ms / 1000.0
+    
+    async def sync_request():
+        # Mirrors the old request path: an async handler doing blocking IO
+        db = SessionLocal()
+        try:
+            if latency:
+                db.execute(text("SELECT pg_sleep(:s)"), {"s": latency})
+            db.execute(select(User).limit(1)).scalars().first()
+        finally:
+            db.close()
+    
+    async def async_request():
+        async with AsyncSessionLocal() as db:
+            if latency:
+                await db.execute(text("SELECT pg_sleep(:s)"), {"s": latency})
+            (await db.execute(select(User).limit(1))).scalars().first()
+    
+    # Warm up both pools so connection setup is not measured
+    await _run_concurrently(sync_request, args.concurrency, args.concurrency)
+    await _run_concurrently(async_request, args.concurrency, args.concurrency)
+    
+    results = [
+        BenchmarkResult("sync Session", args.requests, await _run_concurrently(sync_request, args.requests, args.concurrency)),
+        BenchmarkResult("AsyncSession (asyncpg)", args.requests, await _run_concurrently(async_request, args.requests, args.concurrency)),
+    ]
+    
+    await async_engine.dispose()
+    engine.dispose()
+    return results
+
+
+# =============================================================================
+# ws: broadcast latency with slow consumers
+# =============================================================================
+
+class SimulatedWebSocket:
+    """WebSocket stand-in whose send_text takes `delay` seconds"""
+    
+    def __init__(self, delay: float, on_receive):
+        self.delay = delay
+        self.on_receive = on_receive
+    
+    async def accept(self):
+        pass
+    
+    async def close(self, code: int = 1000):
+        pass
+    
+    async def send_text(self, data: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.on_receive(self, data)
+
+
+async def benchmark_ws(args) -> list:
+    """Compare sequential awaited sends with per-connection send queues"""
+    results = []
+    slow_delay = args.slow_delay_ms / 1000.0
+    
+    for recipients in [int(n) for n in args.recipients.split(",")]:
+        slow_every = int(1 / args.slow_fraction) if args.slow_fraction else 0
+        delivered = {"fast": 0}
+        all_fast_delivered = asyncio.Event()
+        fast_total = 0
+        
+        def on_receive(websocket, data):
+            if '"benchmark"' in data and not websocket.delay:
+                delivered["fast"] += 1
+                if delivered["fast"] == fast_total:
+                    all_fast_delivered.set()
+        
+        manager = ConnectionManager()
+        room_id = "list_benchmark"
+        sockets = []
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            for n in range(recipients):
+                slow = slow_every and n % slow_every == 0
+                websocket = SimulatedWebSocket(slow_delay if slow else 0, on_receive)
+                fast_total += 0 if slow else 1
+                user_id = f"user-{n}"
+                sockets.append(websocket)
+                await manager.connect(websocket, user_id)
+                manager.user_rooms[user_id] = {room_id}
+            manager.room_subscriptions[room_id] = {f"user-{n}" for n in range(recipients)}
+        await asyncio.sleep(0.1)
+        
+        message = {"type": "benchmark", "list_id": "benchmark", "data": {"id": "item"}}
+        
+        # Old behaviour: await every recipient's send in turn
+        message_str = json.dumps(message)
+        start = time.perf_counter()
+        for websocket in sockets:
+            await websocket.send_text(message_str)
+        results.append(BenchmarkResult(f"sequential send x{recipients}", 1, time.perf_counter() - start))
+        
+        delivered["fast"] = 0
+        all_fast_delivered.clear()
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            start = time.perf_counter()
+            await manager.broadcast_to_room(message, room_id)
+            returned = time.perf_counter() - start
+            await all_fast_delivered.wait()
+            fast_done = time.perf_counter() - start
+            await manager.cleanup()
+        results.append(BenchmarkResult(f"queued broadcast x{recipients}", 1, returned))
+        results.append(BenchmarkResult(f"queued fast delivery x{recipients}", 1, fast_done))
+    
+    return results
+
+
+# =============================================================================
+# encode: WebSocket event serialization
+# =============================================================================
+
+def _sample_events() -> list:
+    """Representative WebSocket events as the services build them"""
+    list_id = "5f0c6a44-2b1e-4f55-9a63-0d7c1d0e8b11"
+    return [
+        {
+            "type": "item_update",
+            "list_id": list_id,
+            "data": {
+                "id": "a1f3c9e2-7d1b-4c1f-8a22-3b9e6f1d2c44",
+                "name": "Semi-skimmed milk",
+                "quantity": 2.0,
+                "unit": "l",
+                "completed": True,
+                "assigned_to": None,
+                "action": "completed",
+                "list_id": list_id
+            },
+            "timestamp": datetime.utcnow()
+        },
+        {
+            "type": "list_update",
+            "list_id": list_id,
+            "data": {
+                "id": list_id,
+                "name": "Weekly groceries",
+                "status": "active",
+                "action": "updated",
+                "owner_id": "0e7a2b8c-4f6d-4a9b-b1c2-d3e4f5a6b7c8",
+                "collaborators": [
+                    {"user_id": f"user-{n}", "role": "editor", "permissions": {"can_edit_items": True}}
+                    for n in range(5)
+                ]
+            },
+            "timestamp": datetime.utcnow()
+        },
+        {
+            "type": "notification",
+            "data": {
+                "type": "list_shared",
+                "title": "List Shared With You",
+                "message": "Sam shared \"Weekly groceries\" with you",
+                "list_id": list_id
+            },
+            "timestamp": datetime.utcnow()
+        },
+    ]
+
+
+async def benchmark_encode(args) -> list:
+    """Compare json.dumps (isoformat timestamps) with MessageEncoder per event type"""
+    results = []
+    encoder = MessageEncoder()
+    
+    for sample in _sample_events():
+        event_type = sample["type"]
+        
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            json.dumps({**sample, "timestamp": sample["timestamp"].isoformat()})
+        results.append(BenchmarkResult(f"json.dumps {event_type}", args.requests, time.perf_counter() - start))
+        
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            encoder.encode(sample)
+        results.append(BenchmarkResult(f"orjson encode {event_type}", args.requests, time.perf_counter() - start))
+    
+    print("⏱️ Encoder stats per event type:")
+    for event_type, stats in encoder.get_stats().items():
+        print(f"   {event_type:<28} {stats['count']:>7} encodes  avg {stats['avg_us']:>6.2f}us")
+    
+    return results
+
+
+# =============================================================================
+# Seeded fixture shared by the database benchmarks
+# =============================================================================
+
+class ListFixture:
+    """Owner with N lists, each with M items and K collaborators (sync session)"""
+    
+    def __init__(self, lists: int, items_per_list: int, collaborators: int):
+        self.lists = lists
+        self.items_per_list = items_per_list
+        self.collaborators = collaborators
+        self.tag = uuid.uuid4().hex[:8]
+        self.owner_id = None
+        self.user_ids = []
+        self.list_ids = []
+    
+    def create(self):
+        """Insert the fixture rows"""
+        db = SessionLocal()
+        try:
+            users = [
+                {
+                    "id": uuid.uuid4(),
+                    "email": f"bench-{self.tag}-{n}@benchmark.local",
+                    "phone": f"{n:010d}",
+                    "country_code": "US",
+                    "name": f"Benchmark {self.tag} {n}",
+                    "password_hash": "!",
+                    "is_active": True
+                }
+                for n in range(self.collaborators + 1)
+            ]
+            db.execute(insert(User), users)
+            self.user_ids = [user["id"] for user in users]
+            self.owner_id = self.user_ids[0]
+            
+            lists = [
+                {"id": uuid.uuid4(), "name": f"Benchmark list {n}", "owner_id": self.owner_id, "status": "active", "meta_data": {}}
+                for n in range(self.lists)
+            ]
+            db.execute(insert(ShoppingList), lists)
+            self.list_ids = [shopping_list["id"] for shopping_list in lists]
+            
+            for list_id in self.list_ids:
+                db.execute(insert(ShoppingItem), [
+                    {
+                        "list_id": list_id,
+                        "name": f"Item {n}",
+                        "quantity": 1,
+                        "unit": "pcs",
+                        "assigned_to": self.user_ids[n % len(self.user_ids)]
+                    }
+                    for n in range(self.items_per_list)
+                ])
+                db.execute(insert(ListCollaborator), [
+                    {"list_id": list_id, "user_id": user_id, "role": "editor", "permissions": {}}
+                    for user_id in self.user_ids[1:]
+                ])
+            db.commit()
+        finally:
+            db.close()
+    
+    def drop(self):
+        """Remove the fixture rows"""
+        db = SessionLocal()
+        try:
+            db.execute(delete(ShoppingItem).where(ShoppingItem.list_id.in_(self.list_ids)))
+            db.execute(delete(ListCollaborator).where(ListCollaborator.list_id.in_(self.list_ids)))
+            db.execute(delete(ShoppingList).where(ShoppingList.id.in_(self.list_ids)))
+            db.execute(delete(User).where(User.id.in_(self.user_ids)))
+            db.commit()
+        finally:
+            db.close()
+
+
+class RowCounter:
+    """Counts statements and rows returned by the async engine"""
+    
+    def __init__(self):
+        self.statements = 0
+        self.rows = 0
+        event.listen(async_engine.sync_engine, "after_cursor_execute", self._on_execute)
+    
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements += 1
+        self.rows += max(cursor.rowcount, 0)
+    
+    def reset(self):
+        self.statements = 0
+        self.rows = 0
+    
+    def close(self):
+        event.remove(async_engine.sync_engine, "after_cursor_execute", self._on_execute)
+
+
+# =============================================================================
+# lists: joined vs batched loading
+# =============================================================================
+
+# The previous get_user_lists loading strategy, kept for comparison
+JOINED_LIST_LOADERS = (
+    joinedload(ShoppingList.items).joinedload(ShoppingItem.category),
+    joinedload(ShoppingList.items).joinedload(ShoppingItem.assigned_user),
+    joinedload(ShoppingList.collaborators).joinedload(ListCollaborator.user),
+    joinedload(ShoppingList.owner)
+)
+
+
+async def benchmark_lists(args) -> list:
+    """Load every fixture list with items and collaborators using both strategies"""
+    fixture = ListFixture(args.lists, args.items_per_list, args.collaborators)
+    print(f"🌱 Seeding {args.lists} lists x {args.items_per_list} items x {args.collaborators} collaborators")
+    fixture.create()
+    
+    counter = RowCounter()
+    results = []
+    try:
+        for name, loaders in (("joinedload", JOINED_LIST_LOADERS), ("selectinload", LIST_DETAIL_LOADERS)):
+            query = select(ShoppingList).options(*loaders).where(ShoppingList.owner_id == fixture.owner_id)
+            
+            # Warm up, then time fresh sessions so the identity map is empty each run
+            async with AsyncSessionLocal() as db:
+                (await db.execute(query)).unique().scalars().all()
+            
+            counter.reset()
+            runs = max(args.requests // 100, 1)
+            start = time.perf_counter()
+            for _ in range(runs):
+                async with AsyncSessionLocal() as db:
+                    loaded = (await db.execute(query)).unique().scalars().all()
+                    assert sum(len(shopping_list.items) for shopping_list in loaded) == args.lists * args.items_per_list
+            elapsed = time.perf_counter() - start
+            
+            print(f"   {name:<14} {counter.statements // runs} statements, {counter.rows // runs} rows per load")
+            results.append(BenchmarkResult(f"{name} load", runs, elapsed))
+    finally:
+        counter.close()
+        fixture.drop()
+        await async_engine.dispose()
+    
+    return results
+
+
+# =============================================================================
+# auth: bcrypt on the event loop vs the password hash pool
+# =============================================================================
+
+async def _max_loop_stall(work) -> Tuple[float, float]:
+    """Run work while a 1ms ticker measures the longest event loop stall"""
+    longest = 0.0
+    done = False
+    
+    async def ticker():
+        nonlocal longest
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            longest = max(longest, now - last)
+            last = now
+    
+    task = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+    done = True
+    await task
+    return elapsed, longest
+
+
+async def benchmark_auth(args) -> list:
+    """Verify passwords concurrently inline and on the pool, reporting loop stalls"""
+    password_hash = get_password_hash("benchmark-password")
+    logins = max(args.requests // 100, 1)
+    hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, logins)
+    
+    async def inline_login():
+        verify_password("benchmark-password", password_hash)
+    
+    async def pooled_login():
+        await hasher.verify("benchmark-password", password_hash)
+    
+    results = []
+    for name, login in (("inline bcrypt", inline_login), ("password hash pool", pooled_login)):
+        elapsed, stall = await _max_loop_stall(lambda: _run_concurrently(login, logins, args.concurrency))
+        print(f"   {name:<20} longest event loop stall {stall * 1000:>8.1f}ms")
+        results.append(BenchmarkResult(name, logins, elapsed))
+    
+    return results
+
+
+# =============================================================================
+# activity: inline activity log commits vs the batched writer
+# =============================================================================
+
+async def benchmark_activity(args) -> list:
+    """Simulate list renames that log activity inline (second commit) or via the writer"""
+    fixture = ListFixture(1, 1, 1)
+    fixture.create()
+    owner_id = fixture.owner_id
+    list_id = fixture.list_ids[0]
+    writer = ActivityLogWriter()
+    
+    async def mutate(db):
+        shopping_list = await db.get(ShoppingList, list_id)
+        shopping_list.name = f"Renamed {uuid.uuid4().hex[:6]}"
+        await db.commit()
+    
+    async def inline_request():
+        async with AsyncSessionLocal() as db:
+            await mutate(db)
+            db.add(ActivityLog(user_id=owner_id, entity_type="shopping_list", entity_id=list_id, action="updated", meta_data={}))
+            await db.commit()
+    
+    async def buffered_request():
+        async with AsyncSessionLocal() as db:
+            await mutate(db)
+            writer.record(owner_id, "shopping_list", list_id, "updated", {})
+    
+    results = []
+    try:
+        for name, handler in (("inline log commit", inline_request), ("batched activity writer", buffered_request)):
+            results.append(BenchmarkResult(name, args.requests, await _run_concurrently(handler, args.requests, args.concurrency)))
+        
+        start = time.perf_counter()
+        await writer.stop()
+        print(f"   writer drained its remaining rows in {(time.perf_counter() - start) * 1000:.1f}ms: {writer.get_stats()}")
+    finally:
+        db = SessionLocal()
+        try:
+            db.execute(delete(ActivityLog).where(ActivityLog.user_id == owner_id))
+            db.commit()
+        finally:
+            db.close()
+        fixture.drop()
+        await async_engine.dispose()
+    
+    return results
+
+
+BENCHMARKS = {
+    "db": benchmark_db,
+    "ws": benchmark_ws,
+    "encode": benchmark_encode,
+    "lists": benchmark_lists,
+    "auth": benchmark_auth,
+    "activity": benchmark_activity,
+}
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description="PentryPal Benchmark Script",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    
+    parser.add_argument(
+        'benchmark',
+        choices=sorted(BENCHMARKS.keys()),
+        help='Benchmark to run'
+    )
+    
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=30,
+        help='Number of concurrent simulated requests (default: 30)'
+    )
+    
+    parser.add_argument(
+        '--requests',
+        type=int,
+        default=1000,
+        help='Total number of simulated requests (default: 1000)'
+    )
+    
+    parser.add_argument(
+        '--query-latency-ms',
+        type=float,
+        default=5.0,
+        help='Extra server-side latency per query in ms (default: 5)'
+    )
+    
+    parser.add_argument(
+        '--recipients',
+        type=str,
+        default='1000,10000',
+        help='Comma separated room sizes for the ws benchmark (default: 1000,10000)'
+    )
+    
+    parser.add_argument(
+        '--slow-fraction',
+        type=float,
+        default=0.01,
+        help='Fraction of ws recipients that are slow (default: 0.01)'
+    )
+    
+    parser.add_argument(
+        '--slow-delay-ms',
+        type=float,
+        default=50.0,
+        help='Send latency of a slow ws recipient in ms (default: 50)'
+    )
+    
+    parser.add_argument(
+        '--lists',
+        type=int,
+        default=5,
+        help='Lists in the seeded fixture (default: 5)'
+    )
+    
+    parser.add_argument(
+        '--items-per-list',
+        type=int,
+        default=200,
+        help='Items per seeded list (default: 200)'
+    )
+    
+    parser.add_argument(
+        '--collaborators',
+        type=int,
+        default=10,
+        help='Collaborators per seeded list (default: 10)'
+    )
+    
+    args = parser.parse_args()
+    
+    print(f"🚀 Running '{args.benchmark}' benchmark "
+          f"(requests={args.requests}, concurrency={args.concurrency})")
+    
+    try:
+        results = asyncio.run(BENCHMARKS[args.benchmark](args))
+    except Exception as e:
+        print(f"❌ Benchmark failed: {str(e)}")
+        sys.exit(1)
+    
+    print("📊 Results:")
+    for result in results:
+        result.report()
+    print("✅ Benchmark complete")
+
+
+if __name__ == '__main__':
+    main()
@@ -22,8 +22,9 @@ Operations:
     all                 Run all cleanup operations (default)
     expired             Clean expired/old data
     orphaned            Clean orphaned records
-    activity            Archive old activity logs
+    activity            Drop expired activity log partitions
     test-data           Remove test data
+    counters            Repair drifted shopping list item counters
     optimize            Optimize database
 """
 
@@ -47,11 +48,16 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 from db.database import Base
 from models.user import User, UserPreferences
 from models.security import SecuritySettings
-from models.shopping_list import ShoppingList, ShoppingItem, ListCollaborator
+from models.shopping_list import ShoppingList, ShoppingItem, ListCollaborator, SyncTombstone
 from models.pantry import PantryItem
 from models.social import Friendship, FriendRequest
 from models.category import ItemCategory
 from models.activity import ActivityLog
+from db.partitions import (
+    ACTIVITY_LOGS_DEFAULT_PARTITION, drop_activity_log_partition, ensure_activity_log_partitions,
+    expired_activity_log_partitions, is_partitioned
+)
+from db.list_counters import drifted_list_ids, reconcile_list_counters
 from models.security import BiometricKey
 from core.config import settings
 
@@ -67,7 +73,9 @@ class CleanupStats:
     friend_requests_cleaned: int = 0
     friendships_cleaned: int = 0
     biometric_keys_cleaned: int = 0
+    sync_tombstones_cleaned: int = 0
     orphaned_records_cleaned: int = 0
+    list_counters_repaired: int = 0
     total_space_freed: float = 0.0
 
 
@@ -175,6 +183,9 @@ class DatabaseCleaner:
             if 'all' in operations or 'test-data' in operations:
                 self.cleanup_test_data()
             
+            if 'all' in operations or 'counters' in operations:
+                self.repair_list_counters()
+            
             if 'all' in operations or 'optimize' in operations:
                 self.optimize_database()
             
@@ -205,6 +216,9 @@ class DatabaseCleaner:
         # Clean expired biometric keys
         self._cleanup_expired_biometric_keys()
         
+        # Clean sync tombstones past the delta-sync retention window
+        self._cleanup_expired_sync_tombstones()
+        
         # Clean inactive users (optional - be very careful with this)
         # self._cleanup_inactive_users()
     
@@ -284,6 +298,25 @@ class DatabaseCleaner:
                 self.stats.biometric_keys_cleaned += count
                 self.logger.info(f"Would clean {count} expired biometric keys")
     
+    def _cleanup_expired_sync_tombstones(self):
+        """Remove sync tombstones older than the delta-sync retention window"""
+        # Clients with older cursors get a full sync, so these are never read again
+        cutoff_date = datetime.utcnow() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        
+        query = self.db.query(SyncTombstone).filter(SyncTombstone.deleted_at < cutoff_date)
+        
+        count = query.count()
+        if count > 0:
+            self.logger.info(f"Found {count} expired sync tombstones to clean")
+            
+            if not self.dry_run:
+                deleted = query.delete(synchronize_session=False)
+                self.stats.sync_tombstones_cleaned += deleted
+                self.logger.info(f"Cleaned {deleted} expired sync tombstones")
+            else:
+                self.stats.sync_tombstones_cleaned += count
+                self.logger.info(f"Would clean {count} expired sync tombstones")
+    
     def cleanup_orphaned_records(self):
         """Clean up orphaned records"""
         self.logger.info("=== Cleaning orphaned records ===")
@@ -388,11 +421,57 @@ class DatabaseCleaner:
                 self.logger.info(f"Would clean {count} orphaned user preferences")
     
     def cleanup_activity_logs(self):
-        """Clean up old activity logs"""
+        """
+        Clean up old activity logs
+        
+        activity_logs is partitioned by month, so retention drops every
+        partition whose month ended before the cutoff instead of deleting rows
+        (the month containing the cutoff is kept until it fully expires). Old
+        rows that landed in the default partition are deleted, and upcoming
+        monthly partitions are created (newer rows in the default partition
+        move into the partition created for their month). Unpartitioned databases (migration not
+        yet applied) fall back to batched deletes.
+        """
         self.logger.info("=== Cleaning activity logs ===")
         
         cutoff_date = datetime.utcnow() - timedelta(days=self.config.activity_log_retention_days)
+        conn = self.db.connection()
         
+        if not is_partitioned(conn):
+            self._delete_old_activity_logs(cutoff_date)
+            return
+        
+        for name in expired_activity_log_partitions(conn, cutoff_date):
+            # Planner estimate; only count (a full scan) if the partition was never analyzed
+            count = conn.execute(
+                text("SELECT CASE WHEN reltuples >= 0 THEN reltuples::bigint END FROM pg_class WHERE relname = :name"),
+                {"name": name}
+            ).scalar()
+            if count is None:
+                count = conn.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+            self.stats.activity_logs_cleaned += count
+            if not self.dry_run:
+                drop_activity_log_partition(conn, name)
+                self.logger.info(f"Dropped partition {name} (~{count} activity logs)")
+            else:
+                self.logger.info(f"Would drop partition {name} (~{count} activity logs)")
+        
+        default_filter = f"FROM {ACTIVITY_LOGS_DEFAULT_PARTITION} WHERE created_at < :cutoff"
+        count = conn.execute(text(f"SELECT count(*) {default_filter}"), {"cutoff": cutoff_date}).scalar()
+        if count > 0:
+            self.stats.activity_logs_cleaned += count
+            if not self.dry_run:
+                conn.execute(text(f"DELETE {default_filter}"), {"cutoff": cutoff_date})
+                self.logger.info(f"Cleaned {count} old activity logs from the default partition")
+            else:
+                self.logger.info(f"Would clean {count} old activity logs from the default partition")
+        
+        if not self.dry_run:
+            for name in ensure_activity_log_partitions(conn, settings.ACTIVITY_LOG_PARTITION_MONTHS_AHEAD):
+                self.logger.info(f"Created partition {name}")
+    
+    def _delete_old_activity_logs(self, cutoff_date: datetime):
+        """Batched row deletes for an unpartitioned activity_logs table"""
         query = self.db.query(ActivityLog).filter(
             ActivityLog.created_at < cutoff_date
         )
@@ -487,6 +566,31 @@ class DatabaseCleaner:
             )
         ).delete(synchronize_session=False)
     
+    def repair_list_counters(self):
+        """
+        Reconcile the denormalized shopping list counters with their items
+        
+        Item writes keep the counters exact; this fixes drift from anything
+        that bypassed them (manual SQL, restores, cascades from other scripts).
+        """
+        self.logger.info("=== Repairing shopping list counters ===")
+        
+        conn = self.db.connection()
+        list_ids = drifted_list_ids(conn)
+        if not list_ids:
+            return
+        
+        self.logger.info(f"Found {len(list_ids)} shopping lists with drifted counters")
+        if not self.dry_run:
+            batch_size = self.config.max_records_per_batch
+            for i in range(0, len(list_ids), batch_size):
+                repaired = reconcile_list_counters(conn, list_ids[i:i + batch_size])
+                self.stats.list_counters_repaired += len(repaired)
+            self.logger.info(f"Repaired counters of {self.stats.list_counters_repaired} shopping lists")
+        else:
+            self.stats.list_counters_repaired += len(list_ids)
+            self.logger.info(f"Would repair counters of {len(list_ids)} shopping lists")
+    
     def optimize_database(self):
         """Optimize database performance"""
         self.logger.info("=== Optimizing database ===")
@@ -553,7 +657,9 @@ class DatabaseCleaner:
         print(f"Friend requests cleaned: {self.stats.friend_requests_cleaned}")
         print(f"Friendships cleaned: {self.stats.friendships_cleaned}")
         print(f"Biometric keys cleaned: {self.stats.biometric_keys_cleaned}")
+        print(f"Sync tombstones cleaned: {self.stats.sync_tombstones_cleaned}")
         print(f"Orphaned records cleaned: {self.stats.orphaned_records_cleaned}")
+        print(f"List counters repaired: {self.stats.list_counters_repaired}")
         print("="*60)
         
         # Show database sizes
@@ -617,7 +723,7 @@ def main():
     
     parser.add_argument(
         '--operation',
-        choices=['all', 'expired', 'orphaned', 'activity', 'test-data', 'optimize'],
+        choices=['all', 'expired', 'orphaned', 'activity', 'test-data', 'counters', 'optimize'],
         default='all',
         help='Specify specific cleanup operation'
     )
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+PentryPal Product Catalog Loader
+================================
+
+Bulk-loads an offline GTIN dataset (CSV or TSV, optionally gzipped, with a
+header row) into the products table used by barcode lookups. The file is
+read as a stream: rows are normalized, COPYed into a temporary staging
+table in batches, and merged with one INSERT ... ON CONFLICT, so loading
+millions of products runs in constant memory and is safe to repeat.
+
+Recognized columns (first match wins, others are ignored):
+    gtin / code / barcode / ean / upc     required, normalized to GTIN-13
+    name / product_name                   required
+    brand / brands                        first brand of a comma-separated list
+    category / categories / main_category matched against item category names
+    default_unit / unit
+    image_url
+
+Run it after `alembic upgrade head`. API workers pick up reloaded products
+as their in-process cache entries expire (PRODUCT_CACHE_TTL_SECONDS).
+
+Usage:
+    python load_product_catalog.py products.csv.gz [--delimiter ','] [--batch-size N]
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, TextIO
+
+# Add the project root to the path so we can import the app package
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.product_catalog import normalize_gtin
+from app.db.database import engine
+
+COLUMN_ALIASES = {
+    "gtin": ("gtin", "code", "barcode", "ean", "upc"),
+    "name": ("name", "product_name"),
+    "brand": ("brand", "brands"),
+    "category": ("category", "categories", "main_category"),
+    "default_unit": ("default_unit", "unit"),
+    "image_url": ("image_url",),
+}
+
+STAGING_COLUMNS = ("seq", "gtin", "name", "brand", "category_id", "default_unit", "image_url")
+
+CREATE_STAGING_TABLE = """
+    CREATE TEMP TABLE product_staging (
+        seq bigint NOT NULL,
+        gtin varchar(13) NOT NULL,
+        name varchar(255) NOT NULL,
+        brand varchar(255),
+        category_id uuid,
+        default_unit varchar(50),
+        image_url text
+    ) ON COMMIT DROP
+"""
+
+# The last row wins when a GTIN repeats in the file; values the file leaves
+# empty don't erase what an earlier load stored
+MERGE_STAGING_ROWS = """
+    INSERT INTO products (gtin, name, brand, category_id, default_unit, image_url)
+    SELECT DISTINCT ON (gtin) gtin, name, brand, category_id, coalesce(default_unit, 'pcs'), image_url
+    FROM product_staging
+    ORDER BY gtin, seq DESC
+    ON CONFLICT (gtin) DO UPDATE SET
+        name = EXCLUDED.name,
+        brand = coalesce(EXCLUDED.brand, products.brand),
+        category_id = coalesce(EXCLUDED.category_id, products.category_id),
+        default_unit = EXCLUDED.default_unit,
+        image_url = coalesce(EXCLUDED.image_url, products.image_url),
+        updated_at = now()
+"""
+
+
+def open_dataset(path: str) -> TextIO:
+    """Open the dataset as text, transparently un-gzipping it"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def resolve_columns(header: List[str]) -> Dict[str, int]:
+    """Map each known field to its column index in the file"""
+    positions = {column.strip().lower(): i for i, column in enumerate(header)}
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in positions:
+                columns[field] = positions[alias]
+                break
+    return columns
+
+
+def match_category(value: str, categories: Dict[str, str]) -> Optional[str]:
+    """First entry of a (comma-separated) category value that names an item category"""
+    for part in value.split(","):
+        # Taxonomy tags look like "en:dairies"
+        name = part.split(":", 1)[-1].strip().lower()
+        if name in categories:
+            return categories[name]
+    return None
+
+
+class CatalogLoader:
+    """Streams a GTIN dataset into the products table"""
+    
+    def __init__(self, batch_size: int = 10000):
+        self.batch_size = batch_size
+        self.rows_read = 0
+        self.invalid_barcodes = 0
+        self.missing_names = 0
+        self.staged = 0
+    
+    def load(self, path: str, delimiter: Optional[str] = None) -> int:
+        """Load the file and return how many products were inserted or updated"""
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT lower(name), id FROM item_categories")
+            categories = {name: str(category_id) for name, category_id in cursor.fetchall()}
+            cursor.execute(CREATE_STAGING_TABLE)
+            
+            with open_dataset(path) as dataset:
+                if delimiter is None:
+                    delimiter = "\t" if "\t" in dataset.readline() else ","
+                    dataset.seek(0)
+                for batch in self._batches(csv.reader(dataset, delimiter=delimiter), categories):
+                    self._copy(cursor, batch)
+            
+            cursor.execute(MERGE_STAGING_ROWS)
+            loaded = cursor.rowcount
+            connection.commit()
+            return loaded
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+    
+    def _batches(self, reader, categories: Dict[str, str]) -> Iterator[List[tuple]]:
+        columns = resolve_columns(next(reader, []))
+        missing = {"gtin", "name"} - set(columns)
+        if missing:
+            raise ValueError(f"Dataset has no {' or '.join(sorted(missing))} column")
+        
+        def cell(row: List[str], field: str) -> Optional[str]:
+            index = columns.get(field)
+            value = row[index].strip() if index is not None and index < len(row) else ""
+            return value or None
+        
+        batch: List[tuple] = []
+        for row in reader:
+            self.rows_read += 1
+            gtin = normalize_gtin(cell(row, "gtin") or "")
+            if gtin is None:
+                self.invalid_barcodes += 1
+                continue
+            name = cell(row, "name")
+            if name is None:
+                self.missing_names += 1
+                continue
+            
+            brand = cell(row, "brand")
+            category = cell(row, "category")
+            unit = cell(row, "default_unit")
+            batch.append((
+                self.rows_read,
+                gtin,
+                name[:255],
+                brand.split(",")[0].strip()[:255] if brand else None,
+                match_category(category, categories) if category else None,
+                unit[:50] if unit else None,
+                cell(row, "image_url")
+            ))
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    def _copy(self, cursor, batch: List[tuple]):
+        buffer = io.StringIO()
+        # Unquoted empty fields are NULLs in COPY's CSV format
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY product_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+        self.staged += len(batch)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="PentryPal Product Catalog Loader")
+    parser.add_argument('path', help='CSV/TSV dataset file (.gz supported)')
+    parser.add_argument('--delimiter', default=None, help='Field delimiter (default: tab if the header has one, else comma)')
+    parser.add_argument('--batch-size', type=int, default=10000, help='Rows per COPY batch (default: 10000)')
+    args = parser.parse_args()
+    
+    if engine is None:
+        print("❌ Database engine is not available")
+        sys.exit(1)
+    
+    loader = CatalogLoader(args.batch_size)
+    print(f"📦 Loading product catalog from {args.path}")
+    started = time.perf_counter()
+    try:
+        loaded = loader.load(args.path, args.delimiter)
+    except Exception as e:
+        print(f"❌ Catalog load failed, nothing was changed: {e}")
+        sys.exit(1)
+    duration = time.perf_counter() - started
+    
+    print(f"   Rows read:        {loader.rows_read}")
+    print(f"   Invalid barcodes: {loader.invalid_barcodes}")
+    print(f"   Missing names:    {loader.missing_names}")
+    print(f"   Products loaded:  {loaded} (inserted or updated)")
+    print(f"✅ Done in {duration:.1f}s ({loader.rows_read / duration if duration else 0:.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
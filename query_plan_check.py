@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+PentryPal Query Plan Check
+==========================
+
+Seeds a fixture into the configured Postgres database, runs the hot service
+queries, and EXPLAINs every SELECT and UPDATE they issue with sequential scans
+disabled. A query whose plan still contains a Seq Scan has no usable index
+and fails the check.
+
+Run it after `alembic upgrade head` so the query indexes exist.
+
+Usage:
+    python query_plan_check.py [--lists N] [--items-per-list N] [--collaborators N] [--pantry-items N]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import delete, event, insert, or_
+
+# Add the project root to the path so we can import the app package
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.pantry_alerts import PantryAlertScheduler
+from app.db.database import SessionLocal, AsyncSessionLocal, async_engine
+from app.models.activity import ActivityLog
+from app.models.pantry import PantryItem
+from app.models.social import Friendship, FriendRequest
+from app.services.activity_service import ActivityService
+from app.services.pantry_service import PantryService
+from app.services.product_service import ProductService
+from app.services.shopping_list_service import ShoppingListService
+from app.services.social_service import SocialService
+from benchmark import ListFixture
+
+# Relations a check may still scan sequentially, keyed by check name
+ALLOWED_SEQ_SCANS: Dict[str, Set[str]] = {}
+
+
+class StatementRecorder:
+    """Collects the SELECT and UPDATE statements the async engine executes"""
+    
+    def __init__(self):
+        self.statements: List[Tuple[str, tuple]] = []
+        self.recording = False
+        event.listen(async_engine.sync_engine, "before_cursor_execute", self._on_execute)
+    
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.recording and statement.lstrip().upper().startswith(("SELECT", "UPDATE")):
+            self.statements.append((statement, parameters))
+    
+    def take(self) -> List[Tuple[str, tuple]]:
+        statements, self.statements = self.statements, []
+        return statements
+    
+    def close(self):
+        event.remove(async_engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+
+class PlanFixture(ListFixture):
+    """List fixture plus pantry items, friendships, friend requests and activity"""
+    
+    def __init__(self, lists: int, items_per_list: int, collaborators: int, pantry_items: int):
+        super().__init__(lists, items_per_list, collaborators)
+        self.pantry_items = pantry_items
+    
+    def create(self):
+        """Insert the fixture rows"""
+        super().create()
+        db = SessionLocal()
+        try:
+            today = date.today()
+            db.execute(insert(PantryItem), [
+                {
+                    "user_id": user_id,
+                    "name": f"Pantry item {n}",
+                    "quantity": n % 5,
+                    "unit": "pcs",
+                    "location": ("Pantry", "Fridge", "Freezer")[n % 3],
+                    "expiration_date": today + timedelta(days=n % 30) if n % 4 else None,
+                    "low_stock_threshold": 1
+                }
+                for user_id in self.user_ids
+                for n in range(self.pantry_items)
+            ])
+            
+            friends = self.user_ids[1:]
+            half = len(friends) // 2
+            db.execute(insert(Friendship), [
+                {"user1_id": self.owner_id, "user2_id": user_id, "status": "active", "initiated_by": self.owner_id}
+                for user_id in friends[:half]
+            ])
+            db.execute(insert(FriendRequest), [
+                {"from_user_id": user_id, "to_user_id": self.owner_id, "status": "pending"}
+                for user_id in friends[half:]
+            ] + [
+                {"from_user_id": self.owner_id, "to_user_id": user_id, "status": "rejected"}
+                for user_id in friends[half:]
+            ])
+            
+            db.execute(insert(ActivityLog), [
+                {"user_id": user_id, "entity_type": "shopping_list", "action": "updated", "meta_data": {}}
+                for user_id in self.user_ids
+                for _ in range(self.pantry_items)
+            ])
+            db.commit()
+        finally:
+            db.close()
+    
+    def drop(self):
+        """Remove the fixture rows"""
+        db = SessionLocal()
+        try:
+            db.execute(delete(PantryItem).where(PantryItem.user_id.in_(self.user_ids)))
+            db.execute(delete(Friendship).where(Friendship.user1_id.in_(self.user_ids)))
+            db.execute(delete(FriendRequest).where(
+                or_(FriendRequest.from_user_id.in_(self.user_ids), FriendRequest.to_user_id.in_(self.user_ids))
+            ))
+            db.execute(delete(ActivityLog).where(ActivityLog.user_id.in_(self.user_ids)))
+            db.commit()
+        finally:
+            db.close()
+        super().drop()
+
+
+def _seq_scans(plan: dict) -> List[str]:
+    """Relations read by Seq Scan nodes anywhere in a plan tree"""
+    relations = []
+    if plan.get("Node Type") == "Seq Scan":
+        relations.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        relations.extend(_seq_scans(child))
+    return relations
+
+
+async def _explain(statement: str, parameters) -> dict:
+    """EXPLAIN a captured statement with sequential scans discouraged"""
+    async with async_engine.connect() as conn:
+        await conn.exec_driver_sql("SET enable_seqscan = off")
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        plan = result.scalar()
+        await conn.rollback()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+async def run_checks(fixture: PlanFixture) -> List[str]:
+    """Run each service query, EXPLAIN what it issued, and return failures"""
+    shopping_list_service = ShoppingListService()
+    pantry_service = PantryService()
+    social_service = SocialService()
+    activity_service = ActivityService()
+    pantry_alert_scheduler = PantryAlertScheduler()
+    product_service = ProductService()
+    owner_id = str(fixture.owner_id)
+    list_id = str(fixture.list_ids[0])
+    since = datetime.now(timezone.utc) - timedelta(minutes=1)
+    
+    checks = {
+        "get_user_lists": lambda db: shopping_list_service.get_user_lists(db, owner_id),
+        "get_user_list_summaries": lambda db: shopping_list_service.get_user_list_summaries(db, owner_id),
+        "get_list_permissions": lambda db: shopping_list_service.get_list_permissions(db, list_id, owner_id),
+        "get_list_by_id": lambda db: shopping_list_service.get_list_by_id(db, list_id, owner_id),
+        "sync_user_lists": lambda db: shopping_list_service.sync_user_lists(db, owner_id, since),
+        "get_user_pantry_items[name]": lambda db: pantry_service.get_user_pantry_items(db, owner_id),
+        "get_user_pantry_items[expiration]": lambda db: pantry_service.get_user_pantry_items(
+            db, owner_id, sort_by="expiration_date"
+        ),
+        "get_expiring_items": lambda db: pantry_service.get_expiring_items(db, owner_id),
+        "get_low_stock_items": lambda db: pantry_service.get_low_stock_items(db, owner_id),
+        "pantry_alert_sweep": lambda db: pantry_alert_scheduler._claim_alerts([owner_id], date.today()),
+        "get_pantry_stats": lambda db: pantry_service.get_pantry_stats(db, owner_id),
+        "pantry_stat_counters": lambda db: pantry_service._pantry_stat_counters_from_db(db, owner_id),
+        "lookup_barcode": lambda db: product_service.lookup_barcode(db, "4006381333931"),
+        "search_products_by_prefix": lambda db: product_service.search_by_prefix(db, "400638"),
+        "get_user_friends": lambda db: social_service.get_user_friends(db, owner_id),
+        "get_friend_requests_received": lambda db: social_service.get_friend_requests_received(db, owner_id),
+        "get_friend_requests_sent": lambda db: social_service.get_friend_requests_sent(db, owner_id),
+        "search_users": lambda db: social_service.search_users(db, owner_id, f"Benchmark {fixture.tag}"),
+        "get_user_activity": lambda db: activity_service.get_user_activity(db, owner_id),
+        "friends_activity_from_db": lambda db: activity_service._friends_activity_from_db(db, owner_id, 50),
+    }
+    
+    recorder = StatementRecorder()
+    failures: List[str] = []
+    try:
+        for name, call in checks.items():
+            async with AsyncSessionLocal() as db:
+                recorder.recording = True
+                await call(db)
+                recorder.recording = False
+            
+            statements = recorder.take()
+            allowed = ALLOWED_SEQ_SCANS.get(name, set())
+            scanned = set()
+            for statement, parameters in statements:
+                plan = await _explain(statement, parameters)
+                scanned.update(_seq_scans(plan))
+            
+            unexpected = sorted(scanned - allowed)
+            if unexpected:
+                print(f"   ❌ {name}: seq scan on {', '.join(unexpected)} ({len(statements)} statements)")
+                failures.append(name)
+            elif scanned:
+                print(f"   ⚠️  {name}: allowed seq scan on {', '.join(sorted(scanned))} ({len(statements)} statements)")
+            else:
+                print(f"   ✅ {name}: index only ({len(statements)} statements)")
+    finally:
+        recorder.close()
+        await async_engine.dispose()
+    
+    return failures
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="PentryPal Query Plan Check")
+    parser.add_argument('--lists', type=int, default=200, help='Lists in the seeded fixture (default: 200)')
+    parser.add_argument('--items-per-list', type=int, default=20, help='Items per seeded list (default: 20)')
+    parser.add_argument('--collaborators', type=int, default=10, help='Collaborators per seeded list (default: 10)')
+    parser.add_argument('--pantry-items', type=int, default=200, help='Pantry items and activity rows per user (default: 200)')
+    args = parser.parse_args()
+    
+    fixture = PlanFixture(args.lists, args.items_per_list, args.collaborators, args.pantry_items)
+    print(f"🌱 Seeding fixture {fixture.tag}")
+    fixture.create()
+    try:
+        print("🔍 Explaining service queries with enable_seqscan = off")
+        failures = asyncio.run(run_checks(fixture))
+    finally:
+        print("🧹 Dropping fixture")
+        fixture.drop()
+    
+    if failures:
+        print(f"❌ {len(failures)} check(s) fell back to a sequential scan")
+        sys.exit(1)
+    print("✅ All service queries use an index")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+PentryPal WebSocket Backplane Harness
+=====================================
+
+Runs several ConnectionManager instances ("workers") against one shared
+in-process fake Redis server and checks that room and global broadcasts
+reach sockets connected to every worker exactly once.
+
+Requires the fakeredis package (pip install fakeredis).
+
+Usage:
+    python websocket_backplane_harness.py [--workers N] [--users-per-worker N]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from collections import Counter
+from typing import List
+
+# Add the project root to the path so we can import the app package
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    import fakeredis
+except ImportError:
+    print("❌ fakeredis is required for this harness: pip install fakeredis")
+    sys.exit(1)
+
+from app.core.websocket import ConnectionManager
+
+
+class FakeWebSocket:
+    """Minimal stand-in for starlette's WebSocket that records sent frames"""
+    
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.sent: List[dict] = []
+    
+    async def accept(self):
+        pass
+    
+    async def send_text(self, data: str):
+        self.sent.append(json.loads(data))
+    
+    def received(self, message_type: str) -> List[dict]:
+        return [message for message in self.sent if message.get("type") == message_type]
+
+
+async def settle(seconds: float = 0.3):
+    """Give the backplane listeners time to deliver"""
+    await asyncio.sleep(seconds)
+
+
+def check(condition: bool, description: str, failures: List[str]):
+    if condition:
+        print(f"   ✅ {description}")
+    else:
+        print(f"   ❌ {description}")
+        failures.append(description)
+
+
+async def run_harness(workers: int, users_per_worker: int) -> List[str]:
+    """Run the multi-worker scenarios and return the failed checks"""
+    server = fakeredis.FakeServer()
+    managers = [ConnectionManager() for _ in range(workers)]
+    for manager in managers:
+        await manager.initialize_redis(fakeredis.aioredis.FakeRedis(server=server))
+    
+    # Connect users round-robin to the workers and join them to one list room
+    sockets = {}
+    list_id = "harness-list"
+    room_id = f"list_{list_id}"
+    for worker_index, manager in enumerate(managers):
+        for n in range(users_per_worker):
+            user_id = f"user-{worker_index}-{n}"
+            websocket = FakeWebSocket(user_id)
+            sockets[user_id] = (manager, websocket)
+            await manager.connect(websocket, user_id)
+            await manager.join_room(user_id, room_id)
+    
+    # One bystander per worker who is connected but not in the room
+    for worker_index, manager in enumerate(managers):
+        user_id = f"bystander-{worker_index}"
+        websocket = FakeWebSocket(user_id)
+        sockets[user_id] = (manager, websocket)
+        await manager.connect(websocket, user_id)
+    
+    await settle()
+    failures: List[str] = []
+    room_users = [user_id for user_id in sockets if user_id.startswith("user-")]
+    
+    print("🧪 Item update published from worker 0")
+    await managers[0].send_item_update({"id": "item-1", "name": "Milk"}, list_id)
+    await settle()
+    counts = Counter({user_id: len(sockets[user_id][1].received("item_update")) for user_id in sockets})
+    check(all(counts[user_id] == 1 for user_id in room_users),
+          f"every room member on {workers} workers got the update exactly once", failures)
+    check(all(counts[user_id] == 0 for user_id in sockets if user_id.startswith("bystander-")),
+          "users outside the room got nothing", failures)
+    
+    print("🧪 List update published from the last worker")
+    await managers[-1].send_list_update({"id": list_id, "name": "Groceries"}, list_id)
+    await settle()
+    check(all(len(sockets[user_id][1].received("list_update")) == 1 for user_id in room_users),
+          "every room member got the list update exactly once", failures)
+    
+    print("🧪 exclude_user is honoured on remote workers")
+    excluded = room_users[-1]
+    await managers[0].broadcast_to_room({"type": "exclude_check"}, room_id, exclude_user=excluded)
+    await settle()
+    check(len(sockets[excluded][1].received("exclude_check")) == 0, "excluded user got nothing", failures)
+    check(all(len(sockets[user_id][1].received("exclude_check")) == 1 for user_id in room_users if user_id != excluded),
+          "everybody else got the message", failures)
+    
+    print("🧪 Global broadcast")
+    await managers[0].broadcast_to_all({"type": "system_announcement"})
+    await settle()
+    check(all(len(websocket.received("system_announcement")) == 1 for _, websocket in sockets.values()),
+          "every connected user got the announcement exactly once", failures)
+    
+    print("🧪 Rapid item edits are merged into one batch frame")
+    for n in range(10):
+        await managers[0].send_item_update({"id": f"batch-{n % 3}", "completed": n >= 7}, list_id)
+    await settle()
+    batches = [sockets[user_id][1].received("items_batch_update") for user_id in room_users]
+    check(all(len(received) == 1 and received[0]["data"]["count"] == 3 for received in batches),
+          "every room member got one items_batch_update with 3 items", failures)
+    check(all(item["completed"] for received in batches for item in received[0]["data"]["items"]),
+          "repeated edits collapsed to the final item state", failures)
+    
+    print("🧪 An item created and edited in one window is still sent as created")
+    await managers[0].send_item_update({"id": "new-1", "name": "Bread", "action": "created", "completed": False}, list_id)
+    await managers[0].send_item_update({"id": "ghost-1", "name": "Typo", "action": "created", "completed": False}, list_id)
+    await managers[0].send_item_update({"id": "new-1", "action": "completed", "completed": True}, list_id)
+    await managers[0].send_item_update({"id": "other-1", "action": "updated", "completed": False}, list_id)
+    await managers[0].send_item_update({"id": "ghost-1", "action": "deleted"}, list_id)
+    await settle()
+    frames = [sockets[user_id][1].received("items_batch_update")[-1]["data"]["items"] for user_id in room_users]
+    created = [{item["id"]: item for item in items}.get("new-1") for items in frames]
+    check(all(item and item["action"] == "created" and item["completed"] and item["name"] == "Bread" for item in created),
+          "the frame carries action created with the completed state", failures)
+    check(all([item["id"] for item in items] == ["new-1", "other-1"] for items in frames),
+          "an item created and deleted in the window was dropped", failures)
+    
+    print("🧪 Worker unsubscribes once its last room member leaves")
+    last_worker = managers[-1]
+    for user_id in list(last_worker.get_room_users(room_id)):
+        await last_worker.leave_room(user_id, room_id)
+    await settle()
+    await managers[0].send_item_update({"id": "item-2", "name": "Eggs"}, list_id)
+    await settle()
+    left_users = [user_id for user_id in room_users if sockets[user_id][0] is last_worker]
+    check(all(len(sockets[user_id][1].received("item_update")) == 1 for user_id in left_users),
+          "users who left the room got no further updates", failures)
+    check(room_id not in last_worker.room_subscriptions, "empty room was dropped on that worker", failures)
+    
+    for manager in managers:
+        await manager.cleanup()
+    
+    return failures
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="PentryPal WebSocket Backplane Harness")
+    parser.add_argument('--workers', type=int, default=3, help='Number of simulated workers (default: 3)')
+    parser.add_argument('--users-per-worker', type=int, default=2, help='Room members per worker (default: 2)')
+    args = parser.parse_args()
+    
+    print(f"🚀 Running backplane harness with {args.workers} workers")
+    failures = asyncio.run(run_harness(args.workers, args.users_per_worker))
+    
+    if failures:
+        print(f"❌ {len(failures)} check(s) failed")
+        sys.exit(1)
+    print("✅ All backplane checks passed")
+
+
+if __name__ == '__main__':
+    main()